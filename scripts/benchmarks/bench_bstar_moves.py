@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+B*-tree move throughput benchmark
+Times the three SA perturbations of example_BT/03_simulatedAnnealing.py on
+random trees of 1k and 10k nodes, alone (move + undo) and with evaluation
+(move + packing + fitness + undo).
+
+Usage: python3 bench_bstar_moves.py [nodes ...] [--moves N] [--evaluated-moves N] [--seed S]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example_BT")
+
+
+def load_optimizer_module():
+    """Import 03_simulatedAnnealing.py (not importable by name)"""
+    sys.path.insert(0, EXAMPLE_DIR)
+    path = os.path.join(EXAMPLE_DIR, "03_simulatedAnnealing.py")
+    spec = importlib.util.spec_from_file_location("bstar_sa", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def random_design(n, seed):
+    """Random blocks with 1-3 variants and a random B*-tree over them"""
+    rng = random.Random(seed)
+    blocks = []
+    nodes = []
+    for b in range(n):
+        variants = [{"width": round(rng.uniform(1.0, 10.0), 2), "height": round(rng.uniform(1.0, 10.0), 2)}
+                    for _ in range(rng.randint(1, 3))]
+        blocks.append({"name": "B%d" % b, "variants": variants})
+        nodes.append({"name": "B%d" % b, "x_min": 0.0, "y_min": 0.0,
+                      "x_max": variants[0]["width"], "y_max": variants[0]["height"],
+                      "x_child": {}, "y_child": {}})
+
+    free_slots = [(0, "x_child"), (0, "y_child")]
+    for b in range(1, n):
+        k = rng.randrange(len(free_slots))
+        free_slots[k], free_slots[-1] = free_slots[-1], free_slots[k]
+        parent, side = free_slots.pop()
+        nodes[parent][side] = nodes[b]
+        free_slots.append((b, "x_child"))
+        free_slots.append((b, "y_child"))
+
+    return {"blocks": blocks, "bstar_tree": {"root": nodes[0]}}
+
+
+def time_moves(optimizer, operation, moves, evaluate):
+    """Moves per second of one perturbation, each rolled back afterwards"""
+    start = time.perf_counter()
+    for _ in range(moves):
+        optimizer._begin_move()
+        operation()
+        if evaluate:
+            optimizer._calculate_fitness()
+        optimizer._undo()
+    return moves / (time.perf_counter() - start)
+
+
+def run(sizes, moves, evaluated_moves, seed):
+    module = load_optimizer_module()
+    results = []
+    for n in sizes:
+        optimizer = module.SimpleOptimizer(random_design(n, seed))
+        optimizer._calculate_fitness()
+        random.seed(seed)
+
+        operations = {
+            "op1_change_variant": optimizer._op1_change_variant,
+            "op2_swap_nodes": optimizer._op2_swap_nodes,
+            "op3_move_node": optimizer._op3_move_node,
+        }
+        entry = {"nodes": n, "moves": moves, "evaluated_moves": evaluated_moves,
+                 "moves_per_second": {}, "evaluated_moves_per_second": {}}
+        for name, operation in operations.items():
+            entry["moves_per_second"][name] = round(time_moves(optimizer, operation, moves, False), 1)
+            entry["evaluated_moves_per_second"][name] = round(
+                time_moves(optimizer, operation, evaluated_moves, True), 1)
+        results.append(entry)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="B*-tree SA move throughput")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000])
+    parser.add_argument("--moves", type=int, default=20000)
+    parser.add_argument("--evaluated-moves", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.sizes, args.moves, args.evaluated_moves, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+n8n handler codec benchmark
+Encode/decode throughput of the codecs in n8n_json_handler.py on the 14 KB
+device file and on a large synthetic placement result, plus the streaming
+stdin parser and length-prefixed frames.
+
+Usage: python3 bench_codec.py [--blocks N] [--repeat N]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example_SP")
+sys.path.insert(0, EXAMPLE_DIR)
+
+import n8n_json_handler as handler  # noqa: E402
+
+
+def synthetic_result(blocks, seed=1):
+    """Placement result shaped like sa_optimize output for `blocks` blocks"""
+    rng = random.Random(seed)
+    names = ["B%d" % b for b in range(blocks)]
+    placement = {}
+    for name in names:
+        x, y = round(rng.uniform(0, 1000), 2), round(rng.uniform(0, 1000), 2)
+        w, h = round(rng.uniform(1, 10), 2), round(rng.uniform(1, 10), 2)
+        placement[name] = {"x_min": x, "y_min": y, "x_max": round(x + w, 2), "y_max": round(y + h, 2),
+                           "width": w, "height": h}
+    return {
+        "blocks": [{"name": name, "variants": [{"width": p["width"], "height": p["height"]}]}
+                   for name, p in placement.items()],
+        "sequence_pair": {"r_plus": names, "r_minus": sorted(names, key=lambda _: rng.random()),
+                          "placement": placement},
+        "optimization_results": {"fitness_function": 1234.56, "optimization_method": "synthetic"},
+    }
+
+
+def throughput(function, size, repeat):
+    """Best-of-repeat bytes per second"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return round(size / best / 1e6, 1)
+
+
+def bench_input(name, data, repeat):
+    encoded = handler.JsonCodec().dumps(data)
+    size = len(encoded)
+    entry = {"input": name, "bytes": size, "MB_per_s": {}}
+
+    codecs = ["json"] + [name for name, module in (("orjson", handler.orjson), ("msgpack", handler.msgpack))
+                         if module is not None]
+    for codec_name in codecs:
+        codec = handler.get_codec(codec_name)
+        payload = codec.dumps(data)
+        entry["MB_per_s"][codec_name] = {
+            "encode": throughput(lambda: codec.dumps(data), size, repeat),
+            "decode": throughput(lambda: codec.loads(payload), size, repeat),
+        }
+
+    # Full stdin path of create_n8n_processor for one document
+    codec = handler.get_codec()
+    entry["MB_per_s"]["stream_parse"] = throughput(
+        lambda: handler.JsonItemStream(io.BytesIO(encoded), loads=codec.loads).items()[1], size, repeat)
+
+    frame = io.BytesIO()
+    handler.write_frame(frame, data)
+    framed = frame.getvalue()
+    entry["MB_per_s"]["frame"] = {
+        "codec": handler.frame_codec().name,
+        "write": throughput(lambda: handler.write_frame(io.BytesIO(), data), size, repeat),
+        "read": throughput(lambda: handler.read_frame(io.BytesIO(framed)), size, repeat),
+    }
+
+    # What sa_optimize used to add on top of the handler's own serialization
+    entry["MB_per_s"]["json_round_trip"] = throughput(
+        lambda: json.loads(json.dumps(data, ensure_ascii=False)), size, repeat)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="n8n handler codec throughput")
+    parser.add_argument("--blocks", type=int, default=20000, help="blocks in the large synthetic input")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(EXAMPLE_DIR, "01_moreDevices.json"), "r", encoding="utf-8") as f:
+        devices = json.load(f)
+
+    results = [
+        bench_input("01_moreDevices.json", devices, args.repeat * 20),
+        bench_input(f"synthetic_{args.blocks}_blocks", synthetic_result(args.blocks), args.repeat),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Contour update worst case benchmark
+Splicing one flat list per contour makes an update a memmove of every
+segment right of it, so the worst case for packing is a B*-tree whose root
+has a chain of n/2 thin blocks of alternating height to its right (n/2
+contour segments) and a stack of n/2 blocks of alternating width above it,
+each of which splits or merges a segment at the left end of the contour:
+O(n) per update, O(n^2) per packing. ContourStructure keeps the segments in
+chunks instead, so that stack should cost about as much per update as the
+same updates at the right end. Random trees keep a contour of a few dozen
+segments, a single chunk.
+
+Reports microseconds per update for that stack against the same updates at
+the right end of the contour, and the packing time per block and the final
+contour size of the worst-case tree and of a random tree of the same size.
+
+Usage: python3 bench_contour.py [blocks ...] [--repeat N] [--seed S]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from bench_bstar_moves import load_optimizer_module, random_design
+
+
+def comb(n):
+    """n/2 unit-width segments of alternating height 1 / 2 on x = 0 .. n/2"""
+    from bstar_contour import ContourStructure
+    contour = ContourStructure()
+    for i in range(n // 2):
+        contour.place(float(i), i + 1.0, 1.0 + i % 2)
+    return contour
+
+
+def time_updates(n, left):
+    """
+    Microseconds per place() of n/2 blocks stacked at the left or right end
+    of a comb; widths alternate 0.5 / 1, so every update splits or merges a
+    segment and shifts the segments right of it
+    """
+    contour = comb(n)
+    x = 0.0 if left else n // 2 - 1.0
+    start = time.perf_counter()
+    for i in range(n - n // 2):
+        contour.place(x, x + 0.5 + 0.5 * (i % 2), 1.0)
+    return (time.perf_counter() - start) / (n - n // 2) * 1e6
+
+
+def worst_case_design(n):
+    """
+    Root with a chain of n/2 unit-width x children of alternating height, and
+    n/2 y children of alternating width stacked above it
+    """
+    half = n // 2
+    blocks = []
+    nodes = []
+    for b in range(n):
+        width = 1.0 if b < half else 0.5 + 0.5 * (b % 2)
+        height = 1.0 + b % 2 if b < half else 1.0
+        blocks.append({"name": "B%d" % b, "variants": [{"width": width, "height": height}]})
+        nodes.append({"name": "B%d" % b, "x_min": 0.0, "y_min": 0.0, "x_max": width, "y_max": height,
+                      "x_child": {}, "y_child": {}})
+    for b in range(1, half):
+        nodes[b - 1]["x_child"] = nodes[b]
+    if half < n:
+        nodes[0]["y_child"] = nodes[half]
+    for b in range(half + 1, n):
+        nodes[b - 1]["y_child"] = nodes[b]
+    return {"blocks": blocks, "bstar_tree": {"root": nodes[0]}}
+
+
+def time_packing(module, design, repeat):
+    """(best of repeat full packings in microseconds per block, final contour segments)"""
+    optimizer = module.SimpleOptimizer(design)
+    best = float("inf")
+    for _ in range(repeat):
+        optimizer.dirty = 0
+        start = time.perf_counter()
+        optimizer._contour_placement()
+        best = min(best, time.perf_counter() - start)
+    return best / optimizer.n * 1e6, len(optimizer.contour.contour)
+
+
+def run(sizes, repeat, seed):
+    module = load_optimizer_module()
+    results = []
+    for n in sizes:
+        left = min(time_updates(n, True) for _ in range(repeat))
+        right = min(time_updates(n, False) for _ in range(repeat))
+        worst, worst_segments = time_packing(module, worst_case_design(n), repeat)
+        typical, typical_segments = time_packing(module, random_design(n, seed), repeat)
+        results.append({
+            "blocks": n,
+            "segments": n // 2,
+            "update_us_left_end": round(left, 3),
+            "update_us_right_end": round(right, 3),
+            "packing_us_per_block_worst_case": round(worst, 2),
+            "packing_us_per_block_random_tree": round(typical, 2),
+            "contour_segments_worst_case": worst_segments,
+            "contour_segments_random_tree": typical_segments,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="B*-tree contour update worst case")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.sizes, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
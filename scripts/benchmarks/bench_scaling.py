@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the SP and B*-tree engines
+Runs both pipelines (02 initial solution, full decode/pack, annealing) on
+synthetic designs from generate_designs.py, or on GSRC/MCNC benchmarks
+converted by import_floorplan.py (--design), and reports per engine and design:
+
+    create_seconds       02_createSP.py / 02_createBStarTree.py on the design
+    decodes_per_second   full SP decodes / full B*-tree packings per second
+    blocks_per_second    the same in placed blocks per second
+    iterations_per_second  annealing moves incl. evaluation per second
+    anneal_seconds       annealing runtime
+    peak_rss_mb          peak resident memory of the case
+    quality              fitness, area and dead space before and after annealing
+
+Each case runs in its own process so peak RSS is per case. The report is
+JSON with a timestamp and git revision so runs can be compared over time.
+
+Usage: python3 bench_scaling.py [sizes ...] [--design FILE ...] [--engines sp bt]
+                                [--iterations N] [--seed S] [--output FILE] [--timeout S]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from generate_designs import DEFAULT_SIZES, generate_design
+from import_floorplan import load_design
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ENGINES = ("sp", "bt")
+MIN_DECODE_SECONDS = 1.0  # Decode/pack timing repeats at least this long
+
+
+def load_script(example, script):
+    """Import a numbered example script (not importable by name)"""
+    directory = os.path.join(SCRIPTS_DIR, example)
+    sys.path.insert(0, directory)
+    name = f"{example}_{os.path.splitext(script)[0]}"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def repeat_rate(function):
+    """Calls per second of function, repeated for at least MIN_DECODE_SECONDS"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_DECODE_SECONDS:
+            return calls / elapsed
+
+
+def quality(metrics, fitness):
+    return {
+        "fitness": round(fitness, 2),
+        "dead_space_percentage": round(metrics["dead_space_percentage"], 2),
+        "aspect_ratio": round(metrics["aspect_ratio"], 3),
+        "area": round(metrics["placement_width"] * metrics["placement_height"], 2),
+        "placement_width": round(metrics["placement_width"], 2),
+        "placement_height": round(metrics["placement_height"], 2),
+    }
+
+
+def bench_sp(design, iterations, seed):
+    create = load_script("example_SP", "02_createSP.py")
+    sa = load_script("example_SP", "03_simulatedAnnealing.py")
+
+    start = time.perf_counter()
+    data = create.process_sequence_pair(design)
+    create_seconds = time.perf_counter() - start
+
+    variants = sa.extract_variants(data)
+    r_plus, r_minus = sa.initial_sequence_pair(list(variants), data)
+    state = sa.SequencePairState(variants, r_plus, r_minus, sa.initial_variant_indices(variants, data))
+    state.decode()
+    initial = quality(sa.placement_metrics(*state.bounds()), state.evaluate())
+    decodes = repeat_rate(state.decode)
+
+    random.seed(seed)
+    start = time.perf_counter()
+    best, best_fit, done = sa.anneal(state, max_iterations=iterations)[:3]
+    anneal_seconds = time.perf_counter() - start
+    state.restore(best)
+    state.decode()
+
+    return {
+        "create_seconds": round(create_seconds, 4),
+        "decodes_per_second": round(decodes, 2),
+        "blocks_per_second": round(decodes * len(variants), 1),
+        "iterations": done,
+        "iterations_per_second": round(done / anneal_seconds, 1),
+        "anneal_seconds": round(anneal_seconds, 3),
+        "quality": {"initial": initial, "final": quality(sa.placement_metrics(*state.bounds()), best_fit)},
+    }
+
+
+def bench_bt(design, iterations, seed):
+    create = load_script("example_BT", "02_createBStarTree.py")
+    sa = load_script("example_BT", "03_simulatedAnnealing.py")
+
+    start = time.perf_counter()
+    data = create.process_bstar_tree(design)
+    create_seconds = time.perf_counter() - start
+    if "error" in data:
+        raise RuntimeError(data["error"])
+
+    optimizer = sa.SimpleOptimizer(data)
+    fitness = optimizer._calculate_fitness()
+    initial = quality(optimizer.placement_metrics(), fitness)
+
+    def full_pack():
+        optimizer.touched.clear()
+        optimizer.dirty = 0
+        optimizer._contour_placement()
+
+    packs = repeat_rate(full_pack)
+
+    random.seed(seed)
+    start = time.perf_counter()
+    _, best_fit, done = optimizer.optimize(max_iterations=iterations)
+    anneal_seconds = time.perf_counter() - start
+
+    return {
+        "create_seconds": round(create_seconds, 4),
+        "decodes_per_second": round(packs, 2),
+        "blocks_per_second": round(packs * optimizer.n, 1),
+        "iterations": done,
+        "iterations_per_second": round(done / anneal_seconds, 1),
+        "anneal_seconds": round(anneal_seconds, 3),
+        "quality": {"initial": initial, "final": quality(optimizer.placement_metrics(), best_fit)},
+    }
+
+
+def run_case(engine, spec, iterations, seed):
+    """One engine/design measurement in this process; spec is a block count or a benchmark file"""
+    if spec.isdigit():
+        design = generate_design(int(spec), seed)
+        case = {"engine": engine, "blocks": int(spec)}
+    else:
+        design = load_design(spec)[0]
+        case = {"engine": engine, "design": design["project"]["name"], "format": design["import"]["kind"],
+                "blocks": len(design["blocks"]),
+                "recognized": design["import"]["recognized"],
+                "total_block_area": design["import"]["total_block_area"]}
+    case.update((bench_sp if engine == "sp" else bench_bt)(design, iterations, seed))
+    # ru_maxrss is in KiB on Linux
+    case["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return case
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(sizes, engines, iterations, seed, timeout, designs=()):
+    cases = []
+    specs = [str(n) for n in sizes]
+    for path in designs:
+        # Convert once here so the cases only read the cached artifact
+        load_design(path)
+        specs.append(os.path.abspath(path))
+    for spec in specs:
+        label = {"blocks": int(spec)} if spec.isdigit() else {"design": os.path.basename(spec)}
+        for engine in engines:
+            command = [sys.executable, os.path.abspath(__file__), "--case", engine, spec,
+                       "--iterations", str(iterations), "--seed", str(seed)]
+            print(f"bench_scaling: {engine} " + (f"{spec} blocks" if spec.isdigit() else label["design"]),
+                  file=sys.stderr)
+            try:
+                proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+                if proc.returncode != 0:
+                    raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip()
+                                       else f"exit code {proc.returncode}")
+                cases.append(json.loads(proc.stdout))
+            except subprocess.TimeoutExpired:
+                cases.append({"engine": engine, **label, "error": f"Timed out after {timeout} s"})
+            except Exception as e:
+                cases.append({"engine": engine, **label, "error": str(e)})
+
+    return {
+        "benchmark": "bench_scaling",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"iterations": iterations, "seed": seed},
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SP and B*-tree scaling benchmark")
+    parser.add_argument("sizes", nargs="*", type=int)
+    parser.add_argument("--design", action="append", default=[],
+                        help="GSRC .blocks or MCNC .yal benchmark (repeatable)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--iterations", type=int, default=2000, help="annealing moves per case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="seconds per case")
+    parser.add_argument("--case", nargs=2, metavar=("ENGINE", "DESIGN"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], args.case[1], args.iterations, args.seed)))
+        return
+
+    sizes = args.sizes if args.sizes or args.design else DEFAULT_SIZES
+    report = run(sizes, args.engines, args.iterations, args.seed, args.timeout, args.design)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
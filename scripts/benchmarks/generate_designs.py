@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Synthetic design generator
+Writes designs in the schema of example_*/01_moreDevices.json (project,
+devices, blocks with variants, pins and symmetry) at any size, for
+benchmarking the SP and B*-tree engines beyond the 14-block fixture.
+
+Every block is a merged group of 1-2 transistors with m fingers; its variants
+are the column x row arrangements of those fingers on a unit cell, the
+squarest one being the default. Of the generated groups about 10 % are a
+self-symmetric block and 20 % a symmetric pair of blocks with identical variants.
+
+Usage: python3 generate_designs.py [sizes ...] [--seed S] [--output-dir DIR]
+"""
+
+import argparse
+import json
+import os
+import random
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(BENCH_DIR, "..", "example_SP", "01_moreDevices.json")
+DEFAULT_SIZES = [50, 200, 1000, 10000]
+DEFAULT_OUTPUT_DIR = os.path.join(BENCH_DIR, "designs")
+
+FINGERS = [2, 4, 6, 8, 12, 16]  # Devices per block, split into column x row variants
+MAX_VARIANTS = 5
+SELF_SYMMETRIC_SHARE = 0.1
+PAIR_SYMMETRIC_SHARE = 0.2
+
+
+def _variants(rng, fingers, unit_width, unit_height):
+    """Column x row arrangements of a block's fingers, the squarest one is the default"""
+    shapes = [(c, fingers // c) for c in range(1, fingers + 1) if fingers % c == 0]
+    if len(shapes) > MAX_VARIANTS:
+        shapes = sorted(rng.sample(shapes, MAX_VARIANTS))
+    default = min(shapes, key=lambda s: abs(s[0] * unit_width - s[1] * unit_height))
+    return [{
+        "width": round(columns * unit_width, 2),
+        "height": round(rows * unit_height, 2),
+        "column_multiple": columns,
+        "row_multiple": rows,
+        "is_default": (columns, rows) == default
+    } for columns, rows in shapes]
+
+
+def generate_design(n, seed=1):
+    """Design dict with n blocks"""
+    rng = random.Random(seed)
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        devices = json.load(f)["devices"]
+
+    nets = max(4, n // 2)
+    names = ["BLOCK_%05d" % b for b in range(n)]
+    blocks = []
+    b = 0
+    while b < n:
+        device_type = rng.choice(("NMOS", "PMOS"))
+        supply = "gnd!" if device_type == "NMOS" else "vdd!"
+        unit_width = round(rng.uniform(0.5, 2.0), 3)
+        unit_height = round(rng.uniform(2.0, 8.0), 3)
+        variants = _variants(rng, rng.choice(FINGERS), unit_width, unit_height)
+
+        roll = rng.random()
+        group = [names[b]]
+        symmetry = None
+        if roll < PAIR_SYMMETRIC_SHARE and b + 1 < n:
+            group.append(names[b + 1])
+        elif roll < PAIR_SYMMETRIC_SHARE + SELF_SYMMETRIC_SHARE:
+            symmetry = {"type": "self_symmetric",
+                        "description": f"{names[b]} must be placed on symmetry axis"}
+
+        for k, name in enumerate(group):
+            devices_in_block = rng.randint(1, 2)
+            block = {
+                "name": name,
+                "merge_device_names": ["M%05d_%d" % (b + k, d) for d in range(devices_in_block)],
+                "variants": [dict(variant) for variant in variants],
+                "device_type": device_type,
+                "pins": {
+                    "drain": ["net_%d" % rng.randrange(nets) for _ in range(devices_in_block)],
+                    "gate": ["net_%d" % rng.randrange(nets) for _ in range(devices_in_block)],
+                    "source": ["net_%d" % rng.randrange(nets) for _ in range(devices_in_block)],
+                    "bulk": [supply] * devices_in_block
+                },
+                "params": {"label": name}
+            }
+            if len(group) == 2:
+                other = group[1 - k]
+                block["symmetry"] = {"type": "pair_symmetric", "pair_with": other,
+                                     "description": f"{group[0]} and {group[1]} must be placed symmetrically"}
+            elif symmetry:
+                block["symmetry"] = symmetry
+            blocks.append(block)
+        b += len(group)
+
+    return {
+        "project": {
+            "name": f"SYNTHETIC_{n}",
+            "description": f"Synthetic analog circuit with {n} blocks and multiple variants (seed {seed})",
+            "version": "1.0"
+        },
+        "devices": devices,
+        "blocks": blocks
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic placement designs")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for n in args.sizes:
+        path = os.path.join(args.output_dir, f"synthetic_{n}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(generate_design(n, args.seed), f, ensure_ascii=False, indent=2)
+        print(f"Output saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+GSRC / MCNC floorplanning benchmark importer
+Converts the standard academic benchmark formats into the design schema of
+example_*/01_moreDevices.json, so 02_createSP.py and 02_createBStarTree.py
+(and bench_scaling.py --design) can run on published instances:
+
+    GSRC bookshelf   <name>.blocks, optional <name>.nets and <name>.pl
+                     (n10 ... n300 and the MCNC ami33/ami49 conversions)
+    MCNC YAL         <name>.yal (the original ami33, ami49, ... distribution)
+
+Hard blocks get their bounding box as the default variant plus the rotated
+box when it differs; rectilinear outlines are reduced to their bounding box.
+Soft blocks get SOFT_VARIANTS shapes of their area spread over their aspect
+ratio range (height / width), the squarest one being the default.
+
+The converted design is cached as <output-dir>/<name>.blocks.json (or
+<name>.yal.json) together with the SHA-256 of its source files and reused
+until a source changes.
+
+Usage: python3 import_floorplan.py BENCHMARK [...] [--output-dir DIR] [--no-rotate]
+       BENCHMARK is a .blocks/.yal file or its path without extension
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+
+from generate_designs import DEFAULT_OUTPUT_DIR
+
+FORMAT_VERSION = 1
+SOFT_VARIANTS = 5
+
+# Published sizes of the common instances (blocks, nets)
+KNOWN_INSTANCES = {
+    "ami33": (33, 123),
+    "ami49": (49, 408),
+    "n100": (100, 885),
+    "n300": (300, 1893),
+}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def _lines(path):
+    """Non-empty lines of a bookshelf file without comments and the format header"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line and not line.startswith("UCSC") and not line.startswith("UCLA"):
+                yield line
+
+
+def _is_header(line):
+    """'NumNets : 123' style count lines"""
+    return ":" in line and line.split(":", 1)[0].strip().startswith("Num")
+
+
+def _bounding_box(values):
+    xs, ys = values[0::2], values[1::2]
+    if len(xs) < 2 or len(xs) != len(ys):
+        raise ValueError(f"Invalid outline {values}")
+    return max(xs) - min(xs), max(ys) - min(ys)
+
+
+def _hard_variants(width, height, rotate):
+    variants = [{"width": float(width), "height": float(height), "is_default": True}]
+    if rotate and width != height:
+        variants.append({"width": float(height), "height": float(width), "is_default": False})
+    return variants
+
+
+def _soft_variants(area, min_ratio, max_ratio):
+    """SOFT_VARIANTS shapes of the given area, aspect ratios spaced geometrically"""
+    if min_ratio <= 0 or max_ratio < min_ratio:
+        raise ValueError(f"Invalid aspect ratio range {min_ratio} .. {max_ratio}")
+    count = 1 if min_ratio == max_ratio else SOFT_VARIANTS
+    ratios = [min_ratio * (max_ratio / min_ratio) ** (k / max(1, count - 1)) for k in range(count)]
+    default = min(ratios, key=lambda r: abs(math.log(r)))
+    return [{
+        "width": round(math.sqrt(area / r), 3),
+        "height": round(math.sqrt(area * r), 3),
+        "is_default": r == default
+    } for r in ratios]
+
+
+# ---------------------------------------------------------------- GSRC
+
+def _parse_blocks(path, rotate):
+    blocks = {}
+    terminals = []
+    for line in _lines(path):
+        if _is_header(line):
+            continue
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        name, kind = fields[0], fields[1].lower()
+        if kind == "terminal":
+            terminals.append(name)
+        elif kind in ("hardrectilinear", "hardrectangular"):
+            values = [float(v) for v in _NUMBER.findall(line.split(None, 3)[3])] if len(fields) > 3 else []
+            blocks[name] = _hard_variants(*_bounding_box(values), rotate)
+        elif kind in ("softrectangular", "softrectilinear"):
+            area, min_ratio, max_ratio = (float(v) for v in fields[2:5])
+            blocks[name] = _soft_variants(area, min_ratio, max_ratio)
+        else:
+            raise ValueError(f"{os.path.basename(path)}: unknown block type '{fields[1]}' of {name}")
+    return blocks, terminals
+
+
+def _parse_nets(path):
+    """[(net name, [pin owners])] of a bookshelf .nets file"""
+    nets = []
+    for line in _lines(path):
+        if line.startswith("NetDegree"):
+            fields = line.split(":", 1)[1].split()
+            nets.append((fields[1] if len(fields) > 1 else f"net_{len(nets)}", []))
+        elif not _is_header(line) and nets:
+            nets[-1][1].append(line.split()[0])
+    return nets
+
+
+def _parse_pl(path):
+    """{name: (x, y)} of a bookshelf .pl file"""
+    positions = {}
+    for line in _lines(path):
+        fields = line.split()
+        if len(fields) >= 3 and not _is_header(line):
+            positions[fields[0]] = (float(fields[1]), float(fields[2]))
+    return positions
+
+
+def read_gsrc(base, rotate=True):
+    """(blocks, terminals, nets, positions) of <base>.blocks/.nets/.pl"""
+    blocks, terminals = _parse_blocks(base + ".blocks", rotate)
+    nets = _parse_nets(base + ".nets") if os.path.exists(base + ".nets") else []
+    positions = _parse_pl(base + ".pl") if os.path.exists(base + ".pl") else {}
+    return blocks, terminals, nets, positions
+
+
+# ---------------------------------------------------------------- MCNC YAL
+
+def _yal_modules(path):
+    """Module dicts (name, type, dimensions, iolist, network) of a YAL file"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = re.sub(r"/\*.*?\*/", " ", f.read(), flags=re.S)
+
+    modules = []
+    module = None
+    section = None
+    for statement in text.split(";"):
+        fields = statement.split()
+        if not fields:
+            continue
+        keyword = fields[0].upper()
+        if keyword == "MODULE":
+            module = {"name": fields[1], "type": "GENERAL", "dimensions": [], "iolist": [], "network": []}
+            modules.append(module)
+        elif module is None:
+            continue
+        elif keyword == "ENDMODULE":
+            module = None
+        elif keyword in ("IOLIST", "NETWORK"):
+            section = keyword.lower()
+        elif keyword in ("ENDIOLIST", "ENDNETWORK"):
+            section = None
+        elif section == "iolist":
+            module["iolist"].append(fields[0])
+        elif section == "network":
+            module["network"].append(fields)
+        elif keyword == "TYPE":
+            module["type"] = fields[1].upper()
+        elif keyword == "DIMENSIONS":
+            module["dimensions"] = [float(v) for v in fields[1:]]
+    return modules
+
+
+def read_yal(path, rotate=True):
+    """(blocks, terminals, nets, positions) of a YAL file; blocks are the parent's instances"""
+    modules = _yal_modules(path)
+    cells = {m["name"]: m for m in modules if m["type"] not in ("PARENT", "PAD")}
+    parent = next((m for m in modules if m["type"] == "PARENT"), None)
+
+    blocks = {}
+    nets = {}
+    if parent is None or not parent["network"]:
+        # Library without a top level: every cell is a block
+        for name, cell in cells.items():
+            blocks[name] = _hard_variants(*_bounding_box(cell["dimensions"]), rotate)
+        return blocks, [], [], {}
+
+    for fields in parent["network"]:
+        instance, cell_name, signals = fields[0], fields[1], fields[2:]
+        if cell_name not in cells:
+            continue  # pad or unknown cell
+        blocks[instance] = _hard_variants(*_bounding_box(cells[cell_name]["dimensions"]), rotate)
+        for signal in signals:
+            nets.setdefault(signal, []).append(instance)
+
+    terminals = list(parent["iolist"])
+    for terminal in terminals:
+        if terminal in nets:
+            nets[terminal].append(terminal)
+    return blocks, terminals, list(nets.items()), {}
+
+
+# ---------------------------------------------------------------- design
+
+def _source_files(path):
+    """(kind, name, source files) of a benchmark given as file or base path"""
+    base, extension = os.path.splitext(path)
+    if extension.lower() == ".yal":
+        return "yal", os.path.basename(base), [path]
+    if extension.lower() in (".blocks", ".nets", ".pl"):
+        path = base
+    if not os.path.exists(path + ".blocks"):
+        raise FileNotFoundError(f"No .blocks or .yal file for {path}")
+    files = [path + ext for ext in (".blocks", ".nets", ".pl") if os.path.exists(path + ext)]
+    return "gsrc", os.path.basename(path), files
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def convert(path, rotate=True):
+    """Design dict of a benchmark file"""
+    kind, name, files = _source_files(path)
+    if kind == "yal":
+        blocks, terminals, nets, positions = read_yal(files[0], rotate)
+    else:
+        blocks, terminals, nets, positions = read_gsrc(os.path.splitext(files[0])[0], rotate)
+    if not blocks:
+        raise ValueError(f"No blocks in {path}")
+
+    block_nets = {block: [] for block in blocks}
+    for net, owners in nets:
+        for owner in dict.fromkeys(owners):
+            if owner in block_nets:
+                block_nets[owner].append(net)
+
+    design_blocks = []
+    for block, variants in blocks.items():
+        params = {"label": block}
+        if block in positions:
+            params["reference_position"] = list(positions[block])
+        design_blocks.append({
+            "name": block,
+            "variants": variants,
+            "device_type": "MACRO",
+            "pins": {"nets": block_nets[block]},
+            "params": params
+        })
+
+    known = KNOWN_INSTANCES.get(name)
+    recognized = known == (len(blocks), len(nets))
+    return {
+        "project": {
+            "name": name,
+            "description": f"{kind.upper()} benchmark {name} with {len(blocks)} blocks and {len(nets)} nets",
+            "version": "1.0"
+        },
+        "devices": [],
+        "blocks": design_blocks,
+        "nets": [{"name": net, "pins": owners} for net, owners in nets],
+        "terminals": [{"name": t, "position": list(positions[t])} if t in positions else {"name": t}
+                      for t in terminals],
+        "import": {
+            "format": FORMAT_VERSION,
+            "kind": kind,
+            "recognized": recognized,
+            "rotate": rotate,
+            "total_block_area": round(sum(v[0]["width"] * v[0]["height"] for v in blocks.values()), 3),
+            "sources": {os.path.basename(f): _digest(f) for f in files}
+        }
+    }
+
+
+def load_design(path, output_dir=None, rotate=True):
+    """
+    Converted design of a benchmark, from its cached artifact when the sources
+    are unchanged
+    Returns: (design dict, artifact path)
+    """
+    kind, name, files = _source_files(path)
+    artifact = os.path.join(output_dir or DEFAULT_OUTPUT_DIR, f"{name}.{'yal' if kind == 'yal' else 'blocks'}.json")
+    try:
+        with open(artifact, "r", encoding="utf-8") as f:
+            design = json.load(f)
+        stamp = design.get("import", {})
+        if (stamp.get("format") == FORMAT_VERSION and stamp.get("rotate") == rotate
+                and stamp.get("sources") == {os.path.basename(f): _digest(f) for f in files}):
+            return design, artifact
+    except (OSError, ValueError):
+        pass  # missing or unreadable artifact: convert again
+
+    design = convert(path, rotate)
+    os.makedirs(os.path.dirname(os.path.abspath(artifact)), exist_ok=True)
+    tmp_path = artifact + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(design, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, artifact)
+    return design, artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert GSRC/MCNC floorplanning benchmarks")
+    parser.add_argument("benchmarks", nargs="+", help=".blocks/.yal file or base path")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--no-rotate", action="store_true", help="no rotated variants for hard blocks")
+    args = parser.parse_args()
+
+    for path in args.benchmarks:
+        design, artifact = load_design(path, args.output_dir, not args.no_rotate)
+        note = "" if design["import"]["recognized"] else " (not a recognized instance)"
+        print(f"{design['project']['description']}{note}: {artifact}")
+
+
+if __name__ == "__main__":
+    main()
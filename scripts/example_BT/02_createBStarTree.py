@@ -7,6 +7,7 @@ Creates B*-tree structure with contour-based placement from JSON device data
 import json
 import sys
 import gc
+from bstar_contour import ContourStructure
 
 
 class BStarTreeNode:
@@ -37,53 +38,6 @@ class BStarTreeNode:
         return result
 
 
-class ContourStructure:
-    """Maintains contour for placement"""
-
-    def __init__(self):
-        self.contour = []  # List of (x_start, x_end, y_top) tuples
-
-    def find_y_position(self, x_start, x_end):
-        """Find the y position where block can be placed"""
-        max_y = 0.0
-        for c_start, c_end, c_top in self.contour:
-            if not (x_end <= c_start or x_start >= c_end):
-                max_y = max(max_y, c_top)
-        return max_y
-
-    def update_contour(self, x_start, x_end, y_top):
-        """Update contour after placing a block"""
-        new_contour = []
-        for c_start, c_end, c_top in self.contour:
-            if c_end <= x_start or c_start >= x_end:
-                new_contour.append((c_start, c_end, c_top))
-            elif c_start < x_start and c_end > x_end:
-                new_contour.append((c_start, x_start, c_top))
-                new_contour.append((x_end, c_end, c_top))
-            elif c_start < x_start:
-                new_contour.append((c_start, x_start, c_top))
-            elif c_end > x_end:
-                new_contour.append((x_end, c_end, c_top))
-
-        new_contour.append((x_start, x_end, y_top))
-        new_contour.sort()
-        self.contour = self._merge_segments(new_contour)
-
-    def _merge_segments(self, segments):
-        """Merge adjacent segments with same height"""
-        if not segments:
-            return []
-
-        merged = [segments[0]]
-        for start, end, height in segments[1:]:
-            last_start, last_end, last_height = merged[-1]
-            if start == last_end and height == last_height:
-                merged[-1] = (last_start, end, height)
-            else:
-                merged.append((start, end, height))
-        return merged
-
-
 class BStarTreeGenerator:
     """Generates B*-tree structure with placement"""
 
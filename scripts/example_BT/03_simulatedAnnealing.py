@@ -5,15 +5,33 @@ Paper: "Module Placement with Boundary Constraints Using B*-trees"
 """
 
 import json
+import multiprocessing
+import os
 import random
 import math
+import sys
+import time
+from array import array
+from contextlib import nullcontext
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from bstar_contour import ContourStructure
 from n8n_json_handler import create_n8n_processor
+from result_cache import ResultCache, cache_enabled, cache_key, module_constants, run_settings, source_digest
+from sa_trace import trace_from_settings
+from anytime import CHECK_INTERVAL, Deadline, chain_stop, init_chain_process
+import sa_schedule
+from sa_schedule import CALIBRATION_MOVES, AdaptiveSchedule, calibrate_temperature, schedule_length
+import transposition
+from transposition import TABLE_SIZE, TranspositionTable, merge_stats, zobrist
 
 # SA SETTINGS
 INITIAL_TEMP = 1000.0
 FINAL_TEMP = 0.01
 COOLING_RATE = 0.999
 MAX_ITERATIONS = 50000
+TIME_BUDGET = 0.0  # Seconds (sa_settings.time_budget); > 0 replaces the two settings above
+AUTO_SCHEDULE = False  # Calibrated T0, adaptive cooling and stagnation stop (sa_settings.auto_schedule)
 
 # COST FUNCTION WEIGHTS
 AREA_WEIGHT = 10.0
@@ -23,14 +41,45 @@ TARGET_ASPECT_RATIO = 1.0
 MAX_ASPECT_RATIO = 1.5
 ASPECT_PENALTY = 100000.0
 
+# MULTI-START / PARALLEL TEMPERING (sa_settings.chains > 1 in the input JSON)
+CHAINS = 1  # Chains run on a process pool, best result is returned
+EXCHANGE_INTERVAL = 1000  # Iterations between replica exchange attempts
+LADDER_RATIO = 2.0  # Temperature ratio between neighbouring replicas
+
+# INCREMENTAL PACKING
+CHECKPOINT_INTERVAL = 16  # DFS positions between saved contour checkpoints
+
+# TRANSPOSITION TABLE (sa_settings.transposition_cache)
+TRANSPOSITION_CACHE = TABLE_SIZE  # Trees remembered per chain, 0 disables
+
+# Perturbation operations op1..op3 in trace records (sa_settings.trace)
+MOVE_NAMES = ("change_variant", "swap_nodes", "move_node")
+
 
 class SimpleOptimizer:
-    """Optimizer implementing exact B*-tree packing from paper"""
+    """
+    Optimizer implementing exact B*-tree packing from paper
+
+    The tree is compiled once into parallel integer arrays indexed by node:
+    parent, left (x_child, placed to the right), right (y_child, placed
+    above), block and variant, with -1 for "no node". Perturbations are
+    array edits; the nested x_child / y_child dict is only rebuilt for
+    output by _to_dict().
+
+    self.key is the Zobrist hash of the tree (children, block and variant
+    of every node; the root never moves), updated by every _write() and
+    _undo() for transposition table lookups.
+    """
 
     def __init__(self, json_data):
         self.data = json_data
         self.variants = self._get_variants()
         self.actual_iterations = 0
+        self.current_tree = None
+        self.current_fitness = 999999
+        self.temperature = INITIAL_TEMP
+        self.reference_temp = INITIAL_TEMP  # Temperature of the hottest operation mix
+        self._load_tree(json_data.get("bstar_tree", {}).get("root", {}))
 
     def _get_variants(self):
         """Extract block variants safely"""
@@ -48,316 +97,455 @@ class SimpleOptimizer:
             pass
         return variants
 
-    def _get_all_nodes_from_dict(self, node_dict, nodes_list=None):
-        """Get all nodes from tree via DFS"""
-        if nodes_list is None:
-            nodes_list = []
-
-        if not node_dict or not isinstance(node_dict, dict):
-            return nodes_list
-
-        if "name" in node_dict:
-            nodes_list.append(node_dict)
-
-        x_child = node_dict.get("x_child", {})
-        y_child = node_dict.get("y_child", {})
-
-        if x_child:
-            self._get_all_nodes_from_dict(x_child, nodes_list)
-        if y_child:
-            self._get_all_nodes_from_dict(y_child, nodes_list)
-
-        return nodes_list
+    def _load_tree(self, root):
+        """Compile the nested tree dict into the node arrays"""
+        nodes = []  # (node_dict, parent, is_x_child) in DFS preorder
+        if root and isinstance(root, dict) and "name" in root:
+            stack = [(root, -1, False)]
+            while stack:
+                node, parent, is_left = stack.pop()
+                index = len(nodes)
+                nodes.append((node, parent, is_left))
+                for key, is_x in (("y_child", False), ("x_child", True)):
+                    child = node.get(key)
+                    if child and isinstance(child, dict) and "name" in child:
+                        stack.append((child, index, is_x))
+
+        def node_size(node):
+            return (float(node.get("x_max", 0)) - float(node.get("x_min", 0)),
+                    float(node.get("y_max", 0)) - float(node.get("y_min", 0)))
+
+        # Blocks without variants keep the size they have in the tree
+        sizes = {name: [(v["width"], v["height"]) for v in vs] for name, vs in self.variants.items()}
+        for node, _, _ in nodes:
+            if not sizes.get(node["name"]):
+                sizes[node["name"]] = [node_size(node)]
+
+        # Block b owns variants var_off[b]:var_off[b + 1]
+        self.names = list(sizes)
+        ids = {name: b for b, name in enumerate(self.names)}
+        self.var_off = array("i", [0])
+        self.var_w = array("d")
+        self.var_h = array("d")
+        for name in self.names:
+            for width, height in sizes[name]:
+                self.var_w.append(width)
+                self.var_h.append(height)
+            self.var_off.append(len(self.var_w))
+
+        n = self.n = len(nodes)
+        self.parent = array("i", [-1]) * n
+        self.left = array("i", [-1]) * n
+        self.right = array("i", [-1]) * n
+        self.block = array("i", [0]) * n
+        self.variant = array("i", [0]) * n
+        self.root = 0 if n else -1
+        for i, (node, parent, is_left) in enumerate(nodes):
+            b = self.block[i] = ids[node["name"]]
+            width, height = node_size(node)
+            self.variant[i] = min(
+                range(self.var_off[b + 1] - self.var_off[b]),
+                key=lambda k: (abs(self.var_w[self.var_off[b] + k] - width) +
+                               abs(self.var_h[self.var_off[b] + k] - height)))
+            self.parent[i] = parent
+            if parent >= 0:
+                if is_left:
+                    self.left[parent] = i
+                else:
+                    self.right[parent] = i
+
+        # Placement, node sizes and DFS order of the last packing
+        self.x = array("d", [0.0]) * n
+        self.y = array("d", [0.0]) * n
+        self.w = array("d", [0.0]) * n
+        self.h = array("d", [0.0]) * n
+        self.order = array("i", [0]) * n
+        self.pos = array("i", [0]) * n
+
+        # Bounding box and used area of the last packing; the area is kept
+        # as an exact sum so it does not drift over many moves
+        self.max_x = 0.0
+        self.max_y = 0.0
+        self.used_area = 0.0
+        self._area_sum = Fraction(0)
+
+        # Contour, DFS stack and prefix bounding box every CHECKPOINT_INTERVAL DFS positions
+        self.contour = ContourStructure()
+        self.checkpoints = [None] * (n // CHECKPOINT_INTERVAL + 1)
+
+        # First DFS position whose placement is stale (n = up to date)
+        self.dirty = 0
+
+        # Undo log of the current move: (array, index, old value), the
+        # nodes it wrote to and the placement from before the move
+        self.journal = []
+        self.touched = set()
+        self._saved = [array("d", self.x), array("d", self.y), array("d", self.w), array("d", self.h),
+                       array("i", self.order), array("i", self.pos), list(self.checkpoints)]
+        self._saved_totals = (0.0, 0.0, 0.0, self._area_sum)
+
+        # Zobrist domains of the arrays that define the tree; parent follows from left / right
+        self._key_domains = {id(self.left): 0, id(self.right): 1, id(self.block): 2, id(self.variant): 3}
+        self.key = self._saved_key = self._tree_key()
+
+    def _tree_key(self):
+        key = 0
+        for i in range(self.n):
+            key ^= (zobrist(0, i, self.left[i]) ^ zobrist(1, i, self.right[i]) ^
+                    zobrist(2, i, self.block[i]) ^ zobrist(3, i, self.variant[i]))
+        return key
+
+    def fingerprint(self):
+        """Loaded blocks, variants and tree as plain lists, e.g. for cache keys"""
+        return {
+            "names": self.names,
+            "var_off": self.var_off.tolist(),
+            "var_w": self.var_w.tolist(),
+            "var_h": self.var_h.tolist(),
+            "parent": self.parent.tolist(),
+            "left": self.left.tolist(),
+            "right": self.right.tolist(),
+            "block": self.block.tolist(),
+            "variant": self.variant.tolist(),
+        }
 
-    def _safe_copy_tree(self, tree_dict):
-        """Safe tree copying"""
-        if not tree_dict or not isinstance(tree_dict, dict):
+    def _size(self, i):
+        k = self.var_off[self.block[i]] + self.variant[i]
+        return self.var_w[k], self.var_h[k]
+
+    def _snapshot(self):
+        return (array("i", self.parent), array("i", self.left), array("i", self.right),
+                array("i", self.block), array("i", self.variant), self.root)
+
+    def _restore(self, snap):
+        parent, left, right, block, variant, self.root = snap
+        self.parent[:] = parent
+        self.left[:] = left
+        self.right[:] = right
+        self.block[:] = block
+        self.variant[:] = variant
+        self.touched.clear()
+        self.dirty = 0
+        self.key = self._tree_key()
+
+    def _begin_move(self):
+        """Clear the undo log and save the placement for a rollback"""
+        self.journal.clear()
+        self.touched.clear()
+        saved_x, saved_y, saved_w, saved_h, saved_order, saved_pos, saved_checkpoints = self._saved
+        saved_x[:] = self.x
+        saved_y[:] = self.y
+        saved_w[:] = self.w
+        saved_h[:] = self.h
+        saved_order[:] = self.order
+        saved_pos[:] = self.pos
+        saved_checkpoints[:] = self.checkpoints
+        self._saved_totals = (self.max_x, self.max_y, self.used_area, self._area_sum)
+        self._saved_key = self.key
+
+    def _write(self, values, i, value):
+        """Array write that is recorded in the undo log"""
+        self.journal.append((values, i, values[i]))
+        domain = self._key_domains.get(id(values))
+        if domain is not None:
+            self.key ^= zobrist(domain, i, values[i]) ^ zobrist(domain, i, value)
+        values[i] = value
+        self.touched.add(i)
+
+        # New children only change the DFS order after node i
+        first = self.pos[i]
+        if values is self.left or values is self.right:
+            first += 1
+        if first < self.dirty:
+            self.dirty = first
+
+    def _undo(self):
+        """Roll back every write of the current move and its placement"""
+        journal = self.journal
+        while journal:
+            values, i, old = journal.pop()
+            values[i] = old
+        self.key = self._saved_key
+
+        saved = self._saved
+        self._saved = [self.x, self.y, self.w, self.h, self.order, self.pos, self.checkpoints]
+        self.x, self.y, self.w, self.h, self.order, self.pos, self.checkpoints = saved
+        self.max_x, self.max_y, self.used_area, self._area_sum = self._saved_totals
+        self.dirty = self.n
+
+    def _to_dict(self):
+        """Nested x_child / y_child tree with the packed coordinates"""
+        if self.root < 0:
             return {}
-
-        try:
-            return {
-                "name": tree_dict.get("name", ""),
-                "x_min": float(tree_dict.get("x_min", 0)),
-                "y_min": float(tree_dict.get("y_min", 0)),
-                "x_max": float(tree_dict.get("x_max", 0)),
-                "y_max": float(tree_dict.get("y_max", 0)),
-                "x_child": self._safe_copy_tree(tree_dict.get("x_child", {})),
-                "y_child": self._safe_copy_tree(tree_dict.get("y_child", {}))
-            }
-        except:
-            return tree_dict
-
-    def _op1_change_variant(self, tree_dict):
+        nodes = []
+        for i in range(self.n):
+            width, height = self._size(i)
+            nodes.append({
+                "name": self.names[self.block[i]],
+                "x_min": self.x[i],
+                "y_min": self.y[i],
+                "x_max": self.x[i] + width,
+                "y_max": self.y[i] + height,
+                "x_child": {},
+                "y_child": {}
+            })
+        for i, node in enumerate(nodes):
+            if self.left[i] >= 0:
+                node["x_child"] = nodes[self.left[i]]
+            if self.right[i] >= 0:
+                node["y_child"] = nodes[self.right[i]]
+        return nodes[self.root]
+
+    def _op1_change_variant(self):
         """Op1: Rotate/change variant (Paper Section 5.1)"""
-        try:
-            nodes = self._get_all_nodes_from_dict(tree_dict)
-            if not nodes:
-                return tree_dict
-
-            node = random.choice(nodes)
-            name = node.get("name", "")
-
-            if name in self.variants and len(self.variants[name]) > 1:
-                variant = random.choice(self.variants[name])
-                width = variant["width"]
-                height = variant["height"]
-
-                # Only change dimensions, not tree structure
-                node["x_max"] = node["x_min"] + width
-                node["y_max"] = node["y_min"] + height
-
-        except:
-            pass
+        if self.n == 0:
+            return
 
-        return tree_dict
+        i = random.randrange(self.n)
+        b = self.block[i]
+        count = self.var_off[b + 1] - self.var_off[b]
+        if count > 1:
+            # Only change dimensions, not tree structure
+            self._write(self.variant, i, random.randrange(count))
 
-    def _op2_swap_nodes(self, tree_dict):
+    def _op2_swap_nodes(self):
         """
         Op2: Swap node MODULE DATA ONLY (Paper Section 5.1)
-        CRITICAL FIX: Only swap name and dimensions, NOT children!
+        Block and variant move between the two nodes, children stay put.
         """
-        try:
-            nodes = self._get_all_nodes_from_dict(tree_dict)
-            if len(nodes) < 2:
-                return tree_dict
-
-            node1, node2 = random.sample(nodes, 2)
-
-            # Calculate current dimensions for both nodes
-            width1 = node1.get("x_max", 0) - node1.get("x_min", 0)
-            height1 = node1.get("y_max", 0) - node1.get("y_min", 0)
-            width2 = node2.get("x_max", 0) - node2.get("x_min", 0)
-            height2 = node2.get("y_max", 0) - node2.get("y_min", 0)
-
-            # Swap ONLY module names and dimensions (keep children intact)
-            temp_name = node1.get("name", "")
-            node1["name"] = node2.get("name", "")
-            node2["name"] = temp_name
-
-            # Update dimensions based on swapped modules
-            node1["x_max"] = node1["x_min"] + width2
-            node1["y_max"] = node1["y_min"] + height2
-            node2["x_max"] = node2["x_min"] + width1
-            node2["y_max"] = node2["y_min"] + height1
-
-            # DO NOT touch x_child or y_child - tree structure stays intact!
-
-        except:
-            pass
-
-        return tree_dict
-
-    def _find_node_and_parent(self, tree_dict, target_node, parent=None, child_type=None):
-        """Find node and its parent in tree"""
-        if not tree_dict or not isinstance(tree_dict, dict):
-            return None
-
-        if tree_dict is target_node:
-            return (parent, child_type)
-
-        result = self._find_node_and_parent(tree_dict.get("x_child"), target_node, tree_dict, "x_child")
-        if result:
-            return result
+        if self.n < 2:
+            return
 
-        result = self._find_node_and_parent(tree_dict.get("y_child"), target_node, tree_dict, "y_child")
-        if result:
-            return result
+        i, j = random.sample(range(self.n), 2)
+        block_i, variant_i = self.block[i], self.variant[i]
+        self._write(self.block, i, self.block[j])
+        self._write(self.variant, i, self.variant[j])
+        self._write(self.block, j, block_i)
+        self._write(self.variant, j, variant_i)
 
-        return None
+    def _set_child(self, parent, is_left, child):
+        self._write(self.left if is_left else self.right, parent, child)
+        if child >= 0:
+            self._write(self.parent, child, parent)
 
-    def _op3_move_node(self, tree_dict):
+    def _op3_move_node(self):
         """
         Op3: Move node (Paper Section 5.1, Figure 9)
         Delete node -> promote children -> insert node elsewhere
         """
-        try:
-            nodes = self._get_all_nodes_from_dict(tree_dict)
-            if len(nodes) < 3:
-                return tree_dict
-
-            # Cannot move root
-            moveable = [n for n in nodes if n is not tree_dict]
-            if not moveable:
-                return tree_dict
-
-            node_to_move = random.choice(moveable)
-
-            # STEP 1: DELETE - Find parent and extract node
-            parent_info = self._find_node_and_parent(tree_dict, node_to_move)
-            if not parent_info or not parent_info[0]:
-                return tree_dict
-
-            parent, child_type = parent_info
-            x_child = node_to_move.get("x_child", {})
-            y_child = node_to_move.get("y_child", {})
-
-            # Promote children according to paper's algorithm
-            if x_child and y_child:
-                # Node has two children: randomly pick one to promote
-                promoted = random.choice([x_child, y_child])
-                other = y_child if promoted is x_child else x_child
-                parent[child_type] = promoted
-
-                # Attach other child to leaf of promoted subtree
-                current = promoted
-                while current:
-                    if not current.get("x_child"):
-                        current["x_child"] = other
-                        break
-                    elif not current.get("y_child"):
-                        current["y_child"] = other
-                        break
-                    current = current.get("x_child")
-            elif x_child:
-                # Only x_child exists
-                parent[child_type] = x_child
-            elif y_child:
-                # Only y_child exists
-                parent[child_type] = y_child
-            else:
-                # Leaf node
-                parent[child_type] = {}
-
-            # STEP 2: INSERT - Clear node's children and insert fresh
-            node_to_move["x_child"] = {}
-            node_to_move["y_child"] = {}
-
-            # Get updated node list after deletion
-            all_nodes = self._get_all_nodes_from_dict(tree_dict)
-            if not all_nodes:
-                return tree_dict
-
-            # Choose random parent for insertion
-            new_parent = random.choice(all_nodes)
-
-            # Insert as random child (x_child or y_child)
-            if random.random() < 0.5:
-                # Insert as x_child
-                original_x_child = new_parent.get("x_child", {})
-                new_parent["x_child"] = node_to_move
-                if original_x_child:
-                    node_to_move["x_child"] = original_x_child
-            else:
-                # Insert as y_child
-                original_y_child = new_parent.get("y_child", {})
-                new_parent["y_child"] = node_to_move
-                if original_y_child:
-                    node_to_move["y_child"] = original_y_child
-
-        except:
-            pass
-
-        return tree_dict
-
-    def _contour_placement(self, tree_dict):
-        """Recompute placement using contour (Paper Section 3)"""
-        try:
-            contour = []
-            self._dfs_place(tree_dict, None, None, contour)
-        except:
-            pass
-        return tree_dict
-
-    def _dfs_place(self, node, parent, is_left_child, contour):
-        """DFS traversal for placement"""
-        if not node or not isinstance(node, dict) or "name" not in node:
+        n = self.n
+        if n < 3:
             return
 
-        try:
-            width = node.get("x_max", 0) - node.get("x_min", 0)
-            height = node.get("y_max", 0) - node.get("y_min", 0)
+        # Cannot move root
+        node = random.randrange(n - 1)
+        if node >= self.root:
+            node += 1
+
+        # STEP 1: DELETE - unlink node from its parent
+        parent = self.parent[node]
+        is_left = self.left[parent] == node
+        x_child = self.left[node]
+        y_child = self.right[node]
+
+        # Promote children according to paper's algorithm
+        if x_child >= 0 and y_child >= 0:
+            # Node has two children: randomly pick one to promote
+            promoted = random.choice([x_child, y_child])
+            other = y_child if promoted == x_child else x_child
+            self._set_child(parent, is_left, promoted)
+
+            # Attach other child to leaf of promoted subtree
+            current = promoted
+            while True:
+                if self.left[current] < 0:
+                    self._set_child(current, True, other)
+                    break
+                if self.right[current] < 0:
+                    self._set_child(current, False, other)
+                    break
+                current = self.left[current]
+        elif x_child >= 0:
+            self._set_child(parent, is_left, x_child)
+        elif y_child >= 0:
+            self._set_child(parent, is_left, y_child)
+        else:
+            self._set_child(parent, is_left, -1)
+
+        # STEP 2: INSERT - as a random child of any other node
+        self._write(self.left, node, -1)
+        self._write(self.right, node, -1)
+        new_parent = random.randrange(n - 1)
+        if new_parent >= node:
+            new_parent += 1
+
+        as_left = random.random() < 0.5
+        original = self.left[new_parent] if as_left else self.right[new_parent]
+        self._set_child(new_parent, as_left, node)
+        if original >= 0:
+            self._set_child(node, as_left, original)
+
+    def _contour_placement(self, area_limit=math.inf):
+        """
+        Recompute placement using contour (Paper Section 3)
+        Nodes are placed in DFS order, x_child before y_child. Placement
+        resumes at DFS position self.dirty from the nearest checkpoint in
+        front of it, and after a move it stops at the first checkpoint where
+        the moved nodes are placed and contour, DFS stack, pending x
+        coordinates and bounding box match the previous packing again.
+        The same pass leaves max_x, max_y and used_area of the packing.
+        Placed nodes never move again, so the pass is abandoned (returns
+        False, the move must be undone) once their bounding box exceeds
+        area_limit. Returns True for a complete packing.
+        """
+        n = self.n
+        start = self.dirty
+        if self.root < 0 or start >= n:
+            return True
+
+        x = self.x
+        y = self.y
+        w = self.w
+        h = self.h
+        left = self.left
+        right = self.right
+        parent = self.parent
+        block = self.block
+        variant = self.variant
+        var_off = self.var_off
+        var_w = self.var_w
+        var_h = self.var_h
+        order = self.order
+        pos = self.pos
+        checkpoints = self.checkpoints
+        contour = self.contour
+        interval = CHECKPOINT_INTERVAL
+
+        if start == 0:
+            contour.reset()
+            stack = [self.root]
+            q = 0
+            max_x = 0.0
+            max_y = 0.0
+        else:
+            # Replay the unchanged nodes between checkpoint and start
+            q = (start - 1) // interval * interval
+            contour_state, stack, max_x, max_y = checkpoints[q // interval]
+            contour.restore(contour_state)
+            stack = list(stack)
+            while q < start:
+                i = stack.pop()
+                x_end = x[i] + w[i]
+                y_end = y[i] + h[i]
+                contour.update_contour(x[i], x_end, y_end)
+                if x_end > max_x:
+                    max_x = x_end
+                if y_end > max_y:
+                    max_y = y_end
+                if right[i] >= 0:
+                    stack.append(right[i])
+                if left[i] >= 0:
+                    stack.append(left[i])
+                q += 1
+
+        # Moved nodes still to place; early stop only makes sense after a move
+        touched = self.touched
+        early_stop = bool(touched)
+        remaining = sum(1 for i in touched if pos[i] >= start)
+        area_sum = self._area_sum
+        finished = True
+
+        while stack:
+            if q % interval == 0:
+                previous = checkpoints[q // interval]
+                if (early_stop and remaining == 0 and q > start and previous is not None
+                        and previous[1] == stack and previous[2] == max_x and previous[3] == max_y
+                        and contour.matches(previous[0])
+                        and all(x[s] == (x[parent[s]] + w[parent[s]] if left[parent[s]] == s else x[parent[s]])
+                                for s in stack)):
+                    # Every node from here on, and so the bounding box, stays as before
+                    finished = False
+                    break
+                checkpoints[q // interval] = (contour.snapshot(), stack[:], max_x, max_y)
+
+            i = stack.pop()
+            k = var_off[block[i]] + variant[i]
+            width = var_w[k]
+            height = var_h[k]
+            area = width * height
+            if area != w[i] * h[i]:
+                area_sum += Fraction(area) - Fraction(w[i] * h[i])
+            w[i] = width
+            h[i] = height
 
             # Determine X coordinate
-            if parent is None:
+            p = parent[i]
+            if p < 0:
                 # Root at origin
                 x_coord = 0.0
-            elif is_left_child:
+            elif left[p] == i:
                 # Left child: right of parent
-                parent_width = parent.get("x_max", 0) - parent.get("x_min", 0)
-                x_coord = parent.get("x_min", 0) + parent_width
+                x_coord = x[p] + w[p]
             else:
                 # Right child: same X as parent
-                x_coord = parent.get("x_min", 0)
+                x_coord = x[p]
 
             # Find Y from contour
-            y_coord = self._find_y_from_contour(contour, x_coord, x_coord + width)
-
-            # Update node position
-            node["x_min"] = x_coord
-            node["y_min"] = y_coord
-            node["x_max"] = x_coord + width
-            node["y_max"] = y_coord + height
-
-            # Update contour
-            self._update_contour(contour, x_coord, x_coord + width, y_coord + height)
-
-            # Recurse on children
-            if node.get("x_child"):
-                self._dfs_place(node["x_child"], node, True, contour)
-
-            if node.get("y_child"):
-                self._dfs_place(node["y_child"], node, False, contour)
-
-        except:
-            pass
-
-    def _find_y_from_contour(self, contour, x_start, x_end):
-        """Find Y coordinate from contour"""
-        max_y = 0.0
-        try:
-            for c_start, c_end, c_top in contour:
-                if c_start < x_end and c_end > x_start:
-                    max_y = max(max_y, c_top)
-        except:
-            pass
-        return max_y
-
-    def _update_contour(self, contour, x_start, x_end, y_top):
-        """Update contour structure"""
-        try:
-            new_contour = []
-
-            for c_start, c_end, c_top in contour:
-                if c_end <= x_start or c_start >= x_end:
-                    # No overlap
-                    new_contour.append((c_start, c_end, c_top))
-                elif c_start < x_start < c_end:
-                    # Partial overlap on left
-                    new_contour.append((c_start, x_start, c_top))
-                    if c_end > x_end:
-                        new_contour.append((x_end, c_end, c_top))
-                elif c_start < x_end < c_end:
-                    # Partial overlap on right
-                    new_contour.append((x_end, c_end, c_top))
-
-            # Add new segment
-            new_contour.append((x_start, x_end, y_top))
-            new_contour.sort()
-
-            contour.clear()
-            contour.extend(new_contour)
-
-        except:
-            pass
-
-    def _calculate_fitness(self, tree_dict):
-        """Calculate fitness score"""
+            x[i] = x_coord
+            y_coord = y[i] = contour.place(x_coord, x_coord + width, height)
+            if x_coord + width > max_x:
+                max_x = x_coord + width
+                if max_x * max_y > area_limit:
+                    return False
+            if y_coord + height > max_y:
+                max_y = y_coord + height
+                if max_x * max_y > area_limit:
+                    return False
+
+            order[q] = i
+            pos[i] = q
+            q += 1
+            if remaining and i in touched:
+                remaining -= 1
+
+            # x_child is visited before y_child
+            if right[i] >= 0:
+                stack.append(right[i])
+            if left[i] >= 0:
+                stack.append(left[i])
+
+        if finished:
+            self.max_x = max_x
+            self.max_y = max_y
+        if area_sum != self._area_sum:
+            self._area_sum = area_sum
+            self.used_area = float(area_sum)
+        self.dirty = n
+        return True
+
+    def _calculate_fitness(self, threshold=math.inf):
+        """
+        Pack the current tree and calculate its fitness score
+        With a threshold, packing stops with fitness inf once the area term
+        alone reaches it (the other terms are never negative); the move must
+        then be undone.
+        """
         try:
-            self._contour_placement(tree_dict)
-            nodes = self._get_all_nodes_from_dict(tree_dict)
+            # rounding margin: never cut off an acceptable packing
+            if not self._contour_placement(threshold / AREA_WEIGHT * (1.0 + 1e-9)):
+                return math.inf
 
-            if not nodes:
+            if self.n == 0:
                 return 999999
 
-            max_x = max(node.get("x_max", 0) for node in nodes)
-            max_y = max(node.get("y_max", 0) for node in nodes)
+            max_x = self.max_x
+            max_y = self.max_y
+            used_area = self.used_area
 
             if max_x <= 0 or max_y <= 0:
                 return 999999
 
             total_area = max_x * max_y
-            used_area = sum((node.get("x_max", 0) - node.get("x_min", 0)) *
-                            (node.get("y_max", 0) - node.get("y_min", 0)) for node in nodes)
 
             dead_space = total_area - used_area
             dead_space_ratio = dead_space / total_area if total_area > 0 else 0
@@ -377,67 +565,309 @@ class SimpleOptimizer:
         except:
             return 999999
 
-    def optimize(self):
-        """Simulated annealing optimization"""
+    def placement_metrics(self):
+        """Reported metrics of the last packing, from the packing pass totals"""
+        max_x = self.max_x
+        max_y = self.max_y
+        total_area = max_x * max_y
+        dead_space = total_area - self.used_area
+        dead_space_ratio = (dead_space / total_area * 100) if total_area > 0 else 0
+        aspect_ratio = max(max_x, max_y) / min(max_x, max_y) if min(max_x, max_y) > 0 else 1.0
+
+        return {
+            "total_area": total_area,
+            "used_area": self.used_area,
+            "dead_space": dead_space,
+            "dead_space_percentage": dead_space_ratio,
+            "aspect_ratio": aspect_ratio,
+            "placement_width": max_x,
+            "placement_height": max_y
+        }
+
+    def initial_temperature(self, moves=CALIBRATION_MOVES):
+        """
+        Calibrated initial temperature from the fitness deltas of random
+        operations on the current tree (left unchanged), INITIAL_TEMP when no
+        sampled operation was uphill
+        """
+        if self.root < 0:
+            return INITIAL_TEMP
+        current_fitness = self._calculate_fitness()
+        operations = (self._op1_change_variant, self._op2_swap_nodes, self._op3_move_node)
+        deltas = []
+        for _ in range(moves):
+            self._begin_move()
+            random.choice(operations)()
+            deltas.append(self._calculate_fitness() - current_fitness)
+            self._undo()
+        return calibrate_temperature(deltas) or INITIAL_TEMP
+
+    def optimize(self, initial_temp=INITIAL_TEMP, max_iterations=MAX_ITERATIONS, final_temp=FINAL_TEMP,
+                 trace=None, schedule=None, table=None):
+        """
+        Simulated annealing optimization
+        The chain's current tree, its fitness and the final temperature are
+        left in self.current_tree, self.current_fitness and self.temperature.
+        Every trace.sample-th iteration is recorded when a TraceWriter is given.
+        With a schedule (Deadline or AdaptiveSchedule) the cooling factor
+        comes from the schedule, and the run stops when the schedule says so
+        (pass max_iterations=sys.maxsize with a Deadline).
+        The Metropolis draw comes before packing: u turns into the highest
+        acceptable fitness current - T * ln(u), so packing can stop early
+        for candidates that cannot reach it. With a TranspositionTable, trees
+        whose stored fitness (or lower bound) is not below the threshold are
+        rejected without packing.
+        """
         try:
-            current_tree = self.data.get("bstar_tree", {}).get("root", {})
-            if not current_tree:
+            if self.root < 0:
                 return None, 999999, 0
 
-            current_fitness = self._calculate_fitness(current_tree)
-            best_tree = self._safe_copy_tree(current_tree)
+            current_fitness = self._calculate_fitness()
+            best = self._snapshot()
             best_fitness = current_fitness
 
-            temperature = INITIAL_TEMP
+            temperature = initial_temp
+            cooling = COOLING_RATE
+            accepted_moves = 0
+            last_improvement = 0
+
+            for iteration in range(max_iterations):
+                if schedule is not None and iteration % CHECK_INTERVAL == 0:
+                    cooling = schedule.cooling(temperature, iteration, accepted_moves, last_improvement)
+                    if cooling is None:
+                        break
 
-            for iteration in range(MAX_ITERATIONS):
                 self.actual_iterations = iteration + 1
 
-                if temperature < FINAL_TEMP:
+                if temperature < final_temp:
                     break
 
-                new_tree = self._safe_copy_tree(current_tree)
+                self._begin_move()
 
                 # Operation probabilities (vary with temperature)
-                temp_ratio = temperature / INITIAL_TEMP
+                temp_ratio = min(temperature / self.reference_temp, 1.0)
                 op1_prob = 0.33 + (1.0 - temp_ratio) * 0.47
                 op2_prob = 0.33 * temp_ratio + 0.15 * (1.0 - temp_ratio)
 
                 rand_val = random.random()
                 if rand_val < op1_prob:
-                    new_tree = self._op1_change_variant(new_tree)
+                    move = 0
+                    self._op1_change_variant()
                 elif rand_val < op1_prob + op2_prob:
-                    new_tree = self._op2_swap_nodes(new_tree)
+                    move = 1
+                    self._op2_swap_nodes()
                 else:
-                    new_tree = self._op3_move_node(new_tree)
-
-                new_fitness = self._calculate_fitness(new_tree)
+                    move = 2
+                    self._op3_move_node()
+
+                # Accept better solutions, worse ones with probability exp(-delta / T);
+                # 1 - random() is in (0, 1]: u == 1 only accepts improvements
+                threshold = (current_fitness - temperature * math.log(1.0 - random.random())
+                             if temperature > 0 else current_fitness)
+                if table is not None and table.rejects(table.get(self.key), threshold):
+                    new_fitness = math.inf
+                else:
+                    new_fitness = self._calculate_fitness(threshold)
+                    if table is not None:
+                        complete = new_fitness != math.inf
+                        table.put(self.key, new_fitness if complete else threshold, complete)
 
-                # Accept better solutions
-                if new_fitness < current_fitness:
-                    current_tree = new_tree
+                accepted = new_fitness < threshold
+                if accepted:
                     current_fitness = new_fitness
 
                     if new_fitness < best_fitness:
-                        best_tree = self._safe_copy_tree(new_tree)
+                        best = self._snapshot()
                         best_fitness = new_fitness
+                        last_improvement = iteration
                 else:
-                    # Accept worse solutions probabilistically
-                    delta = new_fitness - current_fitness
-                    if temperature > 0:
-                        prob = math.exp(-delta / temperature)
-                        if random.random() < prob:
-                            current_tree = new_tree
-                            current_fitness = new_fitness
+                    self._undo()
+                accepted_moves += accepted
+
+                if trace is not None and iteration % trace.sample == 0:
+                    trace.record(iteration, temperature, current_fitness, best_fitness, move, accepted)
 
-                temperature *= COOLING_RATE
+                temperature *= cooling
 
-            return best_tree, best_fitness, self.actual_iterations
+            self._contour_placement()
+            self.current_tree = self._to_dict()
+            self.current_fitness = current_fitness
+            self.temperature = temperature
+
+            self._restore(best)
+            self._contour_placement()
+            return self._to_dict(), best_fitness, self.actual_iterations
 
         except Exception as e:
             return None, 999999, self.actual_iterations
 
 
+def run_length():
+    """Iterations of an adaptive run: as many as the fixed INITIAL_TEMP -> FINAL_TEMP schedule"""
+    return schedule_length(INITIAL_TEMP, FINAL_TEMP, COOLING_RATE, MAX_ITERATIONS)
+
+
+def _run_chain(job):
+    """
+    Process-pool entry point: one annealing run from plain, picklable data.
+    job = (blocks, start_tree, seed, initial_temp, max_iterations, final_temp, time_budget,
+           adaptive, reference_temp, table_size)
+    """
+    (blocks, start_tree, seed, initial_temp, max_iterations, final_temp, time_budget,
+     adaptive, reference_temp, table_size) = job
+    random.seed(seed)
+
+    optimizer = SimpleOptimizer({"blocks": blocks, "bstar_tree": {"root": start_tree}})
+    optimizer.reference_temp = reference_temp
+    deadline = Deadline(time_budget, final_temp, chain_stop()) if time_budget else None
+    schedule = AdaptiveSchedule(initial_temp, final_temp, max_iterations, deadline) if adaptive else deadline
+    if deadline is not None:
+        max_iterations = sys.maxsize
+    table = TranspositionTable(table_size) if table_size > 0 else None
+    best_tree, best_fitness, iterations = optimizer.optimize(initial_temp, max_iterations, final_temp,
+                                                             schedule=schedule, table=table)
+    return {
+        "best": best_tree,
+        "best_fitness": best_fitness,
+        "current": optimizer.current_tree,
+        "current_fitness": optimizer.current_fitness,
+        "iterations": iterations,
+        "temperature": optimizer.temperature,
+        "warmup_rate": deadline.warmup_rate if deadline is not None else None,
+        "schedule": schedule.stats() if adaptive else None,
+        "transposition": table.stats() if table is not None else None
+    }
+
+
+def run_chains(json_data, settings, initial_temp=INITIAL_TEMP):
+    """
+    Run sa_settings.chains annealing chains on a ProcessPoolExecutor and keep
+    the best one, all inside this process invocation.
+
+    Independent chains are plain multi-start runs with their own seeds. With
+    sa_settings.replica_exchange the chains form a temperature ladder
+    (chain r runs at T * LADDER_RATIO**r) that cools together; every
+    EXCHANGE_INTERVAL iterations neighbouring chains swap trees with
+    probability min(1, exp((E_r - E_r+1) * (1/T_r - 1/T_r+1))).
+
+    With sa_settings.time_budget independent chains share the remaining
+    budget (chains run in waves of `workers`); replica exchange keeps its schedule and starts no
+    further rounds once the budget is spent. SIGTERM stops the chains, which
+    return their best so far (replica exchange after the current round).
+
+    With sa_settings.auto_schedule independent chains run the adaptive
+    schedule from initial_temp; the replica ladder starts at initial_temp
+    and keeps the geometric cooling, its final temperature scaled to match.
+
+    Returns (best_tree, best_fitness, stats).
+    """
+    chains = int(settings.get("chains", CHAINS))
+    workers = int(settings.get("workers") or min(chains, os.cpu_count() or 1))
+    blocks = json_data["blocks"]
+    start = json_data["bstar_tree"]["root"]
+    rng = random.Random(settings.get("seed"))
+    time_budget = float(settings.get("time_budget", TIME_BUDGET) or 0)
+    adaptive = bool(settings.get("auto_schedule", AUTO_SCHEDULE))
+    table_size = int(settings.get("transposition_cache", TRANSPOSITION_CACHE) or 0)
+    reference_temp = initial_temp
+    final_temp = FINAL_TEMP * initial_temp / INITIAL_TEMP if adaptive else FINAL_TEMP
+    deadline = Deadline(time_budget, final_temp, multiprocessing.Event()) if time_budget > 0 else None
+    stop = deadline.stop if deadline is not None else None
+
+    def job(tree, initial_temp, max_iterations, final_temp, time_budget=0.0, adaptive=False):
+        return (blocks, tree, rng.getrandbits(32), initial_temp, max_iterations, final_temp, time_budget,
+                adaptive, reference_temp, table_size)
+
+    with deadline.signals() if deadline is not None else nullcontext(), \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_chain_process, initargs=(stop,)) as pool:
+        if not settings.get("replica_exchange"):
+            # Chains beyond the worker count run in later waves: split the budget between waves
+            waves = -(-chains // workers)
+            remaining = max(deadline.end - time.perf_counter(), 0.001) / waves if deadline else 0.0
+            max_iterations = run_length() if adaptive else MAX_ITERATIONS
+            jobs = [job(start, initial_temp, max_iterations, final_temp, remaining, adaptive) for _ in range(chains)]
+            runs = [run for run in pool.map(_run_chain, jobs) if run["best"] is not None]
+            if not runs:
+                return None, 999999, {"actual_iterations": 0}
+            winner = min(runs, key=lambda run: run["best_fitness"])
+            stats = {
+                "actual_iterations": winner["iterations"],
+                "total_iterations": sum(run["iterations"] for run in runs),
+                "chain_fitness": [round(run["best_fitness"], 2) for run in runs]
+            }
+            if adaptive:
+                stats["schedule"] = winner["schedule"]
+            if winner["transposition"] is not None:
+                stats["transposition"] = winner["transposition"]
+            if deadline is not None:
+                rates = [run["warmup_rate"] for run in runs if run["warmup_rate"]]
+                deadline.warmup_rate = sum(rates) / len(rates) if rates else None
+                deadline.stop_requested()
+                stats["time_budget"] = deadline.stats()
+            return winner["best"], winner["best_fitness"], stats
+
+        interval = int(settings.get("exchange_interval", EXCHANGE_INTERVAL))
+        ratio = float(settings.get("ladder_ratio", LADDER_RATIO))
+        ladder = [ratio ** r for r in range(chains)]
+        slots = [start] * chains
+        energies = [0.0] * chains
+        best_tree, best_fitness = None, 999999
+
+        temperature = initial_temp
+        iterations = 0
+        attempts = 0
+        swaps = 0
+        rounds = 0
+        tables = []
+        while temperature >= final_temp and iterations < MAX_ITERATIONS:
+            if deadline is not None and deadline.expired():
+                break
+            segment = min(interval, MAX_ITERATIONS - iterations)
+            jobs = [job(slots[r], temperature * ladder[r], segment, final_temp * ladder[r])
+                    for r in range(chains)]
+            runs = list(pool.map(_run_chain, jobs))
+            if any(run["current"] is None for run in runs):
+                break
+
+            for r, run in enumerate(runs):
+                slots[r] = run["current"]
+                energies[r] = run["current_fitness"]
+                tables.append(run["transposition"])
+                if run["best_fitness"] < best_fitness:
+                    best_tree, best_fitness = run["best"], run["best_fitness"]
+            iterations += runs[0]["iterations"]
+            temperature = runs[0]["temperature"]
+            if deadline is not None:
+                deadline.measure(iterations)
+
+            # alternate even / odd neighbour pairs between rounds
+            for r in range(rounds % 2, chains - 1, 2):
+                attempts += 1
+                a = (energies[r] - energies[r + 1]) * (
+                        1.0 / (temperature * ladder[r]) - 1.0 / (temperature * ladder[r + 1]))
+                if a >= 0 or rng.random() < math.exp(a):
+                    slots[r], slots[r + 1] = slots[r + 1], slots[r]
+                    energies[r], energies[r + 1] = energies[r + 1], energies[r]
+                    swaps += 1
+            rounds += 1
+
+    stats = {
+        "actual_iterations": iterations * chains,
+        "iterations_per_chain": iterations,
+        "replica_exchange": True,
+        "exchange_attempts": attempts,
+        "exchange_accepts": swaps
+    }
+    if adaptive:
+        stats["schedule"] = {"initial_temp": round(initial_temp, 6)}
+    if merge_stats(tables) is not None:
+        stats["transposition"] = merge_stats(tables)
+    if deadline is not None:
+        deadline.stop_requested()
+        stats["time_budget"] = deadline.stats()
+    return best_tree, best_fitness, stats
+
+
 def optimize_bstar_tree_safe(json_data):
     """Safe optimizer wrapper"""
     if not json_data or not isinstance(json_data, dict):
@@ -450,41 +880,110 @@ def optimize_bstar_tree_safe(json_data):
         return {"error": "No blocks in input"}
 
     try:
+        settings = json_data.get("sa_settings")
+        settings = settings if isinstance(settings, dict) else {}
+        chains = int(settings.get("chains", CHAINS))
+        time_budget = float(settings.get("time_budget", TIME_BUDGET) or 0)
+        adaptive = bool(settings.get("auto_schedule", AUTO_SCHEDULE))
+        table_size = int(settings.get("transposition_cache", TRANSPOSITION_CACHE) or 0)
+
+        # Seeded runs are reproducible: reuse a stored result for the same inputs
+        cache = key = None
+        if cache_enabled(settings):
+            cache = ResultCache()
+            key = cache_key({
+                "optimizer": "optimize_bstar_tree_safe",
+                "source": source_digest(__file__, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "bstar_contour.py"), sa_schedule.__file__,
+                                        transposition.__file__),
+                "constants": module_constants(globals()),
+                "start": SimpleOptimizer(json_data).fingerprint(),
+                "settings": run_settings(settings),
+            })
+            cached = cache.get(key)
+            if cached is not None:
+                result = dict(json_data)
+                result.update(cached)
+                result["optimization_results"]["cache_hit"] = True
+                return result
+
         optimizer = SimpleOptimizer(json_data)
-        best_tree, best_fitness, iterations = optimizer.optimize()
+        if settings.get("seed") is not None:
+            random.seed(settings["seed"])
+        initial_temp = optimizer.initial_temperature() if adaptive else INITIAL_TEMP
+        # The adaptive schedule keeps the fixed schedule's final / initial temperature ratio
+        final_temp = FINAL_TEMP * initial_temp / INITIAL_TEMP if adaptive else FINAL_TEMP
+
+        if chains > 1:
+            best_tree, best_fitness, stats = run_chains(json_data, settings, initial_temp)
+            # Load the winning tree once to get its packing totals
+            optimizer = SimpleOptimizer(dict(json_data, bstar_tree={"root": best_tree or {}}))
+            optimizer._contour_placement()
+        else:
+            optimizer.reference_temp = initial_temp
+            trace = trace_from_settings(settings, "optimize_bstar_tree_safe", MOVE_NAMES)
+            # Time-budgeted runs stop on the deadline instead of MAX_ITERATIONS
+            deadline = Deadline(time_budget, final_temp) if time_budget > 0 else None
+            max_iterations = run_length() if adaptive else MAX_ITERATIONS
+            schedule = AdaptiveSchedule(initial_temp, final_temp, max_iterations, deadline) if adaptive else deadline
+            if deadline is not None:
+                max_iterations = sys.maxsize
+            table = TranspositionTable(table_size) if table_size > 0 else None
+            try:
+                with deadline.signals() if deadline is not None else nullcontext():
+                    best_tree, best_fitness, iterations = optimizer.optimize(
+                        initial_temp, max_iterations, final_temp, trace=trace, schedule=schedule, table=table)
+            finally:
+                trace_summary = trace.close() if trace is not None else None
+            stats = {"actual_iterations": iterations}
+            if trace_summary is not None:
+                stats["trace"] = trace_summary
+            if adaptive:
+                stats["schedule"] = schedule.stats()
+            if table is not None:
+                stats["transposition"] = table.stats()
+            if deadline is not None:
+                stats["time_budget"] = deadline.stats()
 
         if best_tree is None:
             return {"error": "Optimization failed"}
 
-        optimizer._contour_placement(best_tree)
-        nodes = optimizer._get_all_nodes_from_dict(best_tree)
-
-        if not nodes:
+        if optimizer.n == 0:
             return {"error": "No nodes in result"}
 
-        max_x = max(node.get("x_max", 0) for node in nodes)
-        max_y = max(node.get("y_max", 0) for node in nodes)
-        total_area = max_x * max_y
-        used_area = sum((node.get("x_max", 0) - node.get("x_min", 0)) *
-                        (node.get("y_max", 0) - node.get("y_min", 0)) for node in nodes)
-        dead_space = total_area - used_area
-        dead_space_ratio = (dead_space / total_area * 100) if total_area > 0 else 0
-        aspect_ratio = max(max_x, max_y) / min(max_x, max_y) if min(max_x, max_y) > 0 else 1.0
+        metrics = optimizer.placement_metrics()
 
         result = dict(json_data)
         result["bstar_tree"] = {"root": best_tree}
         result["optimization_results"] = {
             "fitness_function": round(best_fitness, 2),
-            "total_area": round(total_area, 2),
-            "used_area": round(used_area, 2),
-            "dead_space": round(dead_space, 2),
-            "dead_space_percentage": round(dead_space_ratio, 2),
-            "aspect_ratio": round(aspect_ratio, 2),
-            "placement_width": round(max_x, 2),
-            "placement_height": round(max_y, 2),
-            "actual_iterations": iterations,
+            "total_area": round(metrics["total_area"], 2),
+            "used_area": round(metrics["used_area"], 2),
+            "dead_space": round(metrics["dead_space"], 2),
+            "dead_space_percentage": round(metrics["dead_space_percentage"], 2),
+            "aspect_ratio": round(metrics["aspect_ratio"], 2),
+            "placement_width": round(metrics["placement_width"], 2),
+            "placement_height": round(metrics["placement_height"], 2),
+            "actual_iterations": stats["actual_iterations"],
             "optimization_method": "fixed_node_preservation"
         }
+        if chains > 1:
+            result["optimization_results"]["chains"] = chains
+            result["optimization_results"].update(
+                (name, value) for name, value in stats.items() if name != "actual_iterations")
+        if "trace" in stats:
+            result["optimization_results"]["trace"] = stats["trace"]
+        if "time_budget" in stats:
+            result["optimization_results"]["time_budget"] = stats["time_budget"]
+        if "schedule" in stats:
+            result["optimization_results"]["schedule"] = stats["schedule"]
+        if "transposition" in stats:
+            result["optimization_results"]["transposition"] = stats["transposition"]
+
+        if cache is not None:
+            cache.put(key, {"bstar_tree": result["bstar_tree"],
+                            "optimization_results": result["optimization_results"]})
+        result["optimization_results"]["cache_hit"] = False
 
         return result
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Contour structure for B*-tree packing
+Chunked segment list with O(log n + CHUNK) amortized updates, shared by
+02_createBStarTree.py and 03_simulatedAnnealing.py
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+CHUNK = 64  # Segments per chunk of the contour; chunks split at twice that
+
+
+class ContourStructure:
+    """
+    Maintains contour for placement
+
+    The contour is a step function over x: segment k covers
+    [start_k, start_k+1) at height top_k, and a ground segment starting at
+    -inf keeps every query inside the index. Segments are kept in chunks of
+    up to 2 * CHUNK, indexed by their first start. A lookup bisects the index
+    and the chunks, then scans the segments under the block, which the
+    update that follows it replaces. An update edits the chunk it falls in,
+    after merging the chunks the block reaches into it: every segment is
+    created and removed once, so an update costs O(log n + CHUNK) amortized,
+    plus a shift of the chunk index, which is CHUNK times shorter than the
+    contour.
+
+    snapshot() copies only the chunk index; chunks it shares are copied
+    before their next change.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Drop all placed blocks"""
+        self._starts = [[float("-inf")]]
+        self._tops = [[0.0]]
+        self._firsts = [float("-inf")]
+        self._owned = [True]
+
+    @property
+    def contour(self):
+        """Contour as a list of (x_start, x_end, y_top) tuples"""
+        starts = list(chain.from_iterable(self._starts))
+        tops = list(chain.from_iterable(self._tops))
+        return list(zip(starts[1:-1], starts[2:], tops[1:-1]))
+
+    def snapshot(self):
+        """State to restore() later, sharing the chunks with this contour"""
+        self._owned = [False] * len(self._starts)
+        return self._starts[:], self._tops[:], self._firsts[:]
+
+    def restore(self, snapshot):
+        """Return to the contour of a snapshot()"""
+        starts, tops, firsts = snapshot
+        self._starts = starts[:]
+        self._tops = tops[:]
+        self._firsts = firsts[:]
+        self._owned = [False] * len(starts)
+
+    def matches(self, snapshot):
+        """True when the contour equals the one snapshot() saved"""
+        starts, tops, firsts = snapshot
+        if firsts == self._firsts:
+            return tops == self._tops and starts == self._starts
+        # Same segments may be chunked differently
+        return (list(chain.from_iterable(tops)) == list(chain.from_iterable(self._tops))
+                and list(chain.from_iterable(starts)) == list(chain.from_iterable(self._starts)))
+
+    def find_y_position(self, x_start, x_end):
+        """Find the y position where block can be placed"""
+        firsts = self._firsts
+        if len(firsts) == 1:
+            starts = self._starts[0]
+            tops = self._tops[0]
+            lo = bisect_right(starts, x_start) - 1
+            hi = bisect_left(starts, x_end, lo + 1)
+            return max(tops[lo:hi]) if hi > lo + 1 else tops[lo]
+
+        # Segment under x_start and the last one starting before x_end
+        c = bisect_right(firsts, x_start) - 1
+        k = bisect_right(self._starts[c], x_start) - 1
+        d = bisect_left(firsts, x_end, c) - 1
+        e = bisect_left(self._starts[d], x_end)
+        if d == c:
+            tops = self._tops[c]
+            return max(tops[k:e]) if e > k + 1 else tops[k]
+        # The scanned segments are the ones update_contour() replaces next
+        y = max(self._tops[c][k:])
+        for tops in self._tops[c + 1:d]:
+            y = max(y, max(tops))
+        return max(y, max(self._tops[d][:e]))
+
+    def update_contour(self, x_start, x_end, y_top):
+        """Update contour after placing a block"""
+        if x_end <= x_start:
+            return
+
+        # Chunk holding the last segment before x_start, merged with the
+        # chunks starting under the block so that the update stays inside it
+        firsts = self._firsts
+        c = 0
+        if len(firsts) > 1:
+            c = bisect_left(firsts, x_start) - 1
+            if c + 1 < len(firsts) and firsts[c + 1] <= x_end:
+                self._merge(c, bisect_right(firsts, x_end, c))
+        starts = self._starts[c]
+        tops = self._tops[c]
+        if not self._owned[c]:
+            starts = self._starts[c] = starts[:]
+            tops = self._tops[c] = tops[:]
+            self._owned[c] = True
+
+        i = bisect_left(starts, x_start)
+        j = bisect_left(starts, x_end, i)
+
+        new_starts = [x_start]
+        new_tops = [y_top]
+
+        # Height continuing right of the block, unless a segment starts exactly
+        # there (the next chunk starts right of x_end)
+        if j == len(starts) or starts[j] != x_end:
+            end_top = tops[j - 1]
+            if end_top != y_top:
+                new_starts.append(x_end)
+                new_tops.append(end_top)
+        elif tops[j] == y_top:
+            # Merge with the next segment at the same height
+            j += 1
+
+        # Merge with the previous segment at the same height
+        if tops[i - 1] == y_top:
+            del new_starts[0]
+            del new_tops[0]
+
+        starts[i:j] = new_starts
+        tops[i:j] = new_tops
+        if len(starts) > 2 * CHUNK:
+            self._split(c)
+
+    def _merge(self, lo, hi):
+        """Join chunks lo:hi into one"""
+        self._starts[lo:hi] = [list(chain.from_iterable(self._starts[lo:hi]))]
+        self._tops[lo:hi] = [list(chain.from_iterable(self._tops[lo:hi]))]
+        del self._firsts[lo + 1:hi]
+        self._owned[lo:hi] = [True]
+
+    def _split(self, c):
+        """Split chunk c into chunks of at most CHUNK, as even as possible"""
+        starts = self._starts[c]
+        tops = self._tops[c]
+        count = -(-len(starts) // CHUNK)
+        bounds = [len(starts) * k // count for k in range(count + 1)]
+        ranges = list(zip(bounds, bounds[1:]))
+        self._starts[c:c + 1] = [starts[a:b] for a, b in ranges]
+        self._tops[c:c + 1] = [tops[a:b] for a, b in ranges]
+        self._firsts[c:c + 1] = [starts[a] for a, _ in ranges]
+        self._owned[c:c + 1] = [True] * count
+
+    def place(self, x_start, x_end, height):
+        """Lowest y for a block over [x_start, x_end), then add it to the contour"""
+        y = self.find_y_position(x_start, x_end)
+        self.update_contour(x_start, x_end, y + height)
+        return y
@@ -4,17 +4,203 @@ Universal n8n JSON Handler
 Handles JSON communication between n8n and external Python scripts with safe encoding
 """
 
+import codecs
+import cProfile
+import functools
+import itertools
 import json
+import math
+import os
+import pstats
+import re
+import struct
 import sys
+import threading
+import time
+import tracemalloc
 import gc
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Set by scripts/n8n_worker.py: receives the processing function instead of
+# running it on stdin/stdout, so a warm worker can call it per request
+_worker_registration = None
+
+BATCH_KEY = "batch"  # The node template sends multiple items as {"batch": [...]}
+READ_CHUNK = 1 << 16  # Bytes read from stdin at a time in streaming mode
+FAST_PARSE_LIMIT = 1 << 23  # Inputs up to this size are parsed in one go by the codec
+# Processes for per-item batch/NDJSON processing, 0 = in this process
+BATCH_WORKERS = int(os.environ.get("N8N_BATCH_WORKERS", "0") or 0)
+
+_BATCH_START = re.compile(r'\{\s*"%s"\s*:\s*\[' % BATCH_KEY)
+
+# Length-prefixed framing for script-to-script pipes: magic, codec tag, payload size
+FRAME_MAGIC = b"\xffN8"
+FRAME_HEADER = struct.Struct(">3scI")
+
+# Profiling ($N8N_PROFILE or "_profile" in an input item): modes, comma separated
+PROFILE_KEY = "_profile"  # Reserved: profiling request in the input, timing summary in the output
+PROFILE_MODES = frozenset(("timing", "cprofile", "sample", "tracemalloc"))
+# Next to the mounted logs/ volume: <repo>/logs or /home/node/logs in the container
+PROFILE_DIR = os.environ.get("N8N_PROFILE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "logs", "profiles")
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples in "sample" mode
+PROFILE_TOP = 5  # Functions by cumulative time listed in the summary
+
+
+class JsonCodec:
+    """Standard library JSON, UTF-8 without escaping"""
+
+    name = "json"
+    tag = b"j"
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def _non_finite(data):
+    """True when data holds a NaN or infinite float"""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_non_finite(value) for value in data)
+    if hasattr(data, "tolist"):
+        # numpy arrays and scalars
+        return _non_finite(data.tolist())
+    return False
+
+
+def _tolist(value):
+    """json.dumps default for the numpy values orjson serializes"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson, same wire format as JsonCodec; falls back to json for what orjson
+    rejects and for NaN/Infinity, which orjson would write as null
+    """
+
+    name = "orjson"
+    options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, data):
+        try:
+            encoded = orjson.dumps(data, option=self.options)
+        except TypeError:
+            # e.g. integers beyond 64 bit
+            return super().dumps(data)
+        # Only output with a null can hide a non-finite float
+        if b"null" in encoded and _non_finite(data):
+            return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_tolist).encode('utf-8')
+        return encoded
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # e.g. NaN/Infinity written by json.dumps; real syntax errors are raised by json
+            return json.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack, only used inside frames"""
+
+    name = "msgpack"
+    tag = b"m"
+
+    def dumps(self, data):
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+CODECS = {"json": JsonCodec, "orjson": OrjsonCodec, "msgpack": MsgpackCodec}
+_CODEC_MODULES = {"orjson": orjson, "msgpack": msgpack}
+
+
+def get_codec(name=None):
+    """
+    Codec instance by name
+    Args:
+        name (str): "json", "orjson" or "msgpack"; default $N8N_CODEC, else
+                    orjson when it is installed, else json
+    Returns: Codec with dumps(data) -> bytes and loads(bytes or str) -> data
+    """
+    name = name or os.environ.get("N8N_CODEC") or ("orjson" if orjson else "json")
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec {name}, expected one of {sorted(CODECS)}")
+    if name in _CODEC_MODULES and _CODEC_MODULES[name] is None:
+        raise ImportError(f"Codec {name} requires the {name} package")
+    return CODECS[name]()
+
+
+def frame_codec():
+    """Codec for frame payloads: msgpack when installed, else the default JSON codec"""
+    return MsgpackCodec() if msgpack else get_codec()
+
+
+def write_frame(stream, data, codec=None):
+    """Write one length-prefixed frame to a binary stream"""
+    codec = codec or frame_codec()
+    payload = codec.dumps(data)
+    stream.write(FRAME_HEADER.pack(FRAME_MAGIC, codec.tag, len(payload)))
+    stream.write(payload)
+
+
+def read_frame(stream):
+    """
+    Read one frame from a binary stream
+    Returns: Decoded data; raises EOFError at the end of the stream
+    """
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        raise EOFError("No more frames")
+    if len(header) < FRAME_HEADER.size:
+        raise ValueError("Truncated frame header")
+    magic, tag, size = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Invalid frame header")
+    payload = stream.read(size)
+    if len(payload) < size:
+        raise ValueError(f"Truncated frame: expected {size} bytes, got {len(payload)}")
+    if tag == MsgpackCodec.tag:
+        if msgpack is None:
+            raise ImportError("Frame is msgpack encoded but msgpack is not installed")
+        return MsgpackCodec().loads(payload)
+    return (OrjsonCodec() if orjson else JsonCodec()).loads(payload)
 
 
 class N8nJsonHandler:
     """Universal handler for n8n JSON communication with safe encoding"""
 
-    def __init__(self):
+    def __init__(self, codec=None):
         self.input_data = None
         self.output_data = None
+        self.codec = codec or get_codec()
 
     def load_from_n8n(self):
         """
@@ -25,7 +211,8 @@ class N8nJsonHandler:
             # Safe encoding handling - prevents ASCII character issues
             input_bytes = sys.stdin.buffer.read()
             input_text = input_bytes.decode('utf-8', errors='replace')
-            self.input_data = json.loads(input_text)
+            del input_bytes
+            self.input_data = self.codec.loads(input_text)
             return True
         except Exception as e:
             self._output_error(f"Failed to load JSON from n8n: {str(e)}")
@@ -39,8 +226,8 @@ class N8nJsonHandler:
         Returns: True if successful, False otherwise
         """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.input_data = json.load(f)
+            with open(filename, 'rb') as f:
+                self.input_data = self.codec.loads(f.read())
             return True
         except Exception as e:
             self._output_error(f"Failed to load JSON from file {filename}: {str(e)}")
@@ -68,8 +255,10 @@ class N8nJsonHandler:
         if self.output_data is not None:
             try:
                 # Safe JSON output - prevents ASCII character issues
-                output_text = json.dumps(self.output_data, ensure_ascii=False, separators=(',', ':'))
-                print(output_text)
+                output_bytes = self.codec.dumps(self.output_data)
+                sys.stdout.flush()
+                sys.stdout.buffer.write(output_bytes + b"\n")
+                sys.stdout.buffer.flush()
             except Exception as e:
                 self._output_error(f"Failed to serialize output: {str(e)}")
         else:
@@ -92,41 +281,588 @@ class N8nJsonHandler:
             print('{"error": "Critical JSON serialization error", "success": false}')
 
 
-def create_n8n_processor(user_processor_function):
+class JsonItemStream:
     """
-    Universal function that wraps user processing logic for n8n
+    Incremental reader of JSON values from a binary stream
 
-    Args:
-        user_processor_function: Function that takes JSON data and returns processed JSON
-                                Signature: user_function(json_data) -> processed_json_data
+    Only the item being parsed is held in memory: stdin is read in chunks,
+    decoded with an incremental UTF-8 decoder and each value is cut from the
+    buffer with JSONDecoder.raw_decode as soon as it is complete. With a
+    codec loads function the first FAST_PARSE_LIMIT bytes are read ahead, so
+    an input that is a single document is parsed by the codec in one go.
+    """
 
-    Returns: Function ready for n8n execution
+    def __init__(self, stream, chunk_size=READ_CHUNK, loads=None):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # Whole-document parser (e.g. orjson) tried when the first value is all the input
+        self.loads = loads
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.parser = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # Buffer position kept across reads while scanning ahead, None when not scanning
+        self.mark = None
+
+    def _fill(self, min_chars=1):
+        """Read until at least min_chars more characters are buffered; False at end of input"""
+        keep = self.pos if self.mark is None else self.mark
+        self.buffer = self.buffer[keep:]
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark = 0
+        target = len(self.buffer) + min_chars
+        while not self.eof and len(self.buffer) < target:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                self.buffer += self.decoder.decode(b"", final=True)
+            else:
+                self.buffer += self.decoder.decode(chunk)
+        return len(self.buffer) >= target
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, '' at end of input"""
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ""
+
+    def consume(self, char):
+        """Skip the expected structural character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at input position, found '{found or 'end of input'}'")
+        self.pos += 1
+
+    def batch_start(self):
+        """
+        Consume the '{"batch": [' of a batch wrapper. The input is only one
+        when the array is followed by the closing '}' and the end of the
+        input, i.e. it is_batch; that is checked by parsing ahead to the end
+        of the array (items are dropped, the text is kept). Otherwise the
+        read position stays at the start of the document.
+        """
+        self.peek()
+        while not self.eof and len(self.buffer) - self.pos < 64:
+            self._fill(64)
+        match = _BATCH_START.match(self.buffer, self.pos)
+        if match is None:
+            return False
+
+        self.mark = self.pos
+        self.pos = match.end()
+        try:
+            wrapper = self._array_ends_input()
+        except ValueError:
+            wrapper = False  # malformed, reported by the whole-document parse
+        self.pos = self.mark + (match.end() - match.start() if wrapper else 0)
+        self.mark = None
+        return wrapper
+
+    def _array_ends_input(self):
+        """True when the array at the read position is followed by '}' and the end of the input"""
+        if self.peek() != "]":
+            while True:
+                self._decode()
+                if self.peek() != ",":
+                    break
+                self.pos += 1
+        for char in "]}":
+            if self.peek() != char:
+                return False
+            self.pos += 1
+        return self.peek() == ""
+
+    def value(self):
+        """Parse the next complete JSON value"""
+        self.peek()
+        loads, self.loads = self.loads, None
+        if loads is not None:
+            # Read ahead to see whether the whole input is one small document
+            while not self.eof and len(self.buffer) - self.pos < FAST_PARSE_LIMIT:
+                self._fill(self.chunk_size)
+            if self.eof:
+                try:
+                    value = loads(self.buffer[self.pos:])
+                    self.pos = len(self.buffer)
+                    return value
+                except ValueError:
+                    # Several values follow, split them below
+                    pass
+        return self._decode()
+
+    def _decode(self):
+        """Incrementally parse the value at the read position"""
+        while True:
+            try:
+                value, end = self.parser.raw_decode(self.buffer, self.pos)
+                # A number at the buffer end may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # Grow the buffer geometrically so a large item costs O(size) parsing in total
+            self._fill(max(len(self.buffer) - self.pos, self.chunk_size))
+
+    def items(self):
+        """
+        Detect the input format and iterate over its items
+        Returns: (mode, iterator) with mode "batch" for a document that
+                 is_batch, "ndjson" for several top-level values, "single" otherwise
+        """
+        if self.batch_start():
+            self.loads = None
+            return "batch", self._batch_items()
+
+        first = self.value()
+        if self.peek() == "":
+            if is_batch(first):
+                # e.g. spacing the wrapper pattern does not match
+                return "batch", iter(first[BATCH_KEY])
+            return "single", iter([first])
+        return "ndjson", self._ndjson_items(first)
+
+    def _batch_items(self):
+        if self.peek() != "]":
+            while True:
+                yield self.value()
+                if self.peek() != ",":
+                    break
+                self.pos += 1
+        self.consume("]")
+        self.consume("}")
+
+    def _ndjson_items(self, first):
+        yield first
+        del first
+        while self.peek() != "":
+            yield self.value()
+
+
+def _peek(stream, size):
+    """First bytes of a binary stream without consuming them"""
+    try:
+        return stream.peek(size)[:size]
+    except (AttributeError, OSError):
+        return b""
+
+
+class FrameStream:
+    """Items of a length-prefixed frame stream, same interface as JsonItemStream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def items(self):
+        first = read_frame(self.stream)
+        if not _peek(self.stream, 1):
+            if is_batch(first):
+                return "batch", iter(first[BATCH_KEY])
+            return "single", iter([first])
+        return "frames", self._frames(first)
+
+    def _frames(self, first):
+        yield first
+        del first
+        while True:
+            try:
+                yield read_frame(self.stream)
+            except EOFError:
+                return
+
+
+class ResultWriter:
+    """
+    Writes results to a binary stream as they arrive: one document ("single"),
+    a JSON array ("batch"), one document per line ("ndjson") or one frame per
+    result when framed
     """
 
-    def n8n_wrapper():
-        handler = N8nJsonHandler()
+    def __init__(self, stream, mode, codec, framed=False):
+        self.stream = stream
+        self.mode = mode
+        self.codec = codec
+        self.framed = framed
+        self.frame_codec = frame_codec() if framed else None
+        self.count = 0
+        if mode == "batch" and not framed:
+            stream.write(b"[")
+
+    def write(self, item, profile=None):
+        """Write one result; a profile summary is added to it under PROFILE_KEY after timing serialization"""
+        codec = self.frame_codec or self.codec
+        start = time.perf_counter()
+        try:
+            data = codec.dumps(item)
+        except Exception as e:
+            data = codec.dumps({"error": f"Failed to serialize output: {str(e)}", "success": False, "data": None})
+        if profile is not None:
+            profile["serialize_seconds"] = round(time.perf_counter() - start, 6)
+            data = _attach_profile(codec, data, profile)
+
+        if self.framed:
+            self.stream.write(FRAME_HEADER.pack(FRAME_MAGIC, codec.tag, len(data)))
+            self.stream.write(data)
+        elif self.mode == "batch":
+            self.stream.write(b"," + data if self.count else data)
+        else:
+            self.stream.write(data + b"\n")
+        self.count += 1
+        self.stream.flush()
 
-        # Load input from n8n
-        if not handler.load_from_n8n():
-            return  # Error already output by handler
+    def close(self):
+        if self.mode == "batch" and not self.framed:
+            self.stream.write(b"]\n")
+        self.stream.flush()
+
+
+def _profile_modes(value):
+    """Set of profiling modes for a $N8N_PROFILE / "_profile" value, empty when off"""
+    if value is None or value is False or value in ("", "0"):
+        return frozenset()
+    if isinstance(value, str) and value != "1":
+        value = value.split(",")
+    if isinstance(value, (list, tuple)):
+        return PROFILE_MODES.intersection(str(mode).strip().lower() for mode in value) | {"timing"}
+    return frozenset(("timing",))
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+_profile_counter = itertools.count()
+
+
+def _profile_path(suffix):
+    """New file in PROFILE_DIR named after the running script, time and process"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0].lstrip("-") or "python"
+    name = f"{script}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_counter)}{suffix}"
+    return os.path.abspath(os.path.join(PROFILE_DIR, name))
+
+
+class _StackSampler:
+    """Samples the calling thread's Python stack every SAMPLE_INTERVAL seconds from a background thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def write(self, path):
+        """Collapsed stacks ("a;b;c count" per line), the input format of flame graph tools"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items(), key=lambda entry: -entry[1]):
+                f.write(f"{stack} {count}\n")
+
+
+def _top_functions(profiler):
+    """[function, calls, cumulative seconds] of the PROFILE_TOP slowest functions"""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda entry: -entry[1][3])[:PROFILE_TOP]
+    return [[f"{os.path.basename(path)}:{line}({name})", calls, round(cumulative, 6)]
+            for (path, line, name), (_, calls, _, cumulative, _) in rows]
 
-        # Get data for processing
-        input_data = handler.get_data()
 
+def _profile_item(user_processor_function, modes, item):
+    """
+    _process_item under the profilers selected by modes and the item's own
+    "_profile" key (removed before the user function sees it). A dict result
+    gets the summary under PROFILE_KEY; profiler output is written to PROFILE_DIR.
+    """
+    if isinstance(item, dict) and PROFILE_KEY in item:
+        item = dict(item)
+        modes = modes | _profile_modes(item.pop(PROFILE_KEY))
+    if not modes:
+        return _process_item(user_processor_function, item)
+
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    sampler = _StackSampler() if "sample" in modes else None
+    tracing = "tracemalloc" in modes and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = _process_item(user_processor_function, item)
+    finally:
+        if profiler:
+            profiler.disable()
+        process_seconds = time.perf_counter() - start
+        if sampler:
+            sampler.stop()
+
+    summary = {"modes": sorted(modes), "process_seconds": round(process_seconds, 6), "peak_rss_mb": _peak_rss_mb()}
+    if tracing:
+        summary["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    try:
+        if profiler:
+            summary["cprofile"] = _profile_path(".prof")
+            profiler.dump_stats(summary["cprofile"])
+            summary["top"] = _top_functions(profiler)
+        if sampler:
+            summary["sample_profile"] = _profile_path(".folded")
+            sampler.write(summary["sample_profile"])
+            summary["samples"] = sampler.samples
+    except OSError as e:
+        summary["profile_error"] = f"Failed to write profile: {str(e)}"
+
+    if isinstance(result, dict):
+        result[PROFILE_KEY] = summary
+    return result
+
+
+def _attach_profile(codec, data, profile):
+    """Serialized dict result with the profile summary added under PROFILE_KEY"""
+    if codec.name in ("json", "orjson"):
+        # Append the key to the serialized object instead of encoding it again
+        separator = b"," if len(data) > 2 else b""
+        return data[:-1] + separator + json.dumps(PROFILE_KEY).encode("utf-8") + b":" + codec.dumps(profile) + b"}"
+    item = codec.loads(data)
+    item[PROFILE_KEY] = profile
+    return codec.dumps(item)
+
+
+class _ProfileReport:
+    """Run-level profile: per-item summaries and phase totals, written to PROFILE_DIR as JSON"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.items = []
+        self.path = None
+
+    def add(self, summary):
+        if self.path is None:
+            self.path = _profile_path(".json")
+        summary["report"] = self.path
+        self.items.append(summary)
+
+    def write(self):
+        if not self.items:
+            return
+        phases = {phase: round(sum(item.get(phase, 0.0) for item in self.items), 6)
+                  for phase in ("load_seconds", "process_seconds", "serialize_seconds")}
+        report = {
+            "script": os.path.abspath(sys.argv[0]) if sys.argv[0] else None,
+            "mode": self.mode,
+            "profiled_items": len(self.items),
+            "wall_seconds": round(time.perf_counter() - self.start, 6),
+            "phases": phases,
+            "peak_rss_mb": _peak_rss_mb(),
+            "items": self.items,
+        }
         try:
-            # Call user's processing function
-            processed_data = user_processor_function(input_data)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"Failed to write profile report: {str(e)}", file=sys.stderr)
 
-            # Set output and send to n8n
-            handler.set_output(processed_data)
-            handler.output_to_n8n()
 
-            # Cleanup
-            del input_data, processed_data
-            gc.collect()
+def _timed_items(items, load_times, first=0.0):
+    """Pass items through, appending the time spent parsing each one to load_times"""
+    extra = first
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        load_times.append(time.perf_counter() - start + extra)
+        extra = 0.0
+        yield item
 
-        except Exception as e:
-            handler._output_error(f"Processing error: {str(e)}")
+
+def _process_item(user_processor_function, item):
+    """Run the user function on one item, errors and a None result become the item's error object"""
+    try:
+        result = user_processor_function(item)
+    except Exception as e:
+        return {"error": f"Processing error: {str(e)}", "success": False, "data": None}
+    if result is None:
+        # What output_to_n8n prints for an unset output
+        return {"error": "No output data set", "success": False, "data": None}
+    return result
+
+
+def _map_items(user_processor_function, items, workers):
+    """
+    Results of the user function per item, in input order
+
+    With workers > 1 items are processed on a process pool; at most two items
+    per worker are in flight so memory stays bounded by the window, not the batch.
+    """
+    if workers <= 1:
+        for item in items:
+            yield _process_item(user_processor_function, item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = deque()
+        try:
+            for item in items:
+                window.append(pool.submit(_process_item, user_processor_function, item))
+                del item
+                if len(window) >= 2 * workers:
+                    yield _future_result(window.popleft())
+        except Exception:
+            # Input broke off: still deliver the items already submitted
+            while window:
+                yield _future_result(window.popleft())
+            raise
+        while window:
+            yield _future_result(window.popleft())
+
+
+def _future_result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return {"error": f"Processing error: {str(e)}", "success": False, "data": None}
+
+
+def is_batch(json_data):
+    """
+    The one batch rule of the stream, worker and file paths: a document
+    whose only key is BATCH_KEY, holding a list of items
+    """
+    return isinstance(json_data, dict) and len(json_data) == 1 and isinstance(json_data.get(BATCH_KEY), list)
+
+
+def _batch_aware(user_processor_function):
+    """Processing function that maps is_batch payloads item by item"""
+
+    def process(json_data):
+        if is_batch(json_data):
+            return [_process_item(user_processor_function, item) for item in json_data[BATCH_KEY]]
+        return user_processor_function(json_data)
+
+    return process
+
+
+def _stream_from_n8n(user_processor_function, workers):
+    """
+    Streaming stdin/stdout loop: items are parsed one at a time and each
+    result is written and flushed as soon as it is ready. A batch is answered
+    with a JSON array, NDJSON input with NDJSON output and a single document
+    exactly as before. Framed input is answered with frames unless
+    $N8N_FRAMED_OUTPUT says otherwise ("1" always frames, "0" never).
+    Profiled items ($N8N_PROFILE or their "_profile" key) report load,
+    process and serialize times under "_profile" in their result.
+    """
+    codec = get_codec()
+    process = functools.partial(_profile_item, user_processor_function,
+                                _profile_modes(os.environ.get("N8N_PROFILE")))
+    stdin = sys.stdin.buffer
+    framed = _peek(stdin, len(FRAME_MAGIC)) == FRAME_MAGIC
+    framed_output = os.environ.get("N8N_FRAMED_OUTPUT")
+    framed_output = framed if framed_output is None else framed_output == "1"
+
+    sys.stdout.flush()
+    start = time.perf_counter()
+    try:
+        if framed:
+            mode, items = FrameStream(stdin).items()
+        else:
+            mode, items = JsonItemStream(stdin, loads=codec.loads).items()
+    except Exception as e:
+        writer = ResultWriter(sys.stdout.buffer, "single", codec, framed_output)
+        writer.write({"error": f"Failed to load JSON from n8n: {str(e)}", "success": False, "data": None})
+        writer.close()
+        return
+
+    writer = ResultWriter(sys.stdout.buffer, mode, codec, framed_output)
+    report = _ProfileReport(mode)
+    load_times = deque()
+    items = _timed_items(items, load_times, time.perf_counter() - start)
+    try:
+        if mode == "single":
+            results = iter([process(next(items))])
+        else:
+            results = _map_items(process, items, workers)
+        for result in results:
+            load_seconds = load_times.popleft() if load_times else 0.0
+            profile = result.pop(PROFILE_KEY, None) if isinstance(result, dict) else None
+            if profile is not None:
+                profile["load_seconds"] = round(load_seconds, 6)
+                report.add(profile)
+            writer.write(result, profile)
+            del result
+    except Exception as e:
+        # Malformed input part way through: reported as a final item
+        writer.write({"error": f"Failed to load JSON from n8n: {str(e)}", "success": False, "data": None})
+    writer.close()
+    report.write()
+    gc.collect()
+
+
+def create_n8n_processor(user_processor_function, workers=None):
+    """
+    Universal function that wraps user processing logic for n8n
+
+    Args:
+        user_processor_function: Function that takes JSON data and returns processed JSON
+                                Signature: user_function(json_data) -> processed_json_data
+        workers (int): Processes for batch/NDJSON items, default $N8N_BATCH_WORKERS (0 = none)
+
+    Input may be a single JSON document, a {"batch": [...]} wrapper (is_batch) or NDJSON;
+    batch items are parsed, processed and written out one at a time.
+
+    Profiling: $N8N_PROFILE (or an item's "_profile" value) set to "1" or to
+    modes among timing, cprofile, sample, tracemalloc, e.g. "cprofile,tracemalloc".
+
+    Returns: Function ready for n8n execution
+    """
+    if workers is None:
+        workers = BATCH_WORKERS
+
+    def n8n_wrapper():
+        if _worker_registration is not None:
+            _worker_registration(_batch_aware(functools.partial(
+                _profile_item, user_processor_function, _profile_modes(os.environ.get("N8N_PROFILE")))))
+            return
+
+        _stream_from_n8n(user_processor_function, workers)
 
     return n8n_wrapper
 
@@ -145,15 +881,31 @@ def create_file_processor(user_processor_function):
         handler = N8nJsonHandler()
 
         # Load input from file
+        start = time.perf_counter()
         if not handler.load_from_file(input_filename):
             return False
+        load_seconds = time.perf_counter() - start
 
         # Get data for processing
         input_data = handler.get_data()
 
         try:
-            # Call user's processing function
-            processed_data = user_processor_function(input_data)
+            # Call user's processing function, per item for {"batch": [...]}
+            processed_data = _profile_item(_batch_aware(user_processor_function),
+                                           _profile_modes(os.environ.get("N8N_PROFILE")), input_data)
+            report = _ProfileReport("file")
+            profile = processed_data.pop(PROFILE_KEY, None) if isinstance(processed_data, dict) else None
+            if profile is not None:
+                profile["load_seconds"] = round(load_seconds, 6)
+                report.add(profile)
+
+            if profile is not None:
+                # Time one serialization, then output with the summary included
+                start = time.perf_counter()
+                handler.codec.dumps(processed_data)
+                profile["serialize_seconds"] = round(time.perf_counter() - start, 6)
+                processed_data[PROFILE_KEY] = profile
+                report.write()
 
             # Output to file or stdout
             if output_filename:
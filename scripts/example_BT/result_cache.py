@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Content-addressed result cache for placement runs
+Seeded annealing runs are deterministic, so their result can be stored under
+a hash of everything that determines it and returned on the next identical
+run. Entries are JSON files in one directory, evicted least recently used
+first once the directory grows beyond its size limit.
+
+Settings (environment):
+    PLACEMENT_CACHE_DIR        cache directory, default logs/placement_cache
+    PLACEMENT_CACHE_MAX_BYTES  size limit, default 256 MiB
+    PLACEMENT_CACHE=0          disable the cache
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+# Next to the mounted logs/ volume: <repo>/logs or /home/node/logs in the container
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "logs", "placement_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_SUFFIX = ".json"
+
+
+# sa_settings entries that do not change the result
+IGNORED_SETTINGS = ("cache", "workers")
+
+
+def cache_enabled(settings):
+    """
+    Only seeded runs are reproducible and cached; sa_settings.cache = false
+    opts out, traced runs always anneal since a hit has no trajectory, and
+    time-budgeted runs depend on machine speed
+    """
+    return (settings.get("seed") is not None and settings.get("cache", True) is not False
+            and not settings.get("trace") and not settings.get("time_budget")
+            and os.environ.get("PLACEMENT_CACHE", "1") != "0")
+
+
+def module_constants(namespace):
+    """UPPER_CASE number/string settings of a script, e.g. globals() of the optimizer"""
+    return {name: value for name, value in namespace.items()
+            if name.isupper() and isinstance(value, (int, float, str))}
+
+
+def run_settings(settings):
+    """sa_settings without the entries in IGNORED_SETTINGS"""
+    return {key: value for key, value in settings.items() if key not in IGNORED_SETTINGS}
+
+
+def source_digest(*paths):
+    """SHA-256 of the optimizer's source files, so editing them invalidates their entries"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_key(parts):
+    """Hash of a JSON-serializable description of a run"""
+    text = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of JSON results on disk"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = os.path.abspath(
+            directory or os.environ.get("PLACEMENT_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("PLACEMENT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """Cached result for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Unreadable or half-written entry: drop it
+            self._remove(path)
+            return None
+
+        try:
+            # Access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """Store a result, then evict old entries beyond the size limit"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            # A cache that cannot be written must not fail the run
+            return False
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self._path(key))
+            tmp_path = None
+        except (OSError, TypeError, ValueError):
+            return False
+        finally:
+            if tmp_path is not None:
+                # Unserializable result or failed write: no partial file is left behind
+                self._remove(tmp_path)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(CACHE_SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+        except OSError:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Simulated annealing trajectory tracer
+Records sampled SA iterations (iteration, temperature, current and best
+cost, move type, accept flag) into a preallocated NumPy memmap used as a
+ring buffer, so a long run keeps its latest `capacity` samples at a fixed
+file size. Records are buffered in memory and copied to the map in blocks,
+keeping the cost in the annealing loop to a tuple append per sample.
+
+Enabled per run (single-chain runs) with sa_settings.trace in the input JSON:
+    "trace": true
+    "trace": {"path": "...", "capacity": 65536, "sample": 10}
+
+Files: <path>.npy (records, unused rows have iteration -1) and <path>.json
+(optimizer, move type names, sampling). Summarize a trace with
+    python3 sa_trace.py TRACE.npy [--bands N]
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Next to the mounted logs/ volume: <repo>/logs or /home/node/logs in the container
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "logs", "sa_traces")
+DEFAULT_CAPACITY = 1 << 16
+DEFAULT_SAMPLE = 1
+FLUSH_RECORDS = 4096  # Samples buffered before they are copied to the map
+
+TRACE_DTYPE = [("iteration", "<i8"), ("temperature", "<f8"), ("current", "<f8"), ("best", "<f8"),
+               ("move", "i1"), ("accepted", "?")]
+
+
+class TraceWriter:
+    """Ring buffer of SA samples in a memory-mapped .npy file"""
+
+    def __init__(self, path, optimizer, move_names, capacity=DEFAULT_CAPACITY, sample=DEFAULT_SAMPLE):
+        self.path = os.path.splitext(path)[0] + ".npy"
+        self.capacity = max(1, int(capacity))
+        self.sample = max(1, int(sample))
+        self.written = 0
+        self._pending = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._map = np.lib.format.open_memmap(self.path, mode="w+", dtype=TRACE_DTYPE, shape=(self.capacity,))
+        self._map["iteration"] = -1
+        meta = {
+            "optimizer": optimizer,
+            "move_names": list(move_names),
+            "capacity": self.capacity,
+            "sample": self.sample,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        with open(os.path.splitext(self.path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def record(self, iteration, temperature, current, best, move, accepted):
+        """Add one sample; the caller applies the sampling (iteration % sample == 0)"""
+        self._pending.append((iteration, temperature, current, best, move, accepted))
+        if len(self._pending) >= FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        """Copy buffered samples into the ring"""
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        if len(pending) > self.capacity:
+            self.written += len(pending) - self.capacity
+            pending = pending[-self.capacity:]
+
+        rows = np.array(pending, dtype=TRACE_DTYPE)
+        start = self.written % self.capacity
+        head = min(len(rows), self.capacity - start)
+        self._map[start:start + head] = rows[:head]
+        self._map[:len(rows) - head] = rows[head:]
+        self.written += len(rows)
+
+    def close(self):
+        """Flush to disk; returns the summary for optimization_results"""
+        self.flush()
+        self._map.flush()
+        return {"path": self.path, "records": min(self.written, self.capacity),
+                "sampled": self.written, "sample": self.sample}
+
+
+def trace_from_settings(settings, optimizer, move_names):
+    """TraceWriter for sa_settings.trace, None when tracing is off or NumPy is missing"""
+    spec = settings.get("trace")
+    if not spec or np is None:
+        return None
+    spec = spec if isinstance(spec, dict) else {}
+    path = spec.get("path") or os.path.join(
+        DEFAULT_TRACE_DIR, f"{optimizer}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    return TraceWriter(path, optimizer, move_names,
+                       spec.get("capacity", DEFAULT_CAPACITY), spec.get("sample", DEFAULT_SAMPLE))
+
+
+# ---------------------------------------------------------------- reader
+
+def read_trace(path):
+    """(records in iteration order, meta dict) of a trace file"""
+    base = os.path.splitext(path)[0]
+    with open(base + ".json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    records = np.load(base + ".npy", mmap_mode="r")
+    records = records[records["iteration"] >= 0]
+    return np.sort(records, order="iteration"), meta
+
+
+def _acceptance(records):
+    count = len(records)
+    accepted = int(np.count_nonzero(records["accepted"]))
+    return {"samples": count, "accepted": accepted,
+            "acceptance_rate": round(accepted / count * 100, 2) if count else 0}
+
+
+def summarize(path, bands=8):
+    """
+    Acceptance by move type and by temperature band (log-spaced between the
+    lowest and highest traced temperature, hottest first), plus the cost
+    trajectory endpoints.
+    """
+    records, meta = read_trace(path)
+    names = meta["move_names"]
+    summary = {
+        "optimizer": meta["optimizer"],
+        "sample": meta["sample"],
+        "overall": _acceptance(records),
+        "by_move": {name: _acceptance(records[records["move"] == k]) for k, name in enumerate(names)},
+        "by_temperature": [],
+    }
+    if not len(records):
+        return summary
+
+    summary["first_iteration"] = int(records["iteration"][0])
+    summary["last_iteration"] = int(records["iteration"][-1])
+    summary["initial_cost"] = float(records["current"][0])
+    summary["final_best_cost"] = float(records["best"][-1])
+
+    temperatures = records["temperature"]
+    positive = temperatures[temperatures > 0]
+    low, high = (float(positive.min()), float(positive.max())) if len(positive) else (0.0, 0.0)
+    if low <= 0 or high <= low:
+        edges = [high, low]
+    else:
+        edges = [math.exp(math.log(high) - (math.log(high) - math.log(low)) * k / bands) for k in range(bands + 1)]
+        edges[0], edges[-1] = high, low
+
+    for k in range(len(edges) - 1):
+        upper, lower = edges[k], edges[k + 1]
+        last = k == len(edges) - 2
+        mask = (temperatures <= upper) & ((temperatures >= lower) if last else (temperatures > lower))
+        band = records[mask]
+        entry = {"temperature_max": upper, "temperature_min": lower}
+        entry.update(_acceptance(band))
+        entry["by_move"] = {name: _acceptance(band[band["move"] == m])["acceptance_rate"]
+                            for m, name in enumerate(names)}
+        summary["by_temperature"].append(entry)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize an SA trajectory trace")
+    parser.add_argument("trace", help="trace .npy file")
+    parser.add_argument("--bands", type=int, default=8, help="temperature bands")
+    args = parser.parse_args()
+    print(json.dumps(summarize(args.trace, args.bands), indent=2))
+
+
+if __name__ == "__main__":
+    main()
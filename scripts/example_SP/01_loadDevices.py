@@ -3,8 +3,8 @@
 Simple n8n processor that loads simplified devices JSON file
 """
 
-import json
 import os
+from device_library import load_library
 from n8n_json_handler import create_n8n_processor
 
 
@@ -12,8 +12,13 @@ def load_simplified_devices(json_data):
     """
     Load simplified devices JSON from static file and return it directly
 
+    The file is read through its pre-parsed cache (device_library.py), which
+    is rebuilt automatically when the JSON changes.
+
     Args:
-        json_data: Input JSON data from n8n (ignored for this use case)
+        json_data: Input JSON data from n8n; an optional "load_blocks" list of
+                   block names limits the output to those blocks and the
+                   devices they use, "load_devices": false leaves devices out
 
     Returns:
         Raw simplified devices JSON structure
@@ -25,11 +30,8 @@ def load_simplified_devices(json_data):
     file_path = os.path.join(script_dir, "01_moreDevices.json")
 
     try:
-        # Load and return the simplified devices JSON directly
-        with open(file_path, 'r', encoding='utf-8') as f:
-            devices_data = json.load(f)
-
-        return devices_data
+        options = json_data if isinstance(json_data, dict) else {}
+        return load_library(file_path, options.get("load_blocks"), options.get("load_devices", True) is not False)
 
     except Exception as e:
         # Return minimal error structure if something goes wrong
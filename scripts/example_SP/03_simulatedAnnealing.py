@@ -7,15 +7,31 @@ Sequence-Pair Simulated Annealing Optimizer
 """
 
 import math
+import multiprocessing
 import random
-import json
+import os
+import sys
+import time
+from array import array
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from n8n_json_handler import create_n8n_processor
+from result_cache import ResultCache, cache_enabled, cache_key, module_constants, run_settings, source_digest
+from sa_trace import trace_from_settings
+from anytime import CHECK_INTERVAL, Deadline, chain_stop, init_chain_process
+import sa_schedule
+import transposition
+from sa_schedule import CALIBRATION_MOVES, LAM_MEMORY, AdaptiveSchedule, calibrate_temperature, schedule_length
+from transposition import TABLE_SIZE, TranspositionTable, merge_stats, zobrist
 
 # SA SETTINGS
 INITIAL_TEMP = 1000.0
 FINAL_TEMP = 0.01
 COOLING_RATE = 0.999  # Slower cooling = more iterations
 MAX_ITERATIONS = 50000  # Much higher limit
+TIME_BUDGET = 0.0  # Seconds (sa_settings.time_budget); > 0 replaces the two settings above
+AUTO_SCHEDULE = False  # Calibrated T0, adaptive cooling and stagnation stop (sa_settings.auto_schedule)
 
 # COST FUNCTION WEIGHTS
 AREA_WEIGHT = 10.0
@@ -24,6 +40,23 @@ ASPECT_WEIGHT = 1000.0  # High penalty for aspect ratio violations
 TARGET_ASPECT_RATIO = 1.0
 MAX_ASPECT_RATIO = 1.5  # New: Maximum allowed aspect ratio
 
+# BATCHED MODE (sa_settings.batch_size > 1 in the input JSON)
+BATCH_SIZE = 1  # Moves proposed and decoded together per step
+BATCH_ACCEPTANCE = "metropolis"  # "metropolis" or "best"
+BATCH_MIN = 8  # Shortest expected run of rejections worth a batch decode ("metropolis")
+DECODE_CHUNK = 1 << 16  # Tree rows x r+ steps whose Fenwick node indices decode_batch builds at once
+
+# MULTI-START / PARALLEL TEMPERING (sa_settings.chains > 1 in the input JSON)
+CHAINS = 1  # Chains run on a process pool, best result is returned
+EXCHANGE_INTERVAL = 1000  # Iterations between replica exchange attempts
+LADDER_RATIO = 2.0  # Temperature ratio between neighbouring replicas
+
+# TRANSPOSITION TABLE (sa_settings.transposition_cache, sequential mode)
+TRANSPOSITION_CACHE = TABLE_SIZE  # States remembered per chain, 0 disables
+
+# Move types of SequencePairState.propose() in trace records (sa_settings.trace)
+MOVE_NAMES = ("swap_r_plus", "swap_r_minus", "change_variant")
+
 
 def extract_variants(json_data):
     """Get variants per block: {name: [ {width,height}, ... ]}"""
@@ -75,6 +108,7 @@ def initial_variant_indices(variants, json_data):
 def decode_sequence_pair(r_plus, r_minus, variants, var_idx):
     """
     Constraint graph method - eliminates dead space.
+    O(n^2) reference; sa_optimize uses decode_sequence_pair_fast.
     """
     if not r_plus:
         return {}
@@ -128,20 +162,80 @@ def decode_sequence_pair(r_plus, r_minus, variants, var_idx):
     return placement
 
 
-def evaluate_placement(placement):
-    """Compute fitness with aspect ratio constraint."""
-    if not placement:
-        return float("inf"), {}, {}
+def _weighted_lcs(order, key, weight):
+    """
+    FAST-SP longest-path pass (Tang & Wong, DATE'00).
+    Visits blocks in r+ order and keeps a prefix-max Fenwick tree indexed
+    by key (1..n), so each block sees max(coord + size) over the already
+    visited blocks with a smaller key in O(log n).
+    Returns {block: coord}.
+    """
+    n = len(order)
+    tree = [0.0] * (n + 1)
+    coords = {}
+    for block in order:
+        k = key[block]
 
-    used_area = 0.0
-    max_x = 0.0
-    max_y = 0.0
+        best = 0.0
+        i = k - 1
+        while i > 0:
+            if tree[i] > best:
+                best = tree[i]
+            i -= i & -i
+        coords[block] = best
+
+        end = best + weight[block]
+        i = k
+        while i <= n:
+            if tree[i] < end:
+                tree[i] = end
+            i += i & -i
+    return coords
+
+
+def decode_sequence_pair_fast(r_plus, r_minus, variants, var_idx):
+    """
+    O(n log n) decoder, same coordinates as decode_sequence_pair.
+    x: weighted LCS of (r+, r-)          -> left-of  = before in both
+    y: weighted LCS of (r+, reversed r-) -> below    = before in r+, after in r-
+    """
+    if not r_plus:
+        return {}
+
+    n = len(r_plus)
+    pos_minus = {block: i for i, block in enumerate(r_minus)}
+
+    widths = {}
+    heights = {}
+    for block in r_plus:
+        v = variants[block][var_idx[block]]
+        widths[block] = v["width"]
+        heights[block] = v["height"]
+
+    x_coords = _weighted_lcs(r_plus, {b: pos_minus[b] + 1 for b in r_plus}, widths)
+    y_coords = _weighted_lcs(r_plus, {b: n - pos_minus[b] for b in r_plus}, heights)
+
+    placement = {}
+    for block in r_plus:
+        x = x_coords[block]
+        y = y_coords[block]
+        w = widths[block]
+        h = heights[block]
+
+        placement[block] = {
+            "x_min": x,
+            "y_min": y,
+            "width": w,
+            "height": h,
+            "x_max": x + w,
+            "y_max": y + h
+        }
+
+    return placement
 
-    for p in placement.values():
-        used_area += p["width"] * p["height"]
-        max_x = max(max_x, p["x_max"])
-        max_y = max(max_y, p["y_max"])
 
+def placement_cost(max_x, max_y, used_area):
+    """Fitness of a placement from its bounding box and used block area."""
     total_area = max_x * max_y if max_x > 0 and max_y > 0 else 0.0
     dead_space = max(total_area - used_area, 0.0)
     dead_space_ratio = (dead_space / total_area * 100.0) if total_area > 0 else 0.0
@@ -162,7 +256,35 @@ def evaluate_placement(placement):
             aspect_penalty
     )
 
-    metrics = {
+    return fitness
+
+
+def area_limit(threshold, used_area):
+    """
+    Largest bounding box area whose area and dead space terms of
+    placement_cost stay below threshold. The aspect penalty is never
+    negative, so any placement with a larger bounding box costs more.
+    """
+    if threshold == math.inf:
+        return math.inf
+    if AREA_WEIGHT * used_area >= threshold:
+        limit = threshold / AREA_WEIGHT
+    else:
+        # AREA_WEIGHT * A + d * (1 - used_area / A) == threshold for A >= used_area
+        d = 100.0 * DEAD_SPACE_WEIGHT
+        b = d - threshold
+        limit = (math.sqrt(b * b + 4.0 * AREA_WEIGHT * d * used_area) - b) / (2.0 * AREA_WEIGHT)
+    return limit * (1.0 + 1e-9)  # rounding margin: never cut off an acceptable placement
+
+
+def placement_metrics(max_x, max_y, used_area):
+    """Reported metrics for a placement bounding box."""
+    total_area = max_x * max_y if max_x > 0 and max_y > 0 else 0.0
+    dead_space = max(total_area - used_area, 0.0)
+    dead_space_ratio = (dead_space / total_area * 100.0) if total_area > 0 else 0.0
+    aspect_ratio = (max(max_x,max_y)/min(max_x,max_y)) if min(max_x,max_y) > 0 else 0.0
+
+    return {
         "total_area": total_area,
         "used_area": used_area,
         "dead_space": dead_space,
@@ -173,6 +295,24 @@ def evaluate_placement(placement):
         "aspect_ratio_valid": aspect_ratio <= MAX_ASPECT_RATIO
     }
 
+
+def evaluate_placement(placement):
+    """Compute fitness with aspect ratio constraint."""
+    if not placement:
+        return float("inf"), {}, {}
+
+    max_x = 0.0
+    max_y = 0.0
+
+    # fsum: exact and independent of block order
+    used_area = math.fsum(p["width"] * p["height"] for p in placement.values())
+    for p in placement.values():
+        max_x = max(max_x, p["x_max"])
+        max_y = max(max_y, p["y_max"])
+
+    fitness = placement_cost(max_x, max_y, used_area)
+    metrics = placement_metrics(max_x, max_y, used_area)
+
     return fitness, metrics, {"max_x": max_x, "max_y": max_y}
 
 
@@ -202,54 +342,968 @@ def random_neighbor_state(r_plus, r_minus, var_idx, variants):
     return new_rp, new_rm, new_var_idx
 
 
-def sa_optimize(json_data):
-    """Main optimization entry for n8n."""
-    variants = extract_variants(json_data)
-    if not variants:
-        return {"error": "No block variants found", "success": False}
+def fenwick_paths(n):
+    """
+    Fenwick tree node lists of keys 1..n for decode_batch: query[k] holds
+    the nodes whose maxima cover keys 1..k-1, insert[k] the nodes covering
+    key k, both padded to the tree depth. Query padding is node 0, which
+    always holds 0; insert padding is node n + 1, which is never queried.
+    """
+    depth = max(n.bit_length(), 1)
+    query = np.zeros((n + 1, depth), dtype=np.intp)
+    insert = np.full((n + 1, depth), n + 1, dtype=np.intp)
+    for k in range(1, n + 1):
+        i = k - 1
+        d = 0
+        while i > 0:
+            query[k, d] = i
+            d += 1
+            i &= i - 1
+        i = k
+        d = 0
+        while i <= n:
+            insert[k, d] = i
+            d += 1
+            i += i & -i
+    return query, insert
 
-    block_names = list(variants.keys())
-    r_plus, r_minus = initial_sequence_pair(block_names, json_data)
-    var_idx = initial_variant_indices(variants, json_data)
 
-    placement = decode_sequence_pair(r_plus, r_minus, variants, var_idx)
-    cur_fit, cur_metrics, _ = evaluate_placement(placement)
+def decode_batch(rp, pm, w, h, paths=None):
+    """
+    Vectorized FAST-SP over a batch of K candidate sequence pairs.
+    rp: (K, n) r+ as block ids; pm: (K, n) r- position of each block id;
+    w, h: (K, n) block sizes by id; paths: fenwick_paths(n), if already
+    built. Returns x, y as (K, n) arrays and max_x, max_y as (K,) arrays.
+
+    Rows 0..K-1 are the x pass and rows K..2K-1 the y pass, each with its
+    own prefix-max Fenwick tree (one row of `tree`). The n r+ steps run in
+    Python; a step is one gather of the query nodes of every row, a max
+    over the tree depth and one gather / scatter of the insert nodes, so
+    a batch costs O(K n log n) like the scalar decode.
+    """
+    k, n = rp.shape
+    if paths is None:
+        paths = fenwick_paths(n)
+    query, insert = paths
+
+    # Keys and sizes in r+ order, one row per step
+    keys = np.take_along_axis(pm, rp, axis=1) + 1
+    keys = np.concatenate((keys, n + 1 - keys)).T
+    sizes = np.concatenate((np.take_along_axis(w, rp, axis=1), np.take_along_axis(h, rp, axis=1))).T
+
+    base = (np.arange(2 * k) * (n + 2))[:, None]
+    tree = np.zeros(2 * k * (n + 2))
+    take = tree.take
+    put = tree.put
+    starts = np.empty((n, 2 * k))
+    # Flat node indices are built per chunk of steps to bound their memory
+    chunk = max(1, DECODE_CHUNK // (2 * k))
+    for c in range(0, n, chunk):
+        query_nodes = query[keys[c:c + chunk]] + base
+        insert_nodes = insert[keys[c:c + chunk]] + base
+        for p in range(c, min(c + chunk, n)):
+            start = starts[p]
+            take(query_nodes[p - c]).max(axis=1, out=start)
+            nodes = insert_nodes[p - c]
+            put(nodes, np.maximum(take(nodes), (start + sizes[p])[:, None]))
+
+    coords = np.empty((2 * k, n))
+    np.put_along_axis(coords, np.concatenate((rp, rp)), starts.T, axis=1)
+    ends = (starts + sizes).max(axis=0)
+    return coords[:k], coords[k:], ends[:k], ends[k:]
+
+
+class SequencePairState:
+    """
+    Integer-indexed SA state for the SP hot loop.
+    Block names are compiled to ids 0..n-1 once. Sequences, positions and
+    all variant sizes live in flat array buffers; moves are applied in
+    place and return an undo record, so an iteration allocates nothing.
+
+    After the first full decode() the state is kept decoded incrementally:
+    update(move) re-runs FAST-SP only from the first r+ position the move
+    touches and stops as soon as the longest-path values match the previous
+    state again. The decode buffers are saved with one memcpy per update, so
+    undo(move) restores the previous decode exactly by swapping them back.
+
+    self.key is the Zobrist hash of (r+, r-, variant indices), updated by
+    apply() and undo() for transposition table lookups.
+    """
+
+    def __init__(self, variants, r_plus, r_minus, var_idx):
+        self.names = list(variants.keys())
+        ids = {name: i for i, name in enumerate(self.names)}
+        n = self.n = len(self.names)
+
+        # Block i owns variants var_off[i]:var_off[i + 1]
+        self.var_off = array("i", [0])
+        self.var_w = array("d")
+        self.var_h = array("d")
+        for name in self.names:
+            for v in variants[name]:
+                self.var_w.append(v["width"])
+                self.var_h.append(v["height"])
+            self.var_off.append(len(self.var_w))
+
+        self.vidx = array("i", [0]) * n
+        self.w = array("d", [0.0]) * n
+        self.h = array("d", [0.0]) * n
+        self.area = array("d", [0.0]) * n
+        for b, name in enumerate(self.names):
+            self._set_variant(b, var_idx.get(name, 0))
+
+        self.rp = array("i", [ids[name] for name in r_plus])
+        self.rm = array("i", [ids[name] for name in r_minus])
+        self.pp = array("i", [0]) * n
+        self.pm = array("i", [0]) * n
+        for i in range(n):
+            self.pp[self.rp[i]] = i
+            self.pm[self.rm[i]] = i
+
+        self.x = array("d", [0.0]) * n
+        self.y = array("d", [0.0]) * n
+        self._zero = array("d", [0.0]) * (n + 1)
+        self._fx = array("d", self._zero)
+        self._fy = array("d", self._zero)
+        # Block end (coord + size) stored at each Fenwick key by the last decode
+        self._ex = array("d", self._zero)
+        self._ey = array("d", self._zero)
+
+        # Max segment trees over block ids: root [1] is max_x / max_y
+        self._size = 1 << max(n - 1, 0).bit_length()
+        self._tx = array("d", [0.0]) * (2 * self._size)
+        self._ty = array("d", [0.0]) * (2 * self._size)
+        self.used_area = 0.0
+
+        # Shadow copies of the decode buffers taken by update() for undo()
+        self._saved = [array("d", buf) for buf in self._decode_buffers()]
+        self._saved_used_area = 0.0
+        self._fenwick_paths = None  # decode_batch node lists, built on first use
+        self.key = self._state_key()
+
+    def _state_key(self):
+        key = 0
+        for i in range(self.n):
+            key ^= zobrist(0, i, self.rp[i]) ^ zobrist(1, i, self.rm[i]) ^ zobrist(2, i, self.vidx[i])
+        return key
+
+    def _key_change(self, move):
+        """XOR that turns self.key into the key after move (or its undo record)"""
+        move_type, a, b = move
+        if move_type == 2:
+            return zobrist(2, a, self.vidx[a]) ^ zobrist(2, a, b)
+        seq = self.rp if move_type == 0 else self.rm
+        x = seq[a]
+        y = seq[b]
+        return zobrist(move_type, a, x) ^ zobrist(move_type, b, y) ^ zobrist(move_type, a, y) ^ zobrist(move_type, b, x)
+
+    def _set_variant(self, b, k):
+        self.vidx[b] = k
+        self.w[b] = self.var_w[self.var_off[b] + k]
+        self.h[b] = self.var_h[self.var_off[b] + k]
+        self.area[b] = self.w[b] * self.h[b]
+
+    @staticmethod
+    def _swap(seq, pos, i, j):
+        a = seq[i]
+        b = seq[j]
+        seq[i] = b
+        seq[j] = a
+        pos[a] = j
+        pos[b] = i
+
+    def _decode_buffers(self):
+        return [self.x, self.y, self._ex, self._ey, self._tx, self._ty]
+
+    def propose(self):
+        """
+        Draw a random_neighbor_state move (same move mix and random stream)
+        without applying it: (0, i, j) / (1, i, j) swap r+ / r- positions,
+        (2, block, variant) selects a variant.
+        """
+        n = self.n
+        move_type = random.randint(0, 2)
+
+        if move_type == 0 and n > 1:
+            i, j = random.sample(range(n), 2)
+            return (0, i, j)
+        if move_type == 1 and n > 1:
+            i, j = random.sample(range(n), 2)
+            return (1, i, j)
+
+        b = random.randrange(n)
+        old = self.vidx[b]
+        n_var = self.var_off[b + 1] - self.var_off[b]
+        if n_var > 1:
+            k = random.randrange(n_var - 1)
+            return (2, b, k + 1 if k >= old else k)
+        return (2, b, old)
+
+    def apply(self, move):
+        """Apply a propose() move in place. Returns the undo record."""
+        self.key ^= self._key_change(move)
+        move_type, a, b = move
+        if move_type == 0:
+            self._swap(self.rp, self.pp, a, b)
+            return move
+        if move_type == 1:
+            self._swap(self.rm, self.pm, a, b)
+            return move
+        old = self.vidx[a]
+        self._set_variant(a, b)
+        return (2, a, old)
+
+    def random_move(self):
+        """Apply a random move in place. Returns the undo record (move_type, a, b)."""
+        return self.apply(self.propose())
+
+    def _move_span(self, move):
+        """
+        (start, horizon) in r+ for a move: blocks before start keep their
+        coordinates, and no block after horizon changed its key or size.
+        """
+        move_type, a, b = move
+        if move_type == 0:
+            return min(a, b), max(a, b)
+        if move_type == 1:
+            pa = self.pp[self.rm[a]]
+            pb = self.pp[self.rm[b]]
+            return min(pa, pb), max(pa, pb)
+        if self.vidx[a] == b:
+            return self.n, self.n
+        p = self.pp[a]
+        return p, p
 
-    best_rp = list(r_plus)
-    best_rm = list(r_minus)
-    best_var_idx = dict(var_idx)
+    def decode(self):
+        """Full FAST-SP decode; rebuilds every incremental buffer."""
+        n = self.n
+        pm = self.pm
+        w = self.w
+        h = self.h
+        x = self.x
+        y = self.y
+        ex = self._ex
+        ey = self._ey
+        fx = self._fx
+        fy = self._fy
+        fx[:] = self._zero
+        fy[:] = self._zero
+        size = self._size
+        tx = self._tx
+        ty = self._ty
+
+        for b in self.rp:
+            # x: prefix max over blocks before b in r-
+            k = pm[b] + 1
+            best = 0.0
+            i = k - 1
+            while i > 0:
+                if fx[i] > best:
+                    best = fx[i]
+                i -= i & -i
+            x[b] = best
+            end = ex[k] = tx[size + b] = best + w[b]
+            i = k
+            while i <= n:
+                if fx[i] < end:
+                    fx[i] = end
+                i += i & -i
+
+            # y: prefix max over blocks after b in r-
+            k = n - pm[b]
+            best = 0.0
+            i = k - 1
+            while i > 0:
+                if fy[i] > best:
+                    best = fy[i]
+                i -= i & -i
+            y[b] = best
+            end = ey[k] = ty[size + b] = best + h[b]
+            i = k
+            while i <= n:
+                if fy[i] < end:
+                    fy[i] = end
+                i += i & -i
+
+        # Bounding box: max trees over the block ends written above
+        for i in range(size - 1, 0, -1):
+            tx[i] = tx[2 * i] if tx[2 * i] > tx[2 * i + 1] else tx[2 * i + 1]
+            ty[i] = ty[2 * i] if ty[2 * i] > ty[2 * i + 1] else ty[2 * i + 1]
+
+        self.used_area = math.fsum(self.area)
+
+    def update(self, move, threshold=math.inf):
+        """
+        Incrementally re-decode after random_move(). Only r+ positions from
+        the move's start are revisited; past the move's horizon the pass
+        stops as soon as every key value written so far equals the previous
+        decode, since the rest of both longest-path passes is then unchanged.
+        max_x / max_y follow through point updates of the max trees and
+        used_area is only recomputed for variant moves.
+
+        Blocks keep their coordinates once placed, so the bounding box of
+        the blocks decoded so far bounds the fitness from below. With a
+        threshold the pass is abandoned, returning False, as soon as that
+        bound reaches it; the move must then be undone. Returns True when
+        the state was fully decoded.
+        """
+        for saved, buf in zip(self._saved, self._decode_buffers()):
+            saved[:] = buf
+        self._saved_used_area = self.used_area
+
+        start, horizon = self._move_span(move)
+        n = self.n
+        if start >= n:
+            return True
+
+        rp = self.rp
+        pm = self.pm
+        w = self.w
+        h = self.h
+        x = self.x
+        y = self.y
+        ex = self._ex
+        ey = self._ey
+        fx = self._fx
+        fy = self._fy
+        tx = self._tx
+        ty = self._ty
+        size = self._size
+
+        # Fenwick trees holding only the unchanged prefix, built in O(n)
+        fx[:] = self._zero
+        fy[:] = self._zero
+        low_x = low_y = 0.0
+        for p in range(start):
+            b = rp[p]
+            k = pm[b] + 1
+            fx[k] = ex[k]
+            if ex[k] > low_x:
+                low_x = ex[k]
+            k = n - pm[b]
+            fy[k] = ey[k]
+            if ey[k] > low_y:
+                low_y = ey[k]
+        for i in range(1, n):
+            j = i + (i & -i)
+            if j <= n:
+                if fx[j] < fx[i]:
+                    fx[j] = fx[i]
+                if fy[j] < fy[i]:
+                    fy[j] = fy[i]
+
+        resized = -1
+        if move[0] == 2:
+            # size changed: its leaves move even if the coordinates do not
+            resized = move[1]
+            self.used_area = math.fsum(self.area)
+        limit = area_limit(threshold, self.used_area)
+
+        dirty = 0
+        for p in range(start, n):
+            b = rp[p]
+
+            k = pm[b] + 1
+            best = 0.0
+            i = k - 1
+            while i > 0:
+                if fx[i] > best:
+                    best = fx[i]
+                i -= i & -i
+            nx = best
+            end = best + w[b]
+            if ex[k] != end:
+                ex[k] = end
+                dirty += 1
+            if end > low_x:
+                low_x = end
+                if low_x * low_y > limit:
+                    return False
+            i = k
+            while i <= n:
+                if fx[i] < end:
+                    fx[i] = end
+                i += i & -i
+
+            k = n - pm[b]
+            best = 0.0
+            i = k - 1
+            while i > 0:
+                if fy[i] > best:
+                    best = fy[i]
+                i -= i & -i
+            ny = best
+            end = best + h[b]
+            if ey[k] != end:
+                ey[k] = end
+                dirty += 1
+            if end > low_y:
+                low_y = end
+                if low_x * low_y > limit:
+                    return False
+            i = k
+            while i <= n:
+                if fy[i] < end:
+                    fy[i] = end
+                i += i & -i
+
+            if nx != x[b] or b == resized:
+                x[b] = nx
+                # max tree point update, stops at the first unchanged ancestor
+                i = size + b
+                tx[i] = nx + w[b]
+                i >>= 1
+                while i:
+                    m = tx[2 * i] if tx[2 * i] > tx[2 * i + 1] else tx[2 * i + 1]
+                    if tx[i] == m:
+                        break
+                    tx[i] = m
+                    i >>= 1
+            if ny != y[b] or b == resized:
+                y[b] = ny
+                i = size + b
+                ty[i] = ny + h[b]
+                i >>= 1
+                while i:
+                    m = ty[2 * i] if ty[2 * i] > ty[2 * i + 1] else ty[2 * i + 1]
+                    if ty[i] == m:
+                        break
+                    ty[i] = m
+                    i >>= 1
+
+            if p >= horizon and not dirty:
+                break
+        return True
+
+    def undo(self, move):
+        """Revert a move and the incremental decode done for it by update()."""
+        self.key ^= self._key_change(move)
+        move_type, a, b = move
+        if move_type == 0:
+            self._swap(self.rp, self.pp, a, b)
+        elif move_type == 1:
+            self._swap(self.rm, self.pm, a, b)
+        else:
+            self._set_variant(a, b)
+
+        saved = self._saved
+        self._saved = self._decode_buffers()
+        self.x, self.y, self._ex, self._ey, self._tx, self._ty = saved
+        self.used_area = self._saved_used_area
+
+    def evaluate_batch(self, moves):
+        """
+        Fitness of every propose() move applied to the current state,
+        decoded together by decode_batch. The state is not modified and
+        the values equal apply() + update() + evaluate() per move.
+        """
+        k = len(moves)
+        rp = np.tile(np.frombuffer(self.rp, dtype=np.intc), (k, 1))
+        pm = np.tile(np.frombuffer(self.pm, dtype=np.intc), (k, 1))
+        w = np.tile(np.frombuffer(self.w, dtype=np.float64), (k, 1))
+        h = np.tile(np.frombuffer(self.h, dtype=np.float64), (k, 1))
+        used_area = [self.used_area] * k
+
+        for r, (move_type, a, b) in enumerate(moves):
+            if move_type == 0:
+                rp[r, a] = self.rp[b]
+                rp[r, b] = self.rp[a]
+            elif move_type == 1:
+                pm[r, self.rm[a]] = b
+                pm[r, self.rm[b]] = a
+            elif b != self.vidx[a]:
+                w[r, a] = self.var_w[self.var_off[a] + b]
+                h[r, a] = self.var_h[self.var_off[a] + b]
+                used_area[r] = math.fsum((w[r] * h[r]).tolist())
+
+        if self._fenwick_paths is None:
+            self._fenwick_paths = fenwick_paths(self.n)
+        max_x, max_y = decode_batch(rp, pm, w, h, self._fenwick_paths)[2:]
+        max_x = max_x.tolist()
+        max_y = max_y.tolist()
+        return [placement_cost(max_x[r], max_y[r], used_area[r]) for r in range(k)]
+
+    def bounds(self):
+        """(max_x, max_y, used_area) of the decoded state, O(1)."""
+        return self._tx[1], self._ty[1], self.used_area
+
+    def evaluate(self):
+        """Fitness of the decoded state."""
+        return placement_cost(self._tx[1], self._ty[1], self.used_area)
+
+    def snapshot(self):
+        return array("i", self.rp), array("i", self.rm), array("i", self.vidx)
+
+    def restore(self, snap):
+        """Load a snapshot; call decode() before evaluating it."""
+        rp, rm, vidx = snap
+        self.rp[:] = rp
+        self.rm[:] = rm
+        for i in range(self.n):
+            self.pp[self.rp[i]] = i
+            self.pm[self.rm[i]] = i
+        for b in range(self.n):
+            self._set_variant(b, vidx[b])
+        self.key = self._state_key()
+
+    def export(self, snap=None):
+        """(r_plus, r_minus, var_idx) with block names for a snapshot (default: current state)."""
+        rp, rm, vidx = snap if snap is not None else self.snapshot()
+        names = self.names
+        return ([names[b] for b in rp], [names[b] for b in rm],
+                {names[b]: vidx[b] for b in range(self.n)})
+
+    def sequences(self):
+        names = self.names
+        return [names[b] for b in self.rp], [names[b] for b in self.rm]
+
+    def placement(self):
+        """Decoded state as a decode_sequence_pair-style dict."""
+        placement = {}
+        for b in self.rp:
+            x = self.x[b]
+            y = self.y[b]
+            w = self.w[b]
+            h = self.h[b]
+            placement[self.names[b]] = {
+                "x_min": x,
+                "y_min": y,
+                "width": w,
+                "height": h,
+                "x_max": x + w,
+                "y_max": y + h
+            }
+        return placement
+
+
+def _sa_settings(json_data):
+    """Per-run overrides from json_data["sa_settings"]."""
+    settings = json_data.get("sa_settings")
+    return settings if isinstance(settings, dict) else {}
+
+
+def initial_temperature(state, moves=CALIBRATION_MOVES):
+    """
+    Calibrated initial temperature from the cost deltas of random moves
+    around the decoded state (left unchanged), INITIAL_TEMP when no sampled
+    move was uphill.
+    """
+    cur_fit = state.evaluate()
+    deltas = []
+    for _ in range(moves):
+        move = state.random_move()
+        state.update(move)
+        deltas.append(state.evaluate() - cur_fit)
+        state.undo(move)
+    return calibrate_temperature(deltas) or INITIAL_TEMP
+
+
+def run_length():
+    """Iterations of an adaptive run: as many as the fixed INITIAL_TEMP -> FINAL_TEMP schedule"""
+    return schedule_length(INITIAL_TEMP, FINAL_TEMP, COOLING_RATE, MAX_ITERATIONS)
+
+
+def anneal(state, T=INITIAL_TEMP, max_iterations=MAX_ITERATIONS, final_temp=FINAL_TEMP, trace=None,
+           schedule=None, table=None):
+    """
+    One SA chain on a decoded state, cooling from T until final_temp or
+    max_iterations. The state is left at the chain's current solution.
+    Every trace.sample-th iteration is recorded when a TraceWriter is given.
+    With a schedule (Deadline or AdaptiveSchedule) the cooling factor comes
+    from the schedule, and the chain stops when the schedule says so.
+
+    The Metropolis draw comes before the decode: u turns into the highest
+    acceptable fitness cur_fit - T * ln(u), and update() gives up on a
+    candidate as soon as its partial bounding box exceeds that. Decisions
+    are those of delta < 0 or u < exp(-delta / T).
+    With a TranspositionTable, candidates whose stored fitness (or lower
+    bound) is not below the threshold are rejected without a decode.
+    Returns (best, best_fit, iterations, accepted_moves, cur_fit, T).
+    """
+    cur_fit = state.evaluate()
+
+    best = state.snapshot()
     best_fit = cur_fit
-    best_metrics = cur_metrics
-    best_placement = placement
 
-    T = INITIAL_TEMP
     iterations = 0
     accepted_moves = 0
+    last_improvement = 0
+    cooling = COOLING_RATE
 
-    while T > FINAL_TEMP and iterations < MAX_ITERATIONS:
-        rpn, rmn, vin = random_neighbor_state(r_plus, r_minus, var_idx, variants)
-        pl_n = decode_sequence_pair(rpn, rmn, variants, vin)
-        fit_n, met_n, _ = evaluate_placement(pl_n)
+    while T > final_temp and iterations < max_iterations:
+        if schedule is not None and iterations % CHECK_INTERVAL == 0:
+            cooling = schedule.cooling(T, iterations, accepted_moves, last_improvement)
+            if cooling is None:
+                break
 
-        delta = fit_n - cur_fit
-        accept = delta < 0 or (T > 0 and random.random() < math.exp(-delta / T))
+        move = state.random_move()
+        # 1 - random() is in (0, 1]: u == 1 only accepts improvements
+        threshold = cur_fit - T * math.log(1.0 - random.random()) if T > 0 else cur_fit
+        if table is not None and table.rejects(table.get(state.key), threshold):
+            # Revert the sequences only, the decode still matches the current state
+            state.apply(move)
+            accept = False
+        else:
+            complete = state.update(move, threshold)
+            fit_n = state.evaluate() if complete else threshold
+            accept = fit_n < threshold
+            if table is not None:
+                table.put(state.key, fit_n, complete)
+            if not accept:
+                state.undo(move)
 
         if accept:
-            r_plus, r_minus, var_idx = rpn, rmn, vin
-            cur_fit, cur_metrics = fit_n, met_n
-            placement = pl_n
+            cur_fit = fit_n
             accepted_moves += 1
 
             if fit_n < best_fit:
                 best_fit = fit_n
-                best_metrics = met_n
-                best_rp = list(rpn)
-                best_rm = list(rmn)
-                best_var_idx = dict(vin)
-                best_placement = pl_n
+                best = state.snapshot()
+                last_improvement = iterations
+
+        if trace is not None and iterations % trace.sample == 0:
+            trace.record(iterations, T, cur_fit, best_fit, move[0], accept)
 
         iterations += 1
-        T *= COOLING_RATE
+        T *= cooling
+
+    return best, best_fit, iterations, accepted_moves, cur_fit, T
+
+
+def anneal_batched(state, batch_size, acceptance=BATCH_ACCEPTANCE, T=INITIAL_TEMP,
+                   max_iterations=MAX_ITERATIONS, final_temp=FINAL_TEMP, trace=None, schedule=None):
+    """
+    SA chain that proposes up to batch_size moves per step and scores them
+    with one evaluate_batch call.
+      "best":       Metropolis test on the best candidate of the batch
+      "metropolis": first candidate (in proposal order) passing its own
+                    Metropolis test, i.e. sequential SA that discards the
+                    proposals drawn after an acceptance
+    Iterations count the candidates the chain considered: the whole batch
+    in "best" mode, in "metropolis" mode the ones up to and including the
+    accepted one. The temperature drops by COOLING_RATE per iteration, so
+    the schedule matches anneal(). Metropolis batches are sized to the
+    expected run of rejections at the current acceptance rate, and below
+    BATCH_MIN the chain decodes single moves incrementally like anneal().
+    Traces record the candidates that went through a Metropolis test.
+    Same arguments and return value as anneal().
+    """
+    cur_fit = state.evaluate()
+
+    best = state.snapshot()
+    best_fit = cur_fit
+
+    iterations = 0
+    accepted_moves = 0
+    last_improvement = 0
+    cooling = COOLING_RATE
+    rate = 1.0  # Acceptance rate over the last LAM_MEMORY considered candidates
+
+    while T > final_temp and iterations < max_iterations:
+        if schedule is not None:
+            cooling = schedule.cooling(T, iterations, accepted_moves, last_improvement)
+            if cooling is None:
+                break
+
+        k = min(batch_size, max_iterations - iterations)
+        if acceptance != "best":
+            k = min(k, int(1.0 / max(rate, 1.0 / k)))
+
+        if k < BATCH_MIN and acceptance != "best":
+            move = state.random_move()
+            threshold = cur_fit - T * math.log(1.0 - random.random()) if T > 0 else cur_fit
+            complete = state.update(move, threshold)
+            fit = state.evaluate() if complete else threshold
+            accept = fit < threshold
+            if not accept:
+                state.undo(move)
+            if trace is not None and iterations % trace.sample == 0:
+                trace.record(iterations, T, fit if accept else cur_fit,
+                             min(best_fit, fit) if accept else best_fit, move[0], accept)
+            considered = 1
+        else:
+            moves = [state.propose() for _ in range(k)]
+            fits = state.evaluate_batch(moves)
+            order = [min(range(k), key=fits.__getitem__)] if acceptance == "best" else range(k)
+
+            accept = False
+            considered = k
+            for r in order:
+                # 1 - random() is in (0, 1]: u == 1 only accepts improvements
+                fit = fits[r]
+                accept = fit < (cur_fit - T * math.log(1.0 - random.random()) if T > 0 else cur_fit)
+                if trace is not None and (iterations + r) % trace.sample == 0:
+                    trace.record(iterations + r, T, fit if accept else cur_fit,
+                                 min(best_fit, fit) if accept else best_fit, moves[r][0], accept)
+                if accept:
+                    state.update(state.apply(moves[r]))
+                    if acceptance != "best":
+                        considered = r + 1
+                    break
+
+        if accept:
+            cur_fit = fit
+            accepted_moves += 1
+
+            if cur_fit < best_fit:
+                best_fit = cur_fit
+                best = state.snapshot()
+                last_improvement = iterations
+
+        rate += (accept / considered - rate) * min(1.0, considered / LAM_MEMORY)
+        iterations += considered
+        T *= cooling ** considered
+
+    return best, best_fit, iterations, accepted_moves, cur_fit, T
+
+
+def _run_chain(job):
+    """
+    Process-pool entry point: anneal from plain, picklable data.
+    job = (variants, start, seed, T, max_iterations, final_temp, batch_size, acceptance, time_budget,
+           adaptive, table_size) with start = (r_plus, r_minus, var_idx) as block names.
+    """
+    (variants, start, seed, T, max_iterations, final_temp, batch_size, acceptance, time_budget,
+     adaptive, table_size) = job
+    random.seed(seed)
+
+    state = SequencePairState(variants, *start)
+    state.decode()
+    deadline = Deadline(time_budget, final_temp, chain_stop()) if time_budget else None
+    schedule = AdaptiveSchedule(T, final_temp, max_iterations, deadline) if adaptive else deadline
+    if deadline is not None:
+        max_iterations = sys.maxsize
+    table = TranspositionTable(table_size) if table_size > 0 and batch_size == 1 else None
+    if batch_size > 1:
+        run = anneal_batched(state, batch_size, acceptance, T, max_iterations, final_temp, schedule=schedule)
+    else:
+        run = anneal(state, T, max_iterations, final_temp, schedule=schedule, table=table)
+    best, best_fit, iterations, accepted_moves, cur_fit, T = run
+
+    return {
+        "best": state.export(best),
+        "best_fitness": best_fit,
+        "current": state.export(),
+        "current_fitness": cur_fit,
+        "iterations": iterations,
+        "accepted_moves": accepted_moves,
+        "temperature": T,
+        "warmup_rate": deadline.warmup_rate if deadline is not None else None,
+        "schedule": schedule.stats() if adaptive else None,
+        "transposition": table.stats() if table is not None else None
+    }
+
+
+def run_chains(variants, start, settings, initial_temp=INITIAL_TEMP):
+    """
+    Run sa_settings.chains annealing chains on a ProcessPoolExecutor and keep
+    the best one, all inside this process invocation.
+
+    Independent chains are plain multi-start runs with their own seeds. With
+    sa_settings.replica_exchange the chains form a temperature ladder
+    (chain r runs at T * LADDER_RATIO**r) that cools together; every
+    EXCHANGE_INTERVAL iterations neighbouring chains swap solutions with
+    probability min(1, exp((E_r - E_r+1) * (1/T_r - 1/T_r+1))).
+
+    With sa_settings.time_budget independent chains share the remaining
+    budget (chains run in waves of `workers`); replica exchange keeps its schedule and starts no
+    further rounds once the budget is spent. SIGTERM stops the chains, which
+    return their best so far (replica exchange after the current round).
+
+    With sa_settings.auto_schedule independent chains run the adaptive
+    schedule from initial_temp; the replica ladder starts at initial_temp
+    and keeps the geometric cooling, its final temperature scaled to match.
+
+    Returns (best_start, best_fit, stats).
+    """
+    chains = int(settings.get("chains", CHAINS))
+    workers = int(settings.get("workers") or min(chains, os.cpu_count() or 1))
+    batch_size = int(settings.get("batch_size", BATCH_SIZE))
+    acceptance = settings.get("batch_acceptance", BATCH_ACCEPTANCE)
+    rng = random.Random(settings.get("seed"))
+    time_budget = float(settings.get("time_budget", TIME_BUDGET) or 0)
+    adaptive = bool(settings.get("auto_schedule", AUTO_SCHEDULE))
+    table_size = int(settings.get("transposition_cache", TRANSPOSITION_CACHE) or 0)
+    final_temp = FINAL_TEMP * initial_temp / INITIAL_TEMP if adaptive else FINAL_TEMP
+    deadline = Deadline(time_budget, final_temp, multiprocessing.Event()) if time_budget > 0 else None
+    stop = deadline.stop if deadline is not None else None
+
+    def job(chain_start, T, max_iterations, final_temp, time_budget=0.0, adaptive=False):
+        return (variants, chain_start, rng.getrandbits(32), T, max_iterations, final_temp,
+                batch_size, acceptance, time_budget, adaptive, table_size)
+
+    with deadline.signals() if deadline is not None else nullcontext(), \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_chain_process, initargs=(stop,)) as pool:
+        if not settings.get("replica_exchange"):
+            # Chains beyond the worker count run in later waves: split the budget between waves
+            waves = -(-chains // workers)
+            remaining = max(deadline.end - time.perf_counter(), 0.001) / waves if deadline else 0.0
+            max_iterations = run_length() if adaptive else MAX_ITERATIONS
+            jobs = [job(start, initial_temp, max_iterations, final_temp, remaining, adaptive) for _ in range(chains)]
+            runs = list(pool.map(_run_chain, jobs))
+            winner = min(runs, key=lambda run: run["best_fitness"])
+            stats = {
+                "actual_iterations": winner["iterations"],
+                "accepted_moves": winner["accepted_moves"],
+                "total_iterations": sum(run["iterations"] for run in runs),
+                "chain_fitness": [round(run["best_fitness"], 2) for run in runs]
+            }
+            if adaptive:
+                stats["schedule"] = winner["schedule"]
+            if winner["transposition"] is not None:
+                stats["transposition"] = winner["transposition"]
+            if deadline is not None:
+                rates = [run["warmup_rate"] for run in runs if run["warmup_rate"]]
+                deadline.warmup_rate = sum(rates) / len(rates) if rates else None
+                deadline.stop_requested()
+                stats["time_budget"] = deadline.stats()
+            return winner["best"], winner["best_fitness"], stats
+
+        interval = int(settings.get("exchange_interval", EXCHANGE_INTERVAL))
+        ratio = float(settings.get("ladder_ratio", LADDER_RATIO))
+        ladder = [ratio ** r for r in range(chains)]
+        slots = [start] * chains
+        energies = [0.0] * chains
+        best_start, best_fit = start, float("inf")
+
+        T = initial_temp
+        iterations = 0
+        accepted_moves = 0
+        attempts = 0
+        swaps = 0
+        rounds = 0
+        tables = []
+        while T > final_temp and iterations < MAX_ITERATIONS:
+            if deadline is not None and deadline.expired():
+                break
+            segment = min(interval, MAX_ITERATIONS - iterations)
+            jobs = [job(slots[r], T * ladder[r], segment, final_temp * ladder[r])
+                    for r in range(chains)]
+            runs = list(pool.map(_run_chain, jobs))
+
+            for r, run in enumerate(runs):
+                slots[r] = run["current"]
+                energies[r] = run["current_fitness"]
+                accepted_moves += run["accepted_moves"]
+                tables.append(run["transposition"])
+                if run["best_fitness"] < best_fit:
+                    best_start, best_fit = run["best"], run["best_fitness"]
+            iterations += runs[0]["iterations"]
+            T = runs[0]["temperature"]
+            if deadline is not None:
+                deadline.measure(iterations)
+
+            # alternate even / odd neighbour pairs between rounds
+            for r in range(rounds % 2, chains - 1, 2):
+                attempts += 1
+                a = (energies[r] - energies[r + 1]) * (1.0 / (T * ladder[r]) - 1.0 / (T * ladder[r + 1]))
+                if a >= 0 or rng.random() < math.exp(a):
+                    slots[r], slots[r + 1] = slots[r + 1], slots[r]
+                    energies[r], energies[r + 1] = energies[r + 1], energies[r]
+                    swaps += 1
+            rounds += 1
+
+    stats = {
+        "actual_iterations": iterations * chains,
+        "accepted_moves": accepted_moves,
+        "iterations_per_chain": iterations,
+        "replica_exchange": True,
+        "exchange_attempts": attempts,
+        "exchange_accepts": swaps
+    }
+    if adaptive:
+        stats["schedule"] = {"initial_temp": round(initial_temp, 6)}
+    if merge_stats(tables) is not None:
+        stats["transposition"] = merge_stats(tables)
+    if deadline is not None:
+        deadline.stop_requested()
+        stats["time_budget"] = deadline.stats()
+    return best_start, best_fit, stats
+
+
+def sa_optimize(json_data):
+    """Main optimization entry for n8n."""
+    variants = extract_variants(json_data)
+    if not variants:
+        return {"error": "No block variants found", "success": False}
+
+    settings = _sa_settings(json_data)
+    chains = int(settings.get("chains", CHAINS))
+    batch_size = int(settings.get("batch_size", BATCH_SIZE))
+    acceptance = settings.get("batch_acceptance", BATCH_ACCEPTANCE)
+    time_budget = float(settings.get("time_budget", TIME_BUDGET) or 0)
+    adaptive = bool(settings.get("auto_schedule", AUTO_SCHEDULE))
+    table_size = int(settings.get("transposition_cache", TRANSPOSITION_CACHE) or 0)
+
+    block_names = list(variants.keys())
+    r_plus, r_minus = initial_sequence_pair(block_names, json_data)
+    var_idx = initial_variant_indices(variants, json_data)
+
+    # Seeded runs are reproducible: reuse a stored result for the same inputs
+    cache = key = None
+    if cache_enabled(settings):
+        cache = ResultCache()
+        key = cache_key({
+            "optimizer": "sa_optimize",
+            "source": source_digest(__file__, sa_schedule.__file__, transposition.__file__),
+            "constants": module_constants(globals()),
+            "variants": variants,
+            "start": [r_plus, r_minus, var_idx],
+            "settings": run_settings(settings),
+        })
+        cached = cache.get(key)
+        if cached is not None:
+            result = dict(json_data)
+            result.update(cached)
+            result["optimization_results"]["cache_hit"] = True
+            return result
+
+    if settings.get("seed") is not None:
+        random.seed(settings["seed"])
+    state = SequencePairState(variants, r_plus, r_minus, var_idx)
+    state.decode()
+    T = initial_temperature(state) if adaptive else INITIAL_TEMP
+    # The adaptive schedule keeps the fixed schedule's final / initial temperature ratio
+    final_temp = FINAL_TEMP * T / INITIAL_TEMP if adaptive else FINAL_TEMP
+
+    if chains > 1:
+        best_start, best_fit, stats = run_chains(variants, (r_plus, r_minus, var_idx), settings, T)
+        state = SequencePairState(variants, *best_start)
+    else:
+        trace = trace_from_settings(settings, "sa_optimize", MOVE_NAMES)
+        # Time-budgeted runs stop on the deadline instead of MAX_ITERATIONS
+        deadline = Deadline(time_budget, final_temp) if time_budget > 0 else None
+        max_iterations = run_length() if adaptive else MAX_ITERATIONS
+        schedule = AdaptiveSchedule(T, final_temp, max_iterations, deadline) if adaptive else deadline
+        if deadline is not None:
+            max_iterations = sys.maxsize
+        table = TranspositionTable(table_size) if table_size > 0 and batch_size == 1 else None
+        try:
+            with deadline.signals() if deadline is not None else nullcontext():
+                if batch_size > 1:
+                    run = anneal_batched(state, batch_size, acceptance, T, max_iterations, final_temp,
+                                         trace=trace, schedule=schedule)
+                else:
+                    run = anneal(state, T, max_iterations, final_temp, trace=trace, schedule=schedule,
+                                 table=table)
+        finally:
+            trace_summary = trace.close() if trace is not None else None
+        best, best_fit, iterations, accepted_moves = run[:4]
+        state.restore(best)
+        stats = {"actual_iterations": iterations, "accepted_moves": accepted_moves}
+        if trace_summary is not None:
+            stats["trace"] = trace_summary
+        if adaptive:
+            stats["schedule"] = schedule.stats()
+        if table is not None:
+            stats["transposition"] = table.stats()
+        if deadline is not None:
+            stats["time_budget"] = deadline.stats()
+
+    state.decode()
+    best_rp, best_rm = state.sequences()
+    best_metrics = placement_metrics(*state.bounds())
+    best_placement = state.placement()
 
     # Build UTF-8 safe output
     placement_out = {}
@@ -281,14 +1335,35 @@ def sa_optimize(json_data):
         "max_aspect_ratio": MAX_ASPECT_RATIO,
         "placement_width": round(best_metrics["placement_width"], 2),
         "placement_height": round(best_metrics["placement_height"], 2),
-        "actual_iterations": iterations,
-        "accepted_moves": accepted_moves,
-        "acceptance_rate": round(accepted_moves / iterations * 100, 2) if iterations > 0 else 0,
+        "actual_iterations": stats["actual_iterations"],
+        "accepted_moves": stats["accepted_moves"],
+        "acceptance_rate": round(stats["accepted_moves"] / stats["actual_iterations"] * 100, 2)
+        if stats["actual_iterations"] > 0 else 0,
         "optimization_method": "simulated_annealing_sequence_pair"
     }
+    if chains > 1:
+        result["optimization_results"]["chains"] = chains
+        result["optimization_results"].update(
+            (key, value) for key, value in stats.items()
+            if key not in ("actual_iterations", "accepted_moves"))
+    if batch_size > 1:
+        result["optimization_results"]["batch_size"] = batch_size
+        result["optimization_results"]["batch_acceptance"] = acceptance
+    if "trace" in stats:
+        result["optimization_results"]["trace"] = stats["trace"]
+    if "time_budget" in stats:
+        result["optimization_results"]["time_budget"] = stats["time_budget"]
+    if "schedule" in stats:
+        result["optimization_results"]["schedule"] = stats["schedule"]
+    if "transposition" in stats:
+        result["optimization_results"]["transposition"] = stats["transposition"]
+
+    if cache is not None:
+        cache.put(key, {"sequence_pair": result["sequence_pair"],
+                        "optimization_results": result["optimization_results"]})
+    result["optimization_results"]["cache_hit"] = False
 
-    # Ensure UTF-8 encoding
-    return json.loads(json.dumps(result, ensure_ascii=False))
+    return result
 
 
 if __name__ == "__main__":
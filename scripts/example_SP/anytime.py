@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Wall-clock budget for the annealers (sa_settings.time_budget, seconds)
+A Deadline replaces the fixed MAX_ITERATIONS / COOLING_RATE schedule: the
+first WARMUP_FRACTION of the budget runs at the initial temperature and
+measures the machine's iteration throughput, after which the cooling factor
+is derived every CHECK_INTERVAL iterations from the measured throughput and
+the time left, so the temperature reaches final_temp as the budget runs out.
+
+The annealing loop stops at the deadline or when SIGTERM arrives and returns
+its best solution so far. Chains on a process pool share the run's stop
+event: SIGTERM to the parent or to any chain process stops all of them.
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+WARMUP_FRACTION = 0.05  # Share of the budget spent measuring throughput at the initial temperature
+CHECK_INTERVAL = 64  # Iterations between clock checks
+
+# Stop event of the run in a chain process, set by init_chain_process
+_chain_stop = None
+
+
+def init_chain_process(stop):
+    """Process-pool initializer: keep the run's stop event and set it on SIGTERM"""
+    global _chain_stop
+    _chain_stop = stop
+    if stop is not None:
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+
+def chain_stop():
+    """The run's stop event inside a chain process, None elsewhere"""
+    return _chain_stop
+
+
+class Deadline:
+    """
+    Time budget of one annealing run; stop is an optional
+    multiprocessing.Event shared with the run's chain processes
+    """
+
+    def __init__(self, seconds, final_temp, stop=None):
+        self.seconds = float(seconds)
+        self.final_temp = final_temp
+        self.stop = stop
+        self.start = time.perf_counter()
+        self.end = self.start + self.seconds
+        self.warmup_end = self.start + self.seconds * WARMUP_FRACTION
+        self.warmup_rate = None
+        self.interrupted = False
+        self.reason = "schedule"
+
+    def _stopped(self):
+        if not self.interrupted and self.stop is not None and self.stop.is_set():
+            self.interrupted = True
+        return self.interrupted
+
+    def expired(self):
+        return self._stopped() or time.perf_counter() >= self.end
+
+    def progress(self):
+        """Share of the budget used so far"""
+        return min((time.perf_counter() - self.start) / self.seconds, 1.0) if self.seconds > 0 else 1.0
+
+    def stop_requested(self):
+        """True (and the reason recorded) once the deadline is reached or SIGTERM arrived"""
+        if self._stopped() or time.perf_counter() >= self.end:
+            self.reason = "signal" if self.interrupted else "deadline"
+            return True
+        return False
+
+    def measure(self, iterations):
+        """Iterations per second so far; the first rate after the warmup is kept as warmup_rate"""
+        now = time.perf_counter()
+        if now <= self.start or iterations == 0:
+            return None
+        rate = iterations / (now - self.start)
+        if self.warmup_rate is None and now >= self.warmup_end:
+            self.warmup_rate = rate
+        return rate
+
+    def cooling(self, T, iterations, accepted=0, last_improvement=0):
+        """
+        Cooling factor per iteration until the next check, None when the run
+        has to stop now (deadline reached or SIGTERM received)
+        """
+        if self.stop_requested():
+            return None
+        now = time.perf_counter()
+        if now < self.warmup_end or iterations == 0:
+            return 1.0
+
+        rate = self.measure(iterations)
+        remaining = rate * (self.end - now)
+        if T <= self.final_temp or remaining < 1.0:
+            return 1.0
+        return (self.final_temp / T) ** (1.0 / remaining)
+
+    def _interrupt(self, signum, frame):
+        self.interrupted = True
+        if self.stop is not None:
+            self.stop.set()
+
+    @contextmanager
+    def signals(self):
+        """Turn SIGTERM into a stop request while the run is active (main thread only)"""
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        previous = signal.signal(signal.SIGTERM, self._interrupt)
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+    def stats(self):
+        """Budget summary for optimization_results"""
+        return {
+            "seconds": self.seconds,
+            "elapsed_seconds": round(time.perf_counter() - self.start, 3),
+            "stopped_by": self.reason,
+            "warmup_iterations_per_second": round(self.warmup_rate, 1) if self.warmup_rate else None,
+        }
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Pre-parsed device library cache
+A device library JSON (project, devices with layer rectangles, blocks with
+variants) is compiled once into a cache directory next to it:
+
+    01_moreDevices.devcache/
+        index.json          source stamp, names, project
+        records.jsonl       one line per block/device without its bulk data
+        record_offsets.npy  byte offset of every line, for seeking to one record
+        variants.npy        block variants as a structured array
+        rects.npy           layer rectangles as float64 rows, memory-mapped
+
+The cache is rebuilt when the JSON changes (size/mtime, then SHA-256 when
+only the mtime moved). Loading a subset of blocks only reads their records
+and the rows they point to; loading everything reproduces the JSON exactly.
+Without NumPy, or when the cache cannot be written, the JSON is parsed as before.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".devcache"
+
+# Variant fields kept in the array, in the order they are written back
+VARIANT_FIELDS = ("width", "height", "column_multiple", "row_multiple", "is_default")
+VARIANT_TYPES = (float, float, int, int, bool)
+VARIANT_DTYPE = [("width", "<f8"), ("height", "<f8"), ("column_multiple", "<i8"),
+                 ("row_multiple", "<i8"), ("is_default", "?"), ("fields", "u1")]
+RECT_FIELDS = frozenset(("x_min", "y_min", "x_max", "y_max"))
+
+# Placeholders in records.jsonl for data stored in the arrays
+ROWS_KEY = "$rows"
+RECTS_KEY = "$rects"
+
+
+def cache_path(json_path):
+    return os.path.splitext(json_path)[0] + CACHE_SUFFIX
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# ---------------------------------------------------------------- compile
+
+def _variant_row(variant):
+    """Array row for a variant, None if it has fields or types the array cannot hold"""
+    if not isinstance(variant, dict):
+        return None
+    row = [0.0, 0.0, 0, 0, False, 0]
+    position = 0
+    for key, value in variant.items():
+        while position < len(VARIANT_FIELDS) and VARIANT_FIELDS[position] != key:
+            position += 1
+        if position == len(VARIANT_FIELDS) or type(value) is not VARIANT_TYPES[position]:
+            return None
+        row[position] = value
+        row[5] |= 1 << position
+    return tuple(row)
+
+
+def _rect_order(rects):
+    """Common key order of a layer's rectangles, None unless all are plain float rectangles"""
+    order = None
+    for rect in rects:
+        if not isinstance(rect, dict) or rect.keys() != RECT_FIELDS:
+            return None
+        if any(type(value) is not float for value in rect.values()):
+            return None
+        keys = tuple(rect)
+        if order is None:
+            order = keys
+        elif keys != order:
+            return None
+    return order
+
+
+def _make_dir(parent, prefix):
+    """
+    New uniquely named directory, like tempfile.mkdtemp but with the umask's
+    permissions rather than 0700, so the cache is as readable as its JSON
+    """
+    while True:
+        path = os.path.join(parent, prefix + os.urandom(6).hex())
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+def compile_library(json_path, directory=None):
+    """Parse the library JSON and write its cache; returns the parsed library"""
+    stamp = _stamp(json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    library = json.loads(raw)
+    directory = directory or cache_path(json_path)
+
+    variants = []
+    rects = []
+    records = []
+    for block in library.get("blocks", []):
+        rows = [_variant_row(variant) for variant in block.get("variants", [])]
+        record = dict(block)
+        if "variants" in block and None not in rows:
+            record["variants"] = {ROWS_KEY: [len(variants), len(variants) + len(rows)]}
+            variants.extend(rows)
+        records.append(record)
+
+    for device in library.get("devices", []):
+        record = dict(device)
+        layers = device.get("layers")
+        if isinstance(layers, dict):
+            record["layers"] = {}
+            for layer, layer_rects in layers.items():
+                order = _rect_order(layer_rects) if isinstance(layer_rects, list) else None
+                if order is None:
+                    record["layers"][layer] = layer_rects
+                    continue
+                record["layers"][layer] = {RECTS_KEY: [len(rects), len(rects) + len(layer_rects), list(order)]}
+                rects.extend([rect[key] for key in order] for rect in layer_rects)
+        records.append(record)
+
+    index = {
+        "format": FORMAT_VERSION,
+        "source": dict(stamp, sha256=hashlib.sha256(raw).hexdigest()),
+        "keys": [key for key in library],
+        "project": library.get("project"),
+        "extra": {key: value for key, value in library.items() if key not in ("project", "devices", "blocks")},
+        "block_names": [block.get("name") for block in library.get("blocks", [])],
+        "device_names": [device.get("name") for device in library.get("devices", [])],
+        "device_types": [device.get("deviceType") for device in library.get("devices", [])],
+    }
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp_dir = _make_dir(parent, ".devcache-")
+    try:
+        offsets = [0]
+        with open(os.path.join(tmp_dir, "records.jsonl"), "wb") as f:
+            for record in records:
+                line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(os.path.join(tmp_dir, "record_offsets.npy"), np.array(offsets, dtype="<i8"))
+        np.save(os.path.join(tmp_dir, "variants.npy"), np.array(variants, dtype=VARIANT_DTYPE))
+        np.save(os.path.join(tmp_dir, "rects.npy"), np.array(rects, dtype="<f8").reshape(-1, 4))
+        # index.json last: a cache without it is never used
+        with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+
+        old_dir = None
+        if os.path.exists(directory):
+            old_dir = tempfile.mkdtemp(dir=parent, prefix=".devcache-old-")
+            os.replace(directory, os.path.join(old_dir, "cache"))
+        os.replace(tmp_dir, directory)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return library
+
+
+# ---------------------------------------------------------------- load
+
+class DeviceLibrary:
+    """Read access to a compiled library cache"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.offsets = np.load(os.path.join(directory, "record_offsets.npy"))
+        self.variants = np.load(os.path.join(directory, "variants.npy"), mmap_mode="r")
+        self.rects = np.load(os.path.join(directory, "rects.npy"), mmap_mode="r")
+        self.block_count = len(self.index["block_names"])
+
+    def is_current(self, json_path):
+        """Whether the cache was built from the JSON as it is now; refreshes a moved mtime"""
+        source = self.index["source"]
+        stamp = _stamp(json_path)
+        if stamp == {"size": source["size"], "mtime_ns": source["mtime_ns"]}:
+            return True
+        if stamp["size"] != source["size"] or _file_digest(json_path) != source["sha256"]:
+            return False
+
+        # Same content, new mtime (touch, checkout): keep the cache
+        self.index["source"].update(stamp)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(self.directory, "index.json"))
+        except OSError:
+            pass
+        return True
+
+    def _records(self, positions=None):
+        """Parsed records.jsonl lines at the given positions (None = all)"""
+        records = []
+        with open(os.path.join(self.directory, "records.jsonl"), "rb") as f:
+            if positions is None:
+                return [json.loads(line) for line in f]
+            for position in positions:
+                start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+                f.seek(start)
+                records.append(json.loads(f.read(end - start)))
+        return records
+
+    def _expand_block(self, block):
+        rows = block.get("variants")
+        if isinstance(rows, dict) and ROWS_KEY in rows:
+            start, end = rows[ROWS_KEY]
+            variants = []
+            for row in self.variants[start:end].tolist():
+                fields = row[5]
+                variants.append({key: row[k] for k, key in enumerate(VARIANT_FIELDS) if fields >> k & 1})
+            block["variants"] = variants
+        return block
+
+    def _expand_device(self, device):
+        layers = device.get("layers")
+        if isinstance(layers, dict):
+            for layer, rects in layers.items():
+                if isinstance(rects, dict) and RECTS_KEY in rects:
+                    start, end, order = rects[RECTS_KEY]
+                    layers[layer] = [dict(zip(order, row)) for row in self.rects[start:end].tolist()]
+        return device
+
+    def load(self, block_names=None, devices=True):
+        """
+        Library dict in the shape of the JSON
+        Args:
+            block_names: Blocks to emit (None = all); devices are limited to
+                         the device types those blocks use
+            devices (bool): False leaves the device list empty
+        """
+        if block_names is None and devices:
+            records = self._records()
+            blocks = [self._expand_block(block) for block in records[:self.block_count]]
+            devices = [self._expand_device(device) for device in records[self.block_count:]]
+        else:
+            names = self.index["block_names"]
+            wanted = set(names if block_names is None else block_names)
+            positions = [i for i, name in enumerate(names) if name in wanted]
+            blocks = [self._expand_block(block) for block in self._records(positions)]
+            types = {block.get("device_type") for block in blocks} if devices else ()
+            positions = [self.block_count + i for i, device_type in enumerate(self.index["device_types"])
+                         if device_type in types]
+            devices = [self._expand_device(device) for device in self._records(positions)]
+
+        library = {}
+        for key in self.index["keys"]:
+            if key == "project":
+                library[key] = self.index["project"]
+            elif key == "devices":
+                library[key] = devices
+            elif key == "blocks":
+                library[key] = blocks
+            else:
+                library[key] = self.index["extra"][key]
+        return library
+
+
+def _filter_library(library, block_names, devices=True):
+    """Subset of an already parsed library, same rules as DeviceLibrary.load"""
+    if block_names is None and devices:
+        return library
+    blocks = library.get("blocks", [])
+    if block_names is not None:
+        wanted = set(block_names)
+        blocks = [block for block in blocks if block.get("name") in wanted]
+    types = {block.get("device_type") for block in blocks} if devices else ()
+    result = dict(library)
+    if "blocks" in library:
+        result["blocks"] = blocks
+    if "devices" in library:
+        result["devices"] = [device for device in library["devices"] if device.get("deviceType") in types]
+    return result
+
+
+def load_library(json_path, block_names=None, devices=True):
+    """
+    Device library from its cache, compiling the cache when it is missing or stale
+    Args:
+        json_path (str): Library JSON
+        block_names: Only emit these blocks and the devices they use (None = all)
+        devices (bool): False leaves out the devices and their layer geometry
+    Returns: Library dict
+    """
+    if np is None:
+        with open(json_path, "r", encoding="utf-8") as f:
+            return _filter_library(json.load(f), block_names, devices)
+
+    directory = cache_path(json_path)
+    try:
+        library = DeviceLibrary(directory)
+        if library.index.get("format") == FORMAT_VERSION and library.is_current(json_path):
+            return library.load(block_names, devices)
+    except (OSError, ValueError, KeyError):
+        pass  # missing or unreadable cache: rebuild it
+
+    try:
+        return _filter_library(compile_library(json_path, directory), block_names, devices)
+    except OSError:
+        # Read-only location: no cache, plain JSON
+        with open(json_path, "r", encoding="utf-8") as f:
+            return _filter_library(json.load(f), block_names, devices)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Transposition table for the annealers (sa_settings.transposition_cache)
+Late in a run most candidates are rejected and the chain sits on the same
+solution, so the same neighbours come up again and again. The table maps a
+state key to what is known about that state's fitness, so a revisited
+candidate that is bound to be rejected skips its decode / packing.
+
+Keys are Zobrist hashes: the XOR of one key per state component (sequence
+position or tree node, and its value), kept up to date incrementally as
+moves change single components. The component keys come from hash() of an
+int tuple, which is well mixed and the same in every process.
+
+Entries are (fitness, exact): the fitness of a full evaluation, or a lower
+bound (exact False) left by an evaluation that stopped at an acceptance
+threshold.
+"""
+
+from collections import OrderedDict
+
+TABLE_SIZE = 1 << 15  # Entries kept, least recently used are dropped
+
+
+def zobrist(domain, index, value):
+    """Key of one state component: position or node index of a domain holds value"""
+    return hash((domain, index, value))
+
+
+class TranspositionTable:
+    """Bounded LRU map of state key -> (fitness, exact)"""
+
+    def __init__(self, capacity=TABLE_SIZE):
+        self.capacity = max(1, int(capacity))
+        self.entries = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.skipped = 0
+
+    def get(self, key):
+        """(fitness, exact) stored for key, or None"""
+        self.lookups += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def rejects(self, entry, threshold):
+        """True when a get() entry proves the state's fitness is not below threshold"""
+        if entry is not None and entry[0] >= threshold:
+            self.skipped += 1
+            return True
+        return False
+
+    def put(self, key, fitness, exact=True):
+        """Store a fitness or, with exact False, a lower bound of it"""
+        entries = self.entries
+        entry = entries.get(key)
+        if entry is not None and (entry[1] or (not exact and entry[0] >= fitness)):
+            return  # already knows as much
+        entries[key] = (fitness, exact)
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def stats(self):
+        """Table summary for optimization_results"""
+        return {
+            "capacity": self.capacity,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups * 100, 2) if self.lookups else 0,
+            "evaluations_skipped": self.skipped,
+        }
+
+
+def merge_stats(summaries):
+    """Combined stats() of several tables, e.g. the segments of a replica exchange run"""
+    summaries = [s for s in summaries if s]
+    if not summaries:
+        return None
+    lookups = sum(s["lookups"] for s in summaries)
+    hits = sum(s["hits"] for s in summaries)
+    return {
+        "capacity": summaries[0]["capacity"],
+        "lookups": lookups,
+        "hits": hits,
+        "hit_rate": round(hits / lookups * 100, 2) if lookups else 0,
+        "evaluations_skipped": sum(s["evaluations_skipped"] for s in summaries),
+    }
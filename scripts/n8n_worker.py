@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Persistent worker pool for n8n pythonFunction nodes
+Keeps warm Python processes that run any script built on create_n8n_processor,
+so a node no longer pays interpreter startup and imports per execution.
+
+Usage:
+    python3 n8n_worker.py serve [--socket PATH] [--workers N] [--timeout S] [--max-requests N]
+        Pool of workers behind a Unix socket (default $N8N_WORKER_SOCKET or /tmp/n8n_worker.sock)
+    python3 n8n_worker.py worker
+        A single worker speaking the protocol on stdin/stdout
+
+Protocol - one JSON object per line in both directions:
+    request:  {"id": ..., "script": "/abs/path/to/script.py", "payload": {...}}
+    response: {"id": ..., "result": <what the script would have printed>}
+
+Each request gets freshly decoded input, its own exception handling and the
+same error objects N8nJsonHandler prints. A worker that crashes, times out
+or has served --max-requests requests is replaced by a new process; the
+request it was running gets an error response. Scripts that do not use
+create_n8n_processor (e.g. 02_createBStarTree.py) are run as a subprocess.
+Every script imports its sibling modules from its own directory, and is
+reloaded when it or one of them changes.
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import queue
+import runpy
+import select
+import signal
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_SOCKET = os.environ.get("N8N_WORKER_SOCKET", "/tmp/n8n_worker.sock")
+DEFAULT_WORKERS = 2
+MAX_REQUESTS = 500  # Requests per worker process before it is recycled
+RESTART_LIMIT = 5  # Crashes within RESTART_WINDOW before restarts are delayed
+RESTART_WINDOW = 60.0
+RESTART_DELAY = 5.0
+
+
+def error_response(message):
+    """Error object in the format N8nJsonHandler prints"""
+    return {"error": message, "success": False, "data": None}
+
+
+# ---------------------------------------------------------------- worker side
+
+class ScriptRunner:
+    """Loads create_n8n_processor scripts once and calls their processing function"""
+
+    def __init__(self):
+        # path -> (mtimes of the script and its own modules, function or None for subprocess scripts,
+        #          {name: module} imported from the script's directory)
+        self.processors = {}
+
+    def _load(self, path):
+        """Processing function of a script and its modules, function None if it does not use create_n8n_processor"""
+        cached = self.processors.get(path)
+        if cached and cached[0] == file_mtimes(cached[0]):
+            return cached[1], cached[2]
+
+        with open(path, "r", encoding="utf-8") as f:
+            uses_handler = "create_n8n_processor" in f.read()
+
+        function = None
+        modules = {}
+        if uses_handler:
+            with script_modules(os.path.dirname(path), modules):
+                handler = importlib.import_module("n8n_json_handler")
+                captured = []
+                handler._worker_registration = captured.append
+                stdin = sys.stdin
+                sys.stdin = io.TextIOWrapper(io.BytesIO(b""), encoding="utf-8")
+                try:
+                    runpy.run_path(path, run_name="__main__")
+                finally:
+                    handler._worker_registration = None
+                    sys.stdin = stdin
+            function = captured[-1] if captured else None
+
+        files = [path] + [module.__file__ for module in modules.values() if getattr(module, "__file__", None)]
+        self.processors[path] = (file_mtimes(files), function, modules)
+        return function, modules
+
+    def run(self, path, payload):
+        """Result of one request, in the shape the script would print it"""
+        function, modules = self._load(path)
+        if function is None:
+            return run_subprocess(path, payload)
+
+        try:
+            with script_modules(os.path.dirname(path), modules):
+                result = function(payload)
+        except Exception as e:
+            return error_response(f"Processing error: {str(e)}")
+        return error_response("No output data set") if result is None else result
+
+
+@contextmanager
+def script_modules(directory, modules):
+    """
+    Import context of one script directory: the directory leads sys.path and
+    its modules (a {name: module} dict, filled with the ones imported inside)
+    are in sys.modules, so scripts in other directories get their own
+    helpers of the same name
+    """
+    saved_path = sys.path[:]
+    before = set(sys.modules)
+    displaced = {name: sys.modules[name] for name in modules if name in before}
+    sys.path.insert(0, directory)
+    sys.modules.update(modules)
+    prefix = os.path.join(directory, "")
+    try:
+        yield
+    finally:
+        sys.path[:] = saved_path
+        for name in (set(sys.modules) - before) | set(modules):
+            filename = getattr(sys.modules.get(name), "__file__", None)
+            if filename and os.path.abspath(filename).startswith(prefix):
+                modules[name] = sys.modules.pop(name)
+        sys.modules.update(displaced)
+
+
+def file_mtimes(files):
+    """{path: mtime} of files, None for the ones that are gone"""
+    mtimes = {}
+    for path in files:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+def run_subprocess(path, payload):
+    """Run a script the way the n8n node template does, one process per request"""
+    proc = subprocess.run([sys.executable, path], input=json.dumps(payload, ensure_ascii=False),
+                          capture_output=True, text=True, encoding="utf-8")
+    if proc.stderr:
+        print(proc.stderr, file=sys.stderr, end="")
+    try:
+        return json.loads(proc.stdout)
+    except ValueError:
+        return error_response(f"Script produced no JSON output (exit code {proc.returncode})")
+
+
+def run_worker():
+    """Serve requests from stdin until it is closed"""
+    out = sys.stdout.buffer
+    # Anything the scripts print goes to stderr, stdout only carries responses
+    sys.stdout = sys.stderr
+    runner = ScriptRunner()
+    cwd = os.getcwd()
+
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            result = runner.run(os.path.abspath(request["script"]), request.get("payload"))
+        except Exception as e:
+            result = error_response(f"Invalid worker request: {str(e)}")
+        finally:
+            os.chdir(cwd)
+
+        try:
+            response = json.dumps({"id": request_id, "result": result}, ensure_ascii=False, separators=(",", ":"))
+        except Exception as e:
+            response = json.dumps({"id": request_id, "result": error_response(f"Failed to serialize output: {str(e)}")})
+        out.write(response.encode("utf-8") + b"\n")
+        out.flush()
+
+
+# ---------------------------------------------------------------- pool side
+
+class WorkerProcess:
+    """One warm worker subprocess"""
+
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker"],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.requests = 0
+
+    def request(self, line, timeout):
+        """Send one request line and wait for its response line; None on crash or timeout"""
+        try:
+            self.proc.stdin.write(line)
+            self.proc.stdin.flush()
+            if timeout:
+                ready, _, _ = select.select([self.proc.stdout], [], [], timeout)
+                if not ready:
+                    return None
+            response = self.proc.stdout.readline()
+        except (OSError, ValueError):
+            return None
+        self.requests += 1
+        return response or None
+
+    def stop(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class WorkerPool:
+    """Fixed number of workers; crashed or worn-out workers are replaced"""
+
+    def __init__(self, size, timeout=None, max_requests=MAX_REQUESTS):
+        self.timeout = timeout
+        self.max_requests = max_requests
+        self.idle = queue.Queue()
+        self.crashes = []
+        self.lock = threading.Lock()
+        for _ in range(size):
+            self.idle.put(WorkerProcess())
+
+    def _replace(self, worker, crashed):
+        worker.stop()
+        if crashed:
+            with self.lock:
+                now = time.monotonic()
+                self.crashes = [t for t in self.crashes if now - t < RESTART_WINDOW] + [now]
+                backoff = len(self.crashes) > RESTART_LIMIT
+            if backoff:
+                print(f"n8n_worker: {len(self.crashes)} crashes in {RESTART_WINDOW:.0f}s, "
+                      f"delaying restart by {RESTART_DELAY:.0f}s", file=sys.stderr)
+                time.sleep(RESTART_DELAY)
+        return WorkerProcess()
+
+    def submit(self, request):
+        """Run one request dict on an idle worker and return the response dict"""
+        line = json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n"
+        worker = self.idle.get()
+        try:
+            response = worker.request(line, self.timeout)
+            if response is None:
+                worker = self._replace(worker, crashed=True)
+                return {"id": request.get("id"),
+                        "result": error_response("Worker crashed or timed out, it has been restarted")}
+            if worker.requests >= self.max_requests:
+                worker = self._replace(worker, crashed=False)
+            return json.loads(response)
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().stop()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Line-delimited requests over one socket connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.pool.submit(request)
+            except Exception as e:
+                response = {"id": None, "result": error_response(f"Invalid worker request: {str(e)}")}
+            self.wfile.write(json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class WorkerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path, workers, timeout, max_requests):
+    """Run the worker pool behind a Unix socket until interrupted"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    pool = WorkerPool(workers, timeout, max_requests)
+    server = WorkerServer(socket_path, RequestHandler)
+    server.pool = pool
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"n8n_worker: {workers} workers listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent worker pool for n8n Python scripts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run a worker pool behind a Unix socket")
+    serve_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    serve_parser.add_argument("--timeout", type=float, default=None,
+                              help="seconds before a request is abandoned and its worker restarted")
+    serve_parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS)
+    commands.add_parser("worker", help="run one worker on stdin/stdout")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker()
+    else:
+        serve(args.socket, args.workers, args.timeout, args.max_requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Local HTTP placement service
+Runs the SP and B*-tree pipeline steps as asynchronous jobs on a bounded
+process pool, so an n8n HTTP Request node can start many placements at once
+and collect the results later. Standard library only.
+
+Usage: python3 placement_service.py [--host H] [--port P] [--workers N] [--max-queue N]
+
+Endpoints:
+    POST   /jobs/<pipeline>        body = pipeline input JSON -> 202 {"job_id", ...}
+    GET    /jobs/<job_id>[?wait=S] job status, long-polls up to S seconds for the result
+    DELETE /jobs/<job_id>          cancel a queued job / forget a finished one
+    GET    /jobs                   all retained jobs without results
+    GET    /status                 workers, queue depth and job counters
+    GET    /pipelines              available pipelines
+
+Pipelines: load_simplified_devices, process_sequence_pair, sa_optimize,
+process_bstar_tree, optimize_bstar_tree_safe
+
+An SA trace file requested by a job (sa_settings.trace.path) is named by
+the client but always written to logs/sa_traces.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# pipeline -> (example directory, script)
+PIPELINES = {
+    "load_simplified_devices": ("example_SP", "01_loadDevices.py"),
+    "process_sequence_pair": ("example_SP", "02_createSP.py"),
+    "sa_optimize": ("example_SP", "03_simulatedAnnealing.py"),
+    "process_bstar_tree": ("example_BT", "02_createBStarTree.py"),
+    "optimize_bstar_tree_safe": ("example_BT", "03_simulatedAnnealing.py"),
+}
+
+DEFAULT_PORT = 8765
+MAX_QUEUE = 64  # Jobs waiting for a worker before submissions are refused
+JOB_HISTORY = 1000  # Finished jobs kept for polling
+MAX_WAIT = 300.0  # Longest long-poll in seconds
+TRACE_DIR = os.path.join(SCRIPTS_DIR, "..", "logs", "sa_traces")  # The only place jobs may write SA traces
+
+
+# ---------------------------------------------------------------- worker processes
+
+_functions = {}
+
+
+def _pipeline_function(pipeline):
+    """Import the pipeline's script once per worker process"""
+    function = _functions.get(pipeline)
+    if function is None:
+        directory, script = PIPELINES[pipeline]
+        directory = os.path.join(SCRIPTS_DIR, directory)
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+        name = f"{os.path.basename(directory)}_{os.path.splitext(script)[0]}"
+        spec = importlib.util.spec_from_file_location(name, os.path.join(directory, script))
+        module = importlib.util.module_from_spec(spec)
+        # Registered so the script's own process pools can pickle its functions
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        function = _functions[pipeline] = getattr(module, pipeline)
+    return function
+
+
+def _run_job(pipeline, payload):
+    """Worker side of a job: (result, start time, end time)"""
+    started = time.time()
+    result = _pipeline_function(pipeline)(payload)
+    return result, started, time.time()
+
+
+def confine_trace_path(payload):
+    """
+    Keep the SA trace of a job (sa_settings.trace.path) inside TRACE_DIR:
+    clients only pick the file name. Returns an error message for a path
+    that is not a plain file name, else None.
+    """
+    settings = payload.get("sa_settings") if isinstance(payload, dict) else None
+    spec = settings.get("trace") if isinstance(settings, dict) else None
+    if not isinstance(spec, dict) or not spec.get("path"):
+        return None
+    name = str(spec["path"])
+    if os.path.basename(name) != name or name in (".", "..") or (os.altsep and os.altsep in name):
+        return "sa_settings.trace.path must be a file name, traces are written to logs/sa_traces"
+    spec["path"] = os.path.join(TRACE_DIR, name)
+    return None
+
+
+# ---------------------------------------------------------------- job bookkeeping
+
+class Job:
+    """One submitted pipeline run"""
+
+    def __init__(self, pipeline):
+        self.id = uuid.uuid4().hex
+        self.pipeline = pipeline
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self, with_result=True):
+        timing = {"submitted_at": self.submitted_at, "started_at": self.started_at,
+                  "finished_at": self.finished_at}
+        if self.started_at is not None:
+            timing["queue_seconds"] = round(self.started_at - self.submitted_at, 4)
+        if self.finished_at is not None:
+            timing["run_seconds"] = round(self.finished_at - (self.started_at or self.submitted_at), 4)
+            timing["total_seconds"] = round(self.finished_at - self.submitted_at, 4)
+
+        data = {"job_id": self.id, "pipeline": self.pipeline, "status": self.status, "timing": timing}
+        if self.error is not None:
+            data["error"] = self.error
+        if with_result and self.status == "done":
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Keeps submitted jobs for polling and feeds them to the process pool.
+    Jobs wait in our own queue and are only handed to the pool when a
+    worker is free, so queue depth and running counts are exact.
+    A worker process that dies breaks the whole pool: the jobs it was
+    running fail and the pool is replaced for the jobs after them.
+    """
+
+    def __init__(self, workers, max_queue=MAX_QUEUE, history=JOB_HISTORY):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.history = history
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.jobs = OrderedDict()
+        self.pending = deque()
+        self.payloads = {}
+        self.running = 0
+        self.lock = threading.RLock()
+        self.counters = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "rejected": 0,
+                         "pool_restarts": 0}
+        self.started = time.time()
+
+    def submit(self, pipeline, payload):
+        """New job, or None when the queue is full"""
+        with self.lock:
+            if len(self.pending) >= self.max_queue:
+                self.counters["rejected"] += 1
+                return None
+
+            job = Job(pipeline)
+            self.jobs[job.id] = job
+            self.payloads[job.id] = payload
+            self.pending.append(job)
+            self.counters["submitted"] += 1
+            self._evict()
+            self._dispatch()
+        return job
+
+    def _dispatch(self):
+        """Hand queued jobs to free workers (lock held)"""
+        while self.pending and self.running < self.workers:
+            job = self.pending.popleft()
+            job.status = "running"
+            self.running += 1
+            payload = self.payloads.pop(job.id)
+            executor = self.executor
+            try:
+                future = executor.submit(_run_job, job.pipeline, payload)
+            except BrokenProcessPool:
+                # Broken before the failing job's callback ran
+                executor = self._restart_pool(executor)
+                future = executor.submit(_run_job, job.pipeline, payload)
+            future.add_done_callback(lambda done, job=job, executor=executor: self._finish(job, done, executor))
+
+    def _restart_pool(self, broken):
+        """Replace a broken executor once (lock held); returns the current one"""
+        if self.executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.counters["pool_restarts"] += 1
+        return self.executor
+
+    def _finish(self, job, future, executor):
+        with self.lock:
+            self.running -= 1
+            try:
+                job.result, job.started_at, job.finished_at = future.result()
+                job.status = "done"
+                self.counters["done"] += 1
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._restart_pool(executor)
+                job.error = f"{type(e).__name__}: {str(e)}"
+                job.finished_at = time.time()
+                job.status = "failed"
+                self.counters["failed"] += 1
+            job.done.set()
+            self._dispatch()
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond the history limit (lock held)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id, wait=0.0):
+        job = self.jobs.get(job_id)
+        if job is not None and wait > 0:
+            job.done.wait(min(wait, MAX_WAIT))
+        return job
+
+    def remove(self, job_id):
+        """Cancel a queued job or forget a finished one; False if it is running"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == "running":
+                return False
+            if job.status == "queued":
+                self.pending.remove(job)
+                self.payloads.pop(job_id, None)
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.done.set()
+                self.counters["cancelled"] += 1
+            del self.jobs[job_id]
+        return True
+
+    def status(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self.pending),
+                "running": self.running,
+                "max_queue": self.max_queue,
+                "jobs_retained": len(self.jobs),
+                "counters": dict(self.counters),
+                "uptime_seconds": round(time.time() - self.started, 1),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------------------------------------------- HTTP
+
+class PlacementRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over the job manager"""
+
+    server_version = "PlacementService/1.0"
+
+    def _send(self, code, data):
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, message):
+        self._send(code, {"error": message, "success": False, "data": None})
+
+    def _path(self):
+        url = urlparse(self.path)
+        return [part for part in url.path.split("/") if part], parse_qs(url.query)
+
+    def do_GET(self):
+        parts, query = self._path()
+        manager = self.server.manager
+
+        if parts == ["status"]:
+            self._send(200, manager.status())
+        elif parts == ["pipelines"]:
+            self._send(200, {"pipelines": sorted(PIPELINES)})
+        elif parts == ["jobs"]:
+            self._send(200, {"jobs": [job.to_dict(with_result=False) for job in list(manager.jobs.values())]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            try:
+                wait = float(query.get("wait", ["0"])[0])
+            except ValueError:
+                return self._error(400, "wait must be a number of seconds")
+            job = manager.get(parts[1], wait)
+            if job is None:
+                return self._error(404, f"Unknown job {parts[1]}")
+            self._send(200, job.to_dict())
+        else:
+            self._error(404, f"Unknown path {self.path}")
+
+    def do_POST(self):
+        parts, _ = self._path()
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._error(404, f"Unknown path {self.path}")
+        pipeline = parts[1]
+        if pipeline not in PIPELINES:
+            return self._error(404, f"Unknown pipeline {pipeline}, expected one of {sorted(PIPELINES)}")
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length).decode("utf-8", errors="replace"))
+        except Exception as e:
+            return self._error(400, f"Failed to load JSON: {str(e)}")
+        problem = confine_trace_path(payload)
+        if problem is not None:
+            return self._error(400, problem)
+
+        job = self.server.manager.submit(pipeline, payload)
+        if job is None:
+            return self._error(503, "Job queue is full, retry later")
+        self._send(202, dict(job.to_dict(), poll=f"/jobs/{job.id}"))
+
+    def do_DELETE(self):
+        parts, _ = self._path()
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._error(404, f"Unknown path {self.path}")
+        removed = self.server.manager.remove(parts[1])
+        if removed is None:
+            self._error(404, f"Unknown job {parts[1]}")
+        elif not removed:
+            self._error(409, "Job is already running")
+        else:
+            self._send(200, {"job_id": parts[1], "removed": True})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP placement service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), PlacementRequestHandler)
+    server.daemon_threads = True
+    server.manager = JobManager(args.workers, args.max_queue)
+    server.verbose = args.verbose
+    print(f"Placement service on http://{args.host}:{args.port} with {args.workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Shared fixtures: the example annealers (03_simulatedAnnealing.py is not
+importable by name) and small random designs for them.
+"""
+
+import importlib.util
+import os
+import random
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+
+
+def load_example(example, module_name):
+    """Import example_<example>/03_simulatedAnnealing.py; its helper modules resolve from that directory"""
+    directory = os.path.join(SCRIPTS_DIR, "example_" + example)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, "03_simulatedAnnealing.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def sp():
+    return load_example("SP", "sp_annealer")
+
+
+@pytest.fixture(scope="session")
+def bt():
+    return load_example("BT", "bt_annealer")
+
+
+def random_variants(n, seed):
+    """{name: [variant, ...]} with 1-3 variants of random size per block"""
+    rng = random.Random(seed)
+    return {"B%d" % b: [{"width": round(rng.uniform(1.0, 10.0), 2), "height": round(rng.uniform(1.0, 10.0), 2)}
+                        for _ in range(rng.randint(1, 3))]
+            for b in range(n)}
+
+
+def random_sequence_pair(variants, seed):
+    """(r_plus, r_minus, var_idx) over the blocks of random_variants"""
+    rng = random.Random(seed)
+    names = list(variants)
+    r_plus = rng.sample(names, len(names))
+    r_minus = rng.sample(names, len(names))
+    var_idx = {name: rng.randrange(len(v)) for name, v in variants.items()}
+    return r_plus, r_minus, var_idx
+
+
+def random_bstar_design(n, seed):
+    """03_simulatedAnnealing.py input for the B*-tree annealer with a random tree"""
+    rng = random.Random(seed)
+    variants = random_variants(n, seed)
+    nodes = [{"name": name, "x_min": 0.0, "y_min": 0.0, "x_max": v[0]["width"], "y_max": v[0]["height"],
+              "x_child": {}, "y_child": {}} for name, v in variants.items()]
+    free_slots = [(0, "x_child"), (0, "y_child")]
+    for b in range(1, n):
+        k = rng.randrange(len(free_slots))
+        free_slots[k], free_slots[-1] = free_slots[-1], free_slots[k]
+        parent, side = free_slots.pop()
+        nodes[parent][side] = nodes[b]
+        free_slots.append((b, "x_child"))
+        free_slots.append((b, "y_child"))
+    blocks = [{"name": name, "variants": v} for name, v in variants.items()]
+    return {"blocks": blocks, "bstar_tree": {"root": nodes[0]}}
@@ -0,0 +1,124 @@
+"""SimpleOptimizer: incremental repacking, undo and early abort against a fresh packing"""
+
+import math
+import random
+
+import pytest
+
+from conftest import random_bstar_design
+
+
+def packed(optimizer):
+    """Coordinates, sizes, bounding box and used area of the last packing"""
+    return (list(optimizer.x), list(optimizer.y), list(optimizer.w), list(optimizer.h),
+            optimizer.max_x, optimizer.max_y, optimizer.used_area)
+
+
+def fresh_packing(bt, design, optimizer):
+    """The optimizer's current tree packed from scratch by a new optimizer"""
+    fresh = bt.SimpleOptimizer(design)
+    fresh._restore(optimizer._snapshot())
+    fitness = fresh._calculate_fitness()
+    return fresh, fitness
+
+
+def random_move(optimizer):
+    optimizer._begin_move()
+    random.choice((optimizer._op1_change_variant, optimizer._op2_swap_nodes, optimizer._op3_move_node))()
+
+
+@pytest.mark.parametrize("n, seed", [(1, 1), (3, 2), (12, 3), (60, 4), (200, 5)])
+def test_repack_matches_fresh_packing(bt, n, seed):
+    design = random_bstar_design(n, seed)
+    optimizer = bt.SimpleOptimizer(design)
+    optimizer._calculate_fitness()
+    random.seed(seed)
+    for _ in range(200):
+        random_move(optimizer)
+        fitness = optimizer._calculate_fitness()
+        fresh, fresh_fitness = fresh_packing(bt, design, optimizer)
+        assert packed(optimizer) == packed(fresh)
+        assert fitness == fresh_fitness
+        if random.random() < 0.5:
+            optimizer._undo()
+
+
+@pytest.mark.parametrize("n, seed", [(12, 6), (90, 7)])
+def test_undo_restores_previous_packing(bt, n, seed):
+    optimizer = bt.SimpleOptimizer(random_bstar_design(n, seed))
+    optimizer._calculate_fitness()
+    random.seed(seed)
+    for _ in range(200):
+        before = (optimizer._snapshot(), packed(optimizer))
+        random_move(optimizer)
+        optimizer._calculate_fitness()
+        optimizer._undo()
+        assert (optimizer._snapshot(), packed(optimizer)) == before
+        # walk on, so the next move starts from a different tree
+        random_move(optimizer)
+        optimizer._calculate_fitness()
+
+
+@pytest.mark.parametrize("n, seed", [(3, 8), (12, 9), (60, 10), (200, 11)])
+def test_abort_never_rejects_an_acceptable_candidate(bt, n, seed):
+    design = random_bstar_design(n, seed)
+    optimizer = bt.SimpleOptimizer(design)
+    cur_fit = optimizer._calculate_fitness()
+    random.seed(seed)
+    aborted = 0
+    for _ in range(300):
+        before = packed(optimizer)
+        random_move(optimizer)
+        fresh, fit = fresh_packing(bt, design, optimizer)
+        # the bound is the area term alone, exact at the candidate's
+        area_term = fresh.max_x * fresh.max_y * bt.AREA_WEIGHT
+        threshold = random.choice((
+            cur_fit - cur_fit * random.choice((0.0, 1e-3, 0.1)) * math.log(1.0 - random.random()),
+            fit * (1.0 + 1e-12), fit, area_term * (1.0 + 1e-12), area_term, area_term * (1.0 - 1e-6)))
+        new_fit = optimizer._calculate_fitness(threshold)
+        if new_fit == math.inf:
+            # packing gave up: the Metropolis test must reject the candidate
+            aborted += 1
+            assert not fit < threshold
+        else:
+            assert new_fit == fit
+        if new_fit < threshold and random.random() < 0.5:
+            cur_fit = new_fit
+        else:
+            optimizer._undo()
+            assert packed(optimizer) == before
+    assert aborted > 0
+
+
+
+@pytest.mark.parametrize("chunk, seed", [(2, 12), (3, 13), (64, 14)])
+def test_contour_against_placed_blocks(bt, monkeypatch, chunk, seed):
+    import bstar_contour
+    monkeypatch.setattr(bstar_contour, "CHUNK", chunk)
+    contour = bt.ContourStructure()
+    blocks = []
+    saved = []
+    rng = random.Random(seed)
+    for step in range(1, 1500):
+        x_start = float(rng.randrange(60))
+        x_end = x_start + rng.choice((0.5, 1.0, 2.0, float(rng.randrange(1, 40))))
+        height = rng.choice((1.0, 2.0))
+        # lowest y above every placed block the new one overlaps
+        expected = max((top for a, b, top in blocks if a < x_end and x_start < b), default=0.0)
+        assert contour.place(x_start, x_end, height) == expected
+        blocks.append((x_start, x_end, expected + height))
+
+        if step % 40 == 0:
+            saved.append((contour.snapshot(), contour.contour, list(blocks)))
+        elif step % 40 == 20 and saved and rng.random() < 0.5:
+            snapshot, segments, blocks = rng.choice(saved)
+            blocks = list(blocks)
+            assert contour.matches(snapshot) == (contour.contour == segments)
+            contour.restore(snapshot)
+            assert contour.contour == segments
+            assert contour.matches(snapshot)
+        if step % 300 == 0:
+            # start over, so the contour stays low enough to vary
+            contour.reset()
+            blocks = []
+            saved = []
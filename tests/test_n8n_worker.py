@@ -0,0 +1,80 @@
+"""n8n_worker and create_n8n_processor on small scripts in temporary directories"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+SCRIPT = """
+from n8n_json_handler import create_n8n_processor
+import helper
+
+
+def process(data):
+    if data["item"] is None:
+        return None
+    return {"helper": helper.VALUE, "item": data["item"]}
+
+
+if __name__ == "__main__":
+    create_n8n_processor(process)()
+"""
+
+
+def make_script(directory, value):
+    os.makedirs(directory)
+    shutil.copy(os.path.join(SCRIPTS_DIR, "example_SP", "n8n_json_handler.py"), directory)
+    with open(os.path.join(directory, "helper.py"), "w") as f:
+        f.write("VALUE = %r\n" % value)
+    path = os.path.join(directory, "s.py")
+    with open(path, "w") as f:
+        f.write(SCRIPT)
+    return path
+
+
+def run_worker(requests):
+    """Results of the requests, served in order by one worker process"""
+    lines = "".join(json.dumps(request) + "\n" for request in requests)
+    proc = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "n8n_worker.py"), "worker"],
+                          input=lines, capture_output=True, text=True, timeout=60)
+    return [json.loads(line)["result"] for line in proc.stdout.splitlines()]
+
+
+def test_same_named_helpers_stay_apart(tmp_path):
+    a = make_script(str(tmp_path / "a"), "a")
+    b = make_script(str(tmp_path / "b"), "b")
+    results = run_worker([{"id": k, "script": script, "payload": {"item": k}}
+                          for k, script in enumerate((a, b, a, b))])
+    assert results == [{"helper": "a", "item": 0}, {"helper": "b", "item": 1},
+                       {"helper": "a", "item": 2}, {"helper": "b", "item": 3}]
+
+
+def test_edited_helper_is_reloaded(tmp_path):
+    sys.path.insert(0, SCRIPTS_DIR)
+    try:
+        import n8n_worker
+    finally:
+        sys.path.remove(SCRIPTS_DIR)
+    script = make_script(str(tmp_path / "a"), "old")
+    runner = n8n_worker.ScriptRunner()
+    assert runner.run(script, {"item": 1}) == {"helper": "old", "item": 1}
+    helper = str(tmp_path / "a" / "helper.py")
+    with open(helper, "w") as f:
+        f.write("VALUE = 'new'\n")
+    os.utime(helper, (1, 1))
+    assert runner.run(script, {"item": 2}) == {"helper": "new", "item": 2}
+    assert "helper" not in sys.modules
+
+
+def test_none_result_is_an_error_object(tmp_path):
+    script = make_script(str(tmp_path / "a"), "a")
+    error = {"error": "No output data set", "success": False, "data": None}
+    for payload, expected in (({"item": None}, error),
+                              ({"batch": [{"item": 1}, {"item": None}]}, [{"helper": "a", "item": 1}, error])):
+        proc = subprocess.run([sys.executable, script], input=json.dumps(payload),
+                              capture_output=True, text=True, timeout=60)
+        assert json.loads(proc.stdout) == expected
+        assert run_worker([{"id": 0, "script": script, "payload": payload}]) == [expected]
@@ -0,0 +1,134 @@
+"""SequencePairState: incremental re-decode, undo, early abort and batched evaluation against a full decode"""
+
+import math
+import random
+
+import pytest
+
+from conftest import random_sequence_pair, random_variants
+
+
+def make_state(sp, n, seed):
+    variants = random_variants(n, seed)
+    state = sp.SequencePairState(variants, *random_sequence_pair(variants, seed))
+    state.decode()
+    return state, variants
+
+
+def decoded(state):
+    """Coordinates, bounding box and used area of the last decode"""
+    return list(state.x), list(state.y), state.bounds()
+
+
+def full_decode(sp, state, variants):
+    """The state's sequence pair decoded from scratch"""
+    fresh = sp.SequencePairState(variants, *state.export())
+    fresh.decode()
+    return fresh
+
+
+@pytest.mark.parametrize("n, seed", [(2, 1), (9, 2), (40, 3), (150, 4)])
+def test_update_matches_full_decode(sp, n, seed):
+    state, variants = make_state(sp, n, seed)
+    random.seed(seed)
+    for step in range(300):
+        undo = state.apply(state.propose())
+        assert state.update(undo) is True
+        fresh = full_decode(sp, state, variants)
+        assert decoded(state) == decoded(fresh)
+        assert state.evaluate() == fresh.evaluate()
+
+        if step % 50 == 0:
+            # the decoders themselves against the O(n^2) constraint graph reference
+            r_plus, r_minus, var_idx = state.export()
+            reference = sp.decode_sequence_pair(r_plus, r_minus, variants, var_idx)
+            assert sp.decode_sequence_pair_fast(r_plus, r_minus, variants, var_idx) == reference
+            assert state.placement() == reference
+
+        if random.random() < 0.5:
+            state.undo(undo)
+
+
+@pytest.mark.parametrize("n, seed", [(9, 5), (60, 6)])
+def test_undo_restores_previous_decode(sp, n, seed):
+    state, _ = make_state(sp, n, seed)
+    random.seed(seed)
+    for _ in range(300):
+        before = (state.snapshot(), decoded(state), state.evaluate())
+        undo = state.apply(state.propose())
+        state.update(undo)
+        state.undo(undo)
+        assert (state.snapshot(), decoded(state), state.evaluate()) == before
+        # walk on, so the next move starts from a different state
+        state.update(state.apply(state.propose()))
+
+
+@pytest.mark.parametrize("n, seed, batch", [(1, 7, 3), (9, 8, 8), (70, 9, 32)])
+def test_evaluate_batch_matches_sequential(sp, n, seed, batch):
+    state, _ = make_state(sp, n, seed)
+    random.seed(seed)
+    for _ in range(10):
+        moves = [state.propose() for _ in range(batch)]
+        fits = state.evaluate_batch(moves)
+        for move, fit in zip(moves, fits):
+            undo = state.apply(move)
+            state.update(undo)
+            assert state.evaluate() == fit
+            state.undo(undo)
+        state.update(state.apply(moves[0]))
+
+
+def thresholds(cur_fit, fit):
+    """Metropolis thresholds around the current fitness, and at and just either side of the candidate's"""
+    yield cur_fit - cur_fit * random.choice((0.0, 1e-3, 0.1, 1.0)) * math.log(1.0 - random.random())
+    yield fit * (1.0 + 1e-12)
+    yield fit
+    yield fit * (1.0 - 1e-12)
+
+
+@pytest.mark.parametrize("n, seed", [(2, 10), (9, 11), (40, 12), (150, 13)])
+def test_abort_never_rejects_an_acceptable_candidate(sp, n, seed):
+    state, variants = make_state(sp, n, seed)
+    random.seed(seed)
+    aborted = 0
+    for _ in range(150):
+        cur_fit = state.evaluate()
+        before = decoded(state)
+        move = state.propose()
+        undo = state.apply(move)
+        fit = full_decode(sp, state, variants).evaluate()
+        # revert the sequences only, the decode was not touched
+        state.apply(undo)
+        for threshold in thresholds(cur_fit, fit):
+            undo = state.apply(move)
+            if state.update(undo, threshold):
+                assert state.evaluate() == fit
+            else:
+                # update() gave up: the Metropolis test must reject the candidate
+                aborted += 1
+                assert not fit < threshold
+            state.undo(undo)
+            assert decoded(state) == before
+        # walk on, keeping the candidate half of the time
+        undo = state.apply(move)
+        state.update(undo)
+        if random.random() < 0.5:
+            state.undo(undo)
+    assert aborted > 0
+
+
+def test_area_limit_keeps_every_placement_below_threshold(sp):
+    rng = random.Random(14)
+    assert sp.area_limit(math.inf, 10.0) == math.inf
+    for _ in range(2000):
+        used_area = rng.uniform(1.0, 1e4)
+        max_x = rng.uniform(0.1, 3.0) * math.sqrt(used_area)
+        if rng.random() < 0.5:
+            # at the target aspect ratio the bound is tight: only the area terms remain
+            max_x = max(max_x, math.sqrt(used_area / sp.TARGET_ASPECT_RATIO))
+            max_y = max_x * sp.TARGET_ASPECT_RATIO
+        else:
+            max_y = max(used_area / max_x, rng.uniform(0.1, 3.0) * math.sqrt(used_area))
+        cost = sp.placement_cost(max_x, max_y, used_area)
+        # a placement costing just under the threshold is never cut off
+        assert max_x * max_y <= sp.area_limit(cost * (1.0 + 1e-12), used_area)
@@ -0,0 +1,87 @@
+"""Zobrist state keys of both annealers and the TranspositionTable"""
+
+import random
+
+import pytest
+
+from conftest import random_bstar_design, random_sequence_pair, random_variants
+
+
+@pytest.mark.parametrize("n, seed", [(1, 1), (2, 2), (9, 3), (60, 4)])
+def test_sp_key_follows_apply_and_undo(sp, n, seed):
+    variants = random_variants(n, seed)
+    state = sp.SequencePairState(variants, *random_sequence_pair(variants, seed))
+    state.decode()
+    random.seed(seed)
+    for _ in range(300):
+        before = state.key
+        undo = state.apply(state.propose())
+        assert state.key == state._state_key()
+        if random.random() < 0.5:
+            state.update(undo)
+            state.undo(undo)
+            assert state.key == before
+        else:
+            # reverting the sequences only, as a table hit does
+            state.apply(undo)
+            assert state.key == before
+            state.update(state.apply(state.propose()))
+        assert state.key == state._state_key()
+
+    # the key depends on the state only, not on the moves that led there
+    fresh = sp.SequencePairState(variants, *state.export())
+    assert fresh.key == state.key
+
+
+@pytest.mark.parametrize("n, seed", [(1, 5), (3, 6), (12, 7), (90, 8)])
+def test_bt_key_follows_moves_and_undo(bt, n, seed):
+    design = random_bstar_design(n, seed)
+    optimizer = bt.SimpleOptimizer(design)
+    optimizer._calculate_fitness()
+    random.seed(seed)
+    for _ in range(300):
+        before = optimizer.key
+        optimizer._begin_move()
+        random.choice((optimizer._op1_change_variant, optimizer._op2_swap_nodes, optimizer._op3_move_node))()
+        assert optimizer.key == optimizer._tree_key()
+        optimizer._calculate_fitness()
+        if random.random() < 0.5:
+            optimizer._undo()
+            assert optimizer.key == before
+        assert optimizer.key == optimizer._tree_key()
+
+    fresh = bt.SimpleOptimizer(design)
+    fresh._restore(optimizer._snapshot())
+    assert fresh.key == optimizer.key
+
+
+def test_table_keeps_exact_fitness_over_bounds(sp):
+    table = sp.TranspositionTable(4)
+    assert table.get(1) is None
+    table.put(1, 10.0, exact=False)
+    table.put(1, 8.0, exact=False)
+    assert table.get(1) == (10.0, False)  # the tighter lower bound stays
+    table.put(1, 12.0, exact=False)
+    assert table.get(1) == (12.0, False)
+    table.put(1, 15.0)
+    table.put(1, 20.0, exact=False)
+    assert table.get(1) == (15.0, True)
+
+    assert table.rejects(table.get(1), 15.0)
+    assert not table.rejects(table.get(1), 15.5)
+    assert not table.rejects(table.get(2), 0.0)
+    assert table.stats()["evaluations_skipped"] == 1
+
+
+def test_table_evicts_least_recently_used(sp):
+    table = sp.TranspositionTable(3)
+    for key in range(3):
+        table.put(key, float(key))
+    table.get(0)
+    table.put(3, 3.0)
+    assert table.get(1) is None
+    assert [table.get(key) for key in (0, 2, 3)] == [(0.0, True), (2.0, True), (3.0, True)]
+    stats = table.stats()
+    assert (stats["lookups"], stats["hits"]) == (5, 4)
+    merged = sp.merge_stats([stats, None, stats])
+    assert (merged["lookups"], merged["hits"], merged["hit_rate"]) == (10, 8, 80.0)